@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Time parsing ``appscripts.py`` arguments with and without a cached grammar.
+
+- ``uncached``: parse usage message and argv on every call (the old
+  behaviour, and still the behaviour without ``cachedir``)
+- ``disk cache``: load pickled grammar, then parse argv (what a new
+  process does on each keystroke)
+- ``in memory``: parse argv with an already-loaded grammar
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+import docopt  # noqa: E402
+
+import appscripts  # noqa: E402
+
+RUNS = 2000
+ARGVS = [
+    ['search'],
+    ['search', 'safari tabs'],
+    ['-v', 'config', 'query'],
+    ['toggle', 'notify'],
+    ['-d', 'reindex', 'com.apple.Safari', 'Safari', '/Applications/Safari.app'],
+]
+
+
+def timed(func):
+    """Return mean duration of ``func`` in microseconds."""
+    st = time.time()
+    for i in range(RUNS):
+        func(ARGVS[i % len(ARGVS)])
+    return (time.time() - st) * 1e6 / RUNS
+
+
+def main():
+    """Run benchmark."""
+    doc = appscripts.__doc__
+    cachedir = tempfile.mkdtemp()
+
+    def uncached(argv):
+        docopt._grammars.clear()
+        return docopt.docopt(doc, argv)
+
+    def disk_cache(argv):
+        docopt._grammars.clear()
+        return docopt.docopt(doc, argv, cachedir=cachedir)
+
+    def in_memory(argv):
+        return docopt.docopt(doc, argv, cachedir=cachedir)
+
+    try:
+        for argv in ARGVS:
+            expected = uncached(argv)
+            assert disk_cache(argv) == expected, argv
+            assert in_memory(argv) == expected, argv
+
+        # Default lists must not be shared with the cached grammar
+        doc2 = 'Usage: prog [<file>...]'
+        docopt.docopt(doc2, [])['<file>'].append('a')
+        assert docopt.docopt(doc2, []) == {'<file>': []}
+
+        print('mean parse time, {0} runs'.format(RUNS))
+        for func in (uncached, disk_cache, in_memory):
+            print('{0:10s}: {1:7.1f} us'.format(
+                  func.__name__.replace('_', ' '), timed(func)))
+    finally:
+        shutil.rmtree(cachedir)
+
+
+if __name__ == '__main__':
+    main()
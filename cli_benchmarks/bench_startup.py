@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Time ``appscripts.py`` startup up to the dispatch of ``do_search``.
+
+Each run is a new process, as it is in Alfred. ``do_search`` is
+replaced with a stub that records when it was called and the
+parsed arguments. Two times are reported (medians):
+
+- ``startup``: from the start of the script, i.e. imports,
+  ``Workflow.run`` (without update checks) and dispatch
+- ``dispatch``: from the start of ``AppScripts.run``, i.e. parsing
+  arguments
+
+- ``fast path``: arguments are parsed by ``appscripts.fast_args``
+- ``docopt``: the fast path is disabled, so arguments are parsed
+  by docopt (with a cached grammar) after the magic argument scan
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SRCDIR = os.path.join(os.path.dirname(os.path.dirname(
+                      os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRCDIR)
+
+RUNS = 30
+ARGVS = [
+    ['search'],
+    ['search', ''],
+    ['search', 'safari tabs'],
+    ['search', 'café'],
+]
+# Must not take the fast path
+FALLBACK_ARGVS = [
+    ['search', '-v'],
+    ['-v', 'search', 'query'],
+    ['search', 'one', 'two'],
+]
+
+
+def run(mode, argv):
+    """Run ``appscripts`` in this process and print JSON results."""
+    st = time.time()
+    import appscripts
+    from workflow import Workflow3
+
+    if mode == 'docopt':
+        appscripts.fast_args = lambda wf: None
+
+    result = {}
+    run_app = appscripts.AppScripts.run
+
+    def run_timed(self, wf):
+        result['dispatch'] = time.time()
+        return run_app(self, wf)
+
+    def do_search(self):
+        now = time.time()
+        result['args'] = self.args
+        result['startup'] = now - st
+        result['dispatch'] = now - result['dispatch']
+        return 0
+
+    appscripts.AppScripts.run = run_timed
+    appscripts.AppScripts.do_search = do_search
+    sys.argv = ['appscripts.py'] + argv
+    wf = Workflow3(help_url=appscripts.HELP_URL)
+    appscripts.log = wf.logger
+    wf.run(appscripts.AppScripts().run)
+    print(json.dumps(result))
+
+
+def spawn(mode, argv):
+    """Run ``appscripts`` in a new process. Return results."""
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), mode] +
+        [s.encode('utf-8') for s in argv],
+        stderr=open(os.devnull, 'w'), cwd=SRCDIR)
+    return json.loads(output.splitlines()[-1])
+
+
+def median(values):
+    """Return median of ``values``."""
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    """Run benchmark."""
+    tempdir = tempfile.mkdtemp()
+    os.environ.update({
+        'alfred_workflow_bundleid': 'net.deanishe.bench',
+        'alfred_workflow_cache': os.path.join(tempdir, 'cache'),
+        'alfred_workflow_data': os.path.join(tempdir, 'data'),
+        'alfred_workflow_version': '1.0',
+        'alfred_version': '4.0',
+    })
+    import appscripts
+
+    try:
+        # Same arguments via either path
+        for argv in ARGVS:
+            assert spawn('fast', argv)['args'] == \
+                spawn('docopt', argv)['args'], argv
+        for argv in FALLBACK_ARGVS:
+            assert appscripts.fast_args(FakeWorkflow(argv)) is None, argv
+        print('arguments: OK')
+
+        print('median time to do_search, {0} runs'.format(RUNS))
+        for mode, name in (('docopt', 'docopt'), ('fast', 'fast path')):
+            results = [spawn(mode, ARGVS[i % len(ARGVS)])
+                       for i in range(RUNS)]
+            print('{0:9s}: startup {1:6.2f} ms, dispatch {2:5.2f} ms'.format(
+                  name, median(r['startup'] for r in results) * 1000,
+                  median(r['dispatch'] for r in results) * 1000))
+    finally:
+        shutil.rmtree(tempdir)
+
+
+class FakeWorkflow(object):
+    """Just enough of `Workflow` for ``fast_args``."""
+
+    magic_prefix = 'workflow:'
+
+    def __init__(self, argv):
+        """Set ``sys.argv``."""
+        sys.argv = ['appscripts.py'] + argv
+
+    def decode(self, s):
+        """Return ``s`` unchanged."""
+        return s
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(sys.argv[1], [s.decode('utf-8') for s in sys.argv[2:]])
+    else:
+        main()
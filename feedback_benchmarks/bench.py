@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Time and count allocations for building and rendering feedback items."""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+from workflow import Workflow3  # noqa: E402
+
+SIZES = (1000, 5000, 10000, 50000)
+
+
+def sizeof(item):
+    """Approximate memory used by an item and its containers."""
+    size = sys.getsizeof(item)
+    if hasattr(item, '__dict__'):  # old-style item with dicts
+        attrs = item.__dict__
+        size += sys.getsizeof(attrs)
+    else:
+        attrs = dict((k, getattr(item, k)) for k in item.__slots__)
+
+    for value in attrs.values():
+        if isinstance(value, dict):
+            size += sys.getsizeof(value)
+
+    return size
+
+
+def build(n):
+    """Add ``n`` items like those added by ``do_search``."""
+    wf = Workflow3()
+    for i in range(n):
+        path = '/Users/me/Library/Scripts/Applications/App/{}.scpt'.format(i)
+        wf.add_item('Script {}'.format(i), '↩ to run', arg=path, uid=path,
+                    valid=True, icon=path, icontype='fileicon')
+    return wf
+
+
+def main():
+    """Run benchmarks."""
+    for n in SIZES:
+        gc.collect()
+        objects = len(gc.get_objects())
+
+        st = time.time()
+        wf = build(n)
+        d_build = time.time() - st
+
+        objects = len(gc.get_objects()) - objects
+        size = sum(sizeof(it) for it in wf._items)
+
+        st = time.time()
+        wf.render_feedback()
+        d_render = time.time() - st
+
+        print('{:6d} items  build={:0.3f}s  render={:0.3f}s  '
+              'gc objects={:d}  bytes/item={:d}'.format(
+                  n, d_build, d_render, objects, size // n))
+        del wf
+
+
+if __name__ == '__main__':
+    main()
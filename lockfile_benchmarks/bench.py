@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Time contended `LockFile` acquisition across several processes.
+
+Each process acquires the lock, holds it briefly, then releases it.
+The old sleep-polling lock is included for comparison.
+
+Also checks that repeatedly timing out while another process holds
+the lock doesn't leave a helper thread (and open file) per attempt.
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import errno
+import fcntl
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+from workflow.util import AcquisitionError, LockFile  # noqa: E402
+
+PROCESSES = (2, 4, 8)
+ITERATIONS = 50
+# How long each process holds the lock
+HOLD = 0.002
+
+
+class PollingLock(object):
+    """The old `LockFile` implementation: poll every 50 ms."""
+
+    def __init__(self, path, delay=0.05):
+        """Create new lock for ``path``."""
+        self.lockfile = path + '.lock'
+        self.delay = delay
+        self.fp = None
+
+    def __enter__(self):
+        """Acquire lock."""
+        self.fp = open(self.lockfile, 'a')
+        while True:
+            try:
+                fcntl.lockf(self.fp, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return self
+            except IOError as err:
+                if err.errno not in (errno.EACCES, errno.EAGAIN):
+                    raise
+                time.sleep(self.delay)
+
+    def __exit__(self, *args):
+        """Release lock."""
+        fcntl.lockf(self.fp, fcntl.LOCK_UN)
+        self.fp.close()
+
+
+def polling(path):
+    """Old polling lock."""
+    return PollingLock(path)
+
+
+def exclusive(path):
+    """Exclusive `LockFile`."""
+    return LockFile(path)
+
+
+def shared(path):
+    """Shared `LockFile`."""
+    return LockFile(path, shared=True)
+
+
+def worker(factory, path, queue):
+    """Acquire lock ``ITERATIONS`` times and report wait times."""
+    waits = []
+    for _ in range(ITERATIONS):
+        st = time.time()
+        with factory(path):
+            waits.append(time.time() - st)
+            time.sleep(HOLD)
+    queue.put(waits)
+
+
+def hold(path, held, release):
+    """Hold exclusive `LockFile` on ``path`` until ``release`` is set."""
+    with LockFile(path):
+        held.set()
+        release.wait()
+
+
+def check_timeouts(path):
+    """Time out repeatedly, then acquire lock once it's released."""
+    for shared in (False, True):
+        held, release = multiprocessing.Event(), multiprocessing.Event()
+        proc = multiprocessing.Process(target=hold,
+                                       args=(path, held, release))
+        proc.start()
+        held.wait()
+
+        threads = threading.active_count()
+        for _ in range(20):
+            try:
+                LockFile(path, timeout=0.01, shared=shared).acquire()
+            except AcquisitionError:
+                pass
+            else:
+                raise AssertionError('lock acquired')
+        assert threading.active_count() <= threads + 1, \
+            threading.active_count()
+
+        release.set()
+        proc.join()
+        lock = LockFile(path, timeout=1, shared=shared)
+        assert lock.acquire()
+        lock.release()
+        time.sleep(0.05)
+        # Helper thread was reused and has exited
+        assert threading.active_count() == threads, threading.active_count()
+
+    print('timeouts: OK')
+
+
+def main():
+    """Run benchmarks."""
+    tempdir = tempfile.mkdtemp()
+    path = os.path.join(tempdir, 'data')
+    try:
+        check_timeouts(path)
+        for n in PROCESSES:
+            for factory in (polling, exclusive, shared):
+                queue = multiprocessing.Queue()
+                procs = [multiprocessing.Process(target=worker,
+                                                 args=(factory, path, queue))
+                         for _ in range(n)]
+                st = time.time()
+                for p in procs:
+                    p.start()
+                waits = []
+                for _ in procs:
+                    waits.extend(queue.get())
+                for p in procs:
+                    p.join()
+                d = time.time() - st
+
+                waits.sort()
+                print('{:d} procs  {:10s} total={:0.3f}s  '
+                      'avg wait={:0.2f} ms  max wait={:0.2f} ms'.format(
+                          n, factory.__name__, d,
+                          sum(waits) * 1000 / len(waits),
+                          waits[-1] * 1000))
+    finally:
+        shutil.rmtree(tempdir)
+
+
+if __name__ == '__main__':
+    main()
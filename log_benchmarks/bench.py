@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Time a directory scan like AppScripts' with debug logging.
+
+Each mode runs in a new process with ``Workflow.logger`` at level
+``DEBUG``, as when Alfred's debugger is open:
+
+- ``no logging``: scan without logging each script (baseline)
+- ``sync``: log each script with the normal handlers
+- ``async``: log each script with ``async_logging=True``
+- ``async+summary``: ``async_logging=True`` and ``LogSummary``
+
+After each process exits, the log file is checked to make sure
+all records were written.
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+from collections import namedtuple
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+SIZES = (1000, 5000, 10000)
+MODES = ('no logging', 'sync', 'async', 'async+summary')
+RUNS = 3
+
+Script = namedtuple('Script', 'name path appdir')
+
+
+def scan(mode, dirpath):
+    """Scan ``dirpath`` in this process and print duration."""
+    from workflow import Workflow3
+    from workflow.util import LogSummary
+
+    wf = Workflow3(async_logging=mode.startswith('async'))
+    log = wf.logger
+    st = time.time()
+    scripts = {}
+    log.debug('loading scripts from `%s`...', dirpath)
+    found = LogSummary(log, 'script(s) in `%s`', dirpath)
+    for filename in os.listdir(dirpath):
+        if os.path.splitext(filename)[1] != '.scpt':
+            continue
+        path = os.path.join(dirpath, filename)
+        script = Script(os.path.splitext(filename)[0], path, False)
+        if mode.endswith('summary'):
+            found.add(script)
+        elif mode != 'no logging':
+            log.debug('%r', script)
+        scripts[path] = script
+
+    if mode.endswith('summary'):
+        with found:
+            pass
+    print(time.time() - st)
+
+
+def run(mode, dirpath, tempdir):
+    """Run ``scan`` in a new process. Return duration and log lines."""
+    logfile = os.path.join(tempdir, 'cache', 'net.deanishe.bench.log')
+    logfiles = (logfile, logfile + '.1')  # log is rotated at 1 MB
+    for path in logfiles:
+        if os.path.exists(path):
+            os.unlink(path)
+
+    with open(os.devnull, 'w') as devnull:
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), mode, dirpath],
+            stderr=devnull)
+
+    lines = 0
+    for path in logfiles:
+        if os.path.exists(path):
+            with open(path) as fp:
+                lines += sum(1 for _ in fp)
+    return float(output), lines
+
+
+def main():
+    """Run benchmark."""
+    tempdir = tempfile.mkdtemp()
+    os.environ.update({
+        'alfred_workflow_bundleid': 'net.deanishe.bench',
+        'alfred_workflow_cache': os.path.join(tempdir, 'cache'),
+        'alfred_workflow_data': os.path.join(tempdir, 'data'),
+        'alfred_debug': '1',
+    })
+
+    try:
+        for size in SIZES:
+            dirpath = os.path.join(tempdir, str(size))
+            os.makedirs(dirpath)
+            for i in range(size):
+                open(os.path.join(dirpath, 'Script {0:05d}.scpt'.format(i)),
+                     'w').close()
+
+            print('{0} scripts, best of {1}'.format(size, RUNS))
+            for mode in MODES:
+                results = [run(mode, dirpath, tempdir) for _ in range(RUNS)]
+                lines = results[0][1]
+                if mode in ('sync', 'async'):
+                    assert lines == size + 1, (mode, lines)
+                elif mode == 'async+summary':
+                    assert lines == 2, (mode, lines)
+
+                print('  {0:14s}: {1:7.2f} ms, {2:5d} log lines'.format(
+                      mode, min(r[0] for r in results) * 1000, lines))
+    finally:
+        shutil.rmtree(tempdir)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        scan(*[s.decode('utf-8') for s in sys.argv[1:]])
+    else:
+        main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Check and time scanning of overlapping script directories.
+
+Synthetic trees are built in a temporary directory with:
+
+- an application directory listed under its name and, via a symlink,
+  its bundle ID
+- symlink cycles and a symlink to a sibling directory
+- a hard-linked script
+- an application directory inside a general directory
+- a script bundle (``.scptd``)
+
+``AppScripts._find_scripts`` must find each script once, scan each
+directory once, terminate on cycles and keep scripts found in
+application directories application-specific.
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+TEMPDIR = tempfile.mkdtemp()
+os.environ.update({
+    'alfred_workflow_bundleid': 'net.deanishe.bench',
+    'alfred_workflow_cache': os.path.join(TEMPDIR, 'cache'),
+    'alfred_workflow_data': os.path.join(TEMPDIR, 'data'),
+})
+
+import appscripts  # noqa: E402
+from workflow import Workflow3  # noqa: E402
+
+APP_NAME = 'Safari'
+BUNDLE_ID = 'com.apple.Safari'
+SCRIPTS = 1000  # per directory in timing tree
+
+
+def touch(*parts):
+    """Create empty file."""
+    path = os.path.join(*parts)
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    open(path, 'w').close()
+    return path
+
+
+def make_tree(root):
+    """Create synthetic script directories under ``root``."""
+    apps = os.path.join(root, 'Applications')
+    # app directory and symlinked alias
+    touch(apps, APP_NAME, 'App.applescript')
+    touch(apps, APP_NAME, 'Nested', 'Deep.scpt')
+    os.symlink(APP_NAME, os.path.join(apps, BUNDLE_ID))
+
+    general = os.path.join(root, 'General')
+    touch(general, 'General.scpt')
+    # cycles: to self, to parent and between siblings
+    os.makedirs(os.path.join(general, 'a', 'b'))
+    os.symlink('.', os.path.join(general, 'self'))
+    os.symlink('..', os.path.join(general, 'a', 'b', 'up'))
+    touch(general, 'c', 'Sibling.js')
+    os.symlink(os.path.join('..', '..', 'c'),
+               os.path.join(general, 'a', 'b', 'c'))
+    os.symlink(os.path.join('..', 'a'), os.path.join(general, 'c', 'a'))
+    # hard link, broken symlink and a bundle
+    os.link(os.path.join(general, 'General.scpt'),
+            os.path.join(general, 'a', 'Hardlink.scpt'))
+    os.symlink('missing', os.path.join(general, 'Broken.scpt'))
+    touch(general, 'Bundle.scptd', 'Contents', 'Resources', 'Scripts',
+          'main.scpt')
+    # application directory inside general directory
+    os.symlink(os.path.join(apps, APP_NAME),
+               os.path.join(general, 'AppLink'))
+
+    with open(os.path.join(root, 'paths.txt'), 'w') as fp:
+        fp.write('\n'.join([
+            os.path.join(general),
+            os.path.join(apps, '{app_name}'),
+            os.path.join(apps, '{bundle_id}'),
+            os.path.join(apps, '{app_name}'),
+            os.path.join(root, 'Missing', '{app_name}'),
+        ]))
+
+
+def make_app(root, recursive):
+    """Return `AppScripts` configured for ``root``."""
+    wf = Workflow3()
+    wf.settings['recursive'] = recursive
+    app = appscripts.AppScripts()
+    app.wf = wf
+    app.search_paths_file = os.path.join(root, 'paths.txt')
+    app._app_name = APP_NAME
+    app._bundle_id = BUNDLE_ID
+    app._app_path = '/Applications/Safari.app'
+    return app
+
+
+def check(root):
+    """Check scripts found in synthetic tree."""
+    for recursive in (False, True):
+        app = make_app(root, recursive)
+        dirs = app._load_script_directories()
+        assert len(dirs) == 2, dirs
+        assert sorted(appdir for _, appdir in dirs) == [False, True], dirs
+
+        scripts, complete = app._find_scripts()
+        assert complete
+        found = sorted((s.name, s.appdir) for s in scripts)
+        if recursive:
+            # Hardlink.scpt is General.scpt; Deep.scpt is found via app
+            # directory, not AppLink, so it is app-specific
+            expected = [('App', True), ('Bundle', False), ('Deep', True),
+                        ('General', False), ('Sibling', False)]
+        else:
+            expected = [('App', True), ('Bundle', False),
+                        ('General', False)]
+        assert found == expected, found
+        print('recursive={0}: {1} script(s) OK'.format(recursive,
+                                                       len(scripts)))
+
+
+def make_timing_tree(root):
+    """Create app directory with an alias and ``SCRIPTS`` scripts."""
+    apps = os.path.join(root, 'Applications')
+    for i in range(SCRIPTS):
+        touch(apps, APP_NAME, 'Script {0:04d}.applescript'.format(i))
+    os.symlink(APP_NAME, os.path.join(apps, BUNDLE_ID))
+    with open(os.path.join(root, 'paths.txt'), 'w') as fp:
+        fp.write('\n'.join([os.path.join(apps, '{app_name}'),
+                            os.path.join(apps, '{bundle_id}')]))
+
+
+def main():
+    """Run checks and benchmark."""
+    logging.disable(logging.WARNING)
+    appscripts.log = logging.getLogger('')
+    try:
+        root = os.path.join(TEMPDIR, 'tree')
+        make_tree(root)
+        check(root)
+
+        root = os.path.join(TEMPDIR, 'timing')
+        make_timing_tree(root)
+        app = make_app(root, False)
+        # Prime description cache
+        scripts = app._find_scripts()[0]
+        assert len(scripts) == SCRIPTS, len(scripts)
+        st = time.time()
+        for _ in range(10):
+            app._find_scripts()
+        print('{0} scripts, directory listed twice: {1:.1f} ms '
+              'per scan'.format(SCRIPTS, (time.time() - st) * 100))
+    finally:
+        shutil.rmtree(TEMPDIR)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Time single- and multi-key updates of `Settings`."""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+from workflow.workflow import Settings  # noqa: E402
+
+ITERATIONS = 200
+KEYS = 10
+
+
+def single_key(s, i):
+    """Change one key."""
+    s['key0'] = i
+
+
+def multi_key(s, i):
+    """Change several keys, saving after each one."""
+    for n in range(KEYS):
+        s['key{}'.format(n)] = i
+
+
+def multi_key_transaction(s, i):
+    """Change several keys in one transaction."""
+    with s.transaction():
+        for n in range(KEYS):
+            s['key{}'.format(n)] = i
+
+
+def unchanged(s, i):
+    """Re-save settings without changing them."""
+    s.update({'key0': 0})
+
+
+def check_external_change(tempdir):
+    """Check a re-save isn't skipped if another process changed the file."""
+    path = os.path.join(tempdir, 'external.json')
+    s = Settings(path, {'key0': 0})
+    other = Settings(path)
+    other['key0'] = 1
+    s['key0'] = 0
+    assert Settings(path)['key0'] == 0, 'save skipped after external change'
+    print('{:40s}ok'.format('re-save after external change'))
+
+
+def main():
+    """Run benchmarks."""
+    tempdir = tempfile.mkdtemp()
+    try:
+        check_external_change(tempdir)
+        for func in (single_key, multi_key, multi_key_transaction,
+                     unchanged):
+            for skip in (False, True):
+                path = os.path.join(tempdir, 'settings.json')
+                if os.path.exists(path):
+                    os.unlink(path)
+                s = Settings(path, {'key0': 0}, skip_unchanged=skip)
+
+                st = time.time()
+                for i in range(ITERATIONS):
+                    func(s, i)
+                d = time.time() - st
+
+                name = '{}{}'.format(func.__name__,
+                                     ' (skip_unchanged)' if skip else '')
+                print('{:40s}{:0.4f} ms/call'.format(
+                      name, d * 1000 / ITERATIONS))
+    finally:
+        shutil.rmtree(tempdir)
+
+
+if __name__ == '__main__':
+    main()
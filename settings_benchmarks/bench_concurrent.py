@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Time reads of `settings.json` while other processes write to it.
+
+Compares reads via `Settings` (no lock) with reads that take the
+`LockFile` first (the old behaviour).
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+from workflow.util import LockFile  # noqa: E402
+from workflow.workflow import Settings  # noqa: E402
+
+WRITERS = 4
+READS = 500
+
+
+def writer(path, stop):
+    """Update settings until ``stop`` is set."""
+    s = Settings(path)
+    i = 0
+    while not stop.is_set():
+        with s.transaction():
+            s['counter'] = i
+            s['data'] = ['x' * 100] * 100
+        i += 1
+
+
+def read_unlocked(path):
+    """Read settings via `Settings`."""
+    return Settings(path)
+
+
+def read_locked(path):
+    """Read settings with `LockFile` held."""
+    with LockFile(path, 0.5):
+        with open(path, 'rb') as fp:
+            return fp.read()
+
+
+def main():
+    """Run benchmarks."""
+    tempdir = tempfile.mkdtemp()
+    path = os.path.join(tempdir, 'settings.json')
+    Settings(path, {'counter': 0})
+    stop = multiprocessing.Event()
+    procs = [multiprocessing.Process(target=writer, args=(path, stop))
+             for _ in range(WRITERS)]
+    try:
+        for p in procs:
+            p.start()
+
+        for func in (read_locked, read_unlocked):
+            times = []
+            for _ in range(READS):
+                st = time.time()
+                func(path)
+                times.append(time.time() - st)
+
+            times.sort()
+            print('{:15s} avg={:0.3f} ms  p99={:0.3f} ms  max={:0.3f} ms'
+                  .format(func.__name__,
+                          sum(times) * 1000 / READS,
+                          times[int(READS * 0.99)] * 1000,
+                          times[-1] * 1000))
+    finally:
+        stop.set()
+        for p in procs:
+            p.join()
+        shutil.rmtree(tempdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,6 +17,7 @@ Usage:
     appscripts.py [-v|-q|-d] config [<query>]
     appscripts.py [-v|-q|-d] toggle <key>
     appscripts.py [-v|-q|-d] userpaths
+    appscripts.py [-v|-q|-d] reindex <bundleid> <appname> <apppath>
     appscripts.py (-h|--version)
 
 Options:
@@ -30,17 +31,30 @@ Options:
 
 from __future__ import print_function, unicode_literals, absolute_import
 
+import codecs
 from collections import namedtuple
 from contextlib import contextmanager
+import json
 import os
+import plistlib
+import re
 import shutil
+import stat
 import subprocess
+import sys
 from time import time
 
-from docopt import docopt
-
-from workflow import Workflow3, ICON_WARNING, ICON_INFO, ICON_ERROR
-from workflow.util import run_command
+from workflow import (
+    Workflow3,
+    ICON_WARNING,
+    ICON_INFO,
+    ICON_ERROR,
+    ICON_SYNC,
+    MATCH_ATOM,
+    MATCH_STARTSWITH,
+    MATCH_SUBSTRING,
+)
+from workflow.util import atomic_writer, LockFile, LogSummary, run_command
 
 
 log = None
@@ -59,6 +73,65 @@ DEFAULT_PATHS_FILE = os.path.join(os.path.dirname(__file__),
 # Acceptable extensions for AppleScripts
 SCRIPT_EXTENSIONS = ['.scpt', '.applescript', '.scptd', '.js']
 
+# Cache of script descriptions. Maps path to ``(key, description)``,
+# where ``key`` is the modification time and size of the file the
+# description was read from. Shared by all applications, so it's
+# updated under a lock.
+DESCRIPTIONS_CACHE = 'script-descriptions'
+
+# Number of threads that read descriptions from scripts
+DESCRIPTION_WORKERS = 4
+
+# How much of a script to read to find its description
+DESCRIPTION_READ_SIZE = 4096
+
+# Maximum length of descriptions
+DESCRIPTION_LENGTH = 200
+
+# Comment syntax of script types whose description is their leading
+# comment: line comment markers and block comment start and end
+COMMENT_SYNTAX = {
+    '.applescript': (('--', '#'), ('(*', '*)')),
+    '.js': (('//',), ('/*', '*/')),
+}
+
+# RTF groups that don't contain document text
+RTF_DESTINATIONS = ('colortbl', 'expandedcolortbl', 'fonttbl', 'info',
+                    'pict', 'stylesheet')
+
+# Match control words, escaped characters, braces, line breaks
+# (which aren't text) and text in RTF
+match_rtf_token = re.compile(r"\\([a-zA-Z]+)(-?\d+)? ?|\\'([0-9a-fA-F]{2})|"
+                             r"\\(.)|([{}])|\r?\n|([^\\{}\r\n]+)",
+                             re.DOTALL).finditer
+
+# How long (in seconds) a search may spend scanning directories
+# before showing partial results
+SEARCH_BUDGET = 0.25
+
+# How soon (in seconds) Alfred should re-run a search that returned
+# partial results
+RERUN_INTERVAL = 0.5
+
+# Arguments returned by docopt for ``search [<query>]``. See `fast_args`.
+SEARCH_ARGS = {
+    '--debug': False,
+    '--help': False,
+    '--quiet': False,
+    '--verbose': False,
+    '--version': False,
+    '<appname>': None,
+    '<apppath>': None,
+    '<bundleid>': None,
+    '<key>': None,
+    '<query>': None,
+    'config': False,
+    'reindex': False,
+    'search': True,
+    'toggle': False,
+    'userpaths': False,
+}
+
 # Icons
 ICON_UPDATE = 'icons/update-available.icns'
 ICON_NO_UPDATE = 'icons/update-none.icns'
@@ -90,9 +163,256 @@ def is_script(filename):
     return ext.lower() in SCRIPT_EXTENSIONS
 
 
+def fast_args(wf):
+    """Parse ``search [<query>]`` arguments without docopt.
+
+    ``search`` is run on every keystroke, so its arguments are
+    recognised directly instead of by docopt and the scan for magic
+    arguments in :attr:`Workflow.args`.
+
+    Args:
+        wf (workflow.Workflow): Active Workflow object.
+
+    Returns:
+        dict: The same arguments docopt would return, or ``None`` if
+            the command isn't a plain search and must be parsed by
+            docopt. That includes queries docopt would treat as
+            options and magic arguments.
+
+    """
+    argv = sys.argv[1:]
+    if not argv or argv[0] != 'search' or len(argv) > 2:
+        return None
+
+    args = SEARCH_ARGS.copy()
+    if len(argv) == 2:
+        query = wf.decode(argv[1])
+        if query.startswith('-') or query.startswith(wf.magic_prefix):
+            return None
+        args['<query>'] = query
+
+    return args
+
+
+def walk_scripts(dirpath, recursive=False, seen=None):
+    """Generate scripts in directory ``dirpath``.
+
+    Symlinks are followed. Directories and scripts are identified by
+    device and inode, so a directory that can be reached by several
+    paths is only scanned once, which also stops symlink cycles.
+    Script bundles (``.scptd``) are not scanned.
+
+    Args:
+        dirpath (unicode): Directory to scan.
+        recursive (bool, optional): Whether to scan subdirectories.
+        seen (set, optional): ``(st_dev, st_ino)`` of directories
+            already scanned. Directories are added to it as they are
+            scanned.
+
+    Yields:
+        tuple: ``(path, key)`` for each script, where ``key`` is
+            ``(st_dev, st_ino)``, and ``(dirpath, None)`` before each
+            directory is scanned, so the caller may stop.
+
+    """
+    if seen is None:
+        seen = set()
+
+    try:
+        st = os.stat(dirpath)
+    except OSError as err:
+        log.warning('could not read directory `%s`: %s', dirpath, err)
+        return
+
+    key = (st.st_dev, st.st_ino)
+    if key in seen:
+        log.debug('skipped `%s`: already scanned', dirpath)
+        return
+
+    seen.add(key)
+    stack = [dirpath]
+    while stack:
+        dirpath = stack.pop()
+        yield dirpath, None
+        try:
+            names = os.listdir(dirpath)
+        except OSError as err:
+            log.warning('could not read directory `%s`: %s', dirpath, err)
+            continue
+
+        subdirs = []
+        for name in names:
+            script = is_script(name)
+            if not script and not recursive:
+                continue
+
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:  # broken symlink
+                continue
+
+            key = (st.st_dev, st.st_ino)
+            if script:
+                yield path, key
+            elif stat.S_ISDIR(st.st_mode):
+                if key in seen:
+                    log.debug('skipped `%s`: already scanned', path)
+                    continue
+                seen.add(key)
+                subdirs.append(path)
+
+        stack.extend(reversed(subdirs))
+
+
+def leading_comment(text, line_markers, block):
+    """Return text of the comment at the start of ``text``.
+
+    Args:
+        text (unicode): Source code.
+        line_markers (tuple): Strings that start a line comment.
+        block (tuple): Strings that start and end a block comment.
+
+    Returns:
+        unicode: Comment text joined into one line, or an empty string.
+
+    """
+    text = text.lstrip()
+    if text.startswith('#!'):
+        text = text.partition('\n')[2].lstrip()
+
+    lines = []
+    start, end = block
+    if text.startswith(start):
+        body = text[len(start):]
+        idx = body.find(end)
+        if idx > -1:
+            body = body[:idx]
+        # strip leading * of JSDoc-style comments, too
+        lines = [line.strip().lstrip('*') for line in body.splitlines()]
+    else:
+        for line in text.splitlines():
+            line = line.strip()
+            for marker in line_markers:
+                if line.startswith(marker):
+                    lines.append(line[len(marker):])
+                    break
+            else:
+                break
+
+    return ' '.join(line.strip() for line in lines if line.strip())
+
+
+def rtf_to_text(rtf):
+    """Return plain text of a simple RTF document."""
+    text = []
+    stack = []  # whether enclosing groups are skipped
+    skipping = False
+    skip_chars = 0  # ASCII fallback of \uN escape
+    for m in match_rtf_token(rtf):
+        word, num, hexcode, symbol, brace, chars = m.groups()
+        if brace == '{':
+            stack.append(skipping)
+        elif brace == '}':
+            skipping = stack.pop() if stack else False
+        elif skipping:
+            continue
+        elif word in RTF_DESTINATIONS or symbol == '*':
+            skipping = True
+        elif word in ('par', 'line'):
+            text.append('\n')
+        elif word == 'u' and num:
+            text.append(unichr(int(num) % 65536))
+            skip_chars = 1
+        elif hexcode:
+            if skip_chars:  # e.g. \'80 after \u8364
+                skip_chars -= 1
+            else:
+                text.append(chr(int(hexcode, 16)).decode('cp1252',
+                                                         'replace'))
+        elif symbol:
+            text.append('\n' if symbol == '\n' else symbol)
+        elif chars:
+            text.append(chars[skip_chars:])
+            skip_chars = 0
+
+    return ''.join(text).strip()
+
+
+def description_file(path):
+    """Return path of the file a script's description is read from.
+
+    That is the script itself, or for ``.scptd`` bundles, the bundle's
+    description or ``Info.plist``.
+
+    """
+    if not path.lower().endswith('.scptd'):
+        return path
+
+    for relpath in ('Contents/Resources/description.rtfd/TXT.rtf',
+                    'Contents/Info.plist'):
+        filepath = os.path.join(path, relpath)
+        if os.path.exists(filepath):
+            return filepath
+
+    return path
+
+
+def script_description(path):
+    """Read description of script at ``path``.
+
+    The description of ``.applescript`` and ``.js`` files is their
+    leading comment, and of ``.scptd`` bundles, the description set in
+    Script Editor or their ``Info.plist``'s ``CFBundleGetInfoString``.
+    Compiled ``.scpt`` files have no description.
+
+    Args:
+        path (unicode): Path to script.
+
+    Returns:
+        unicode: Description or an empty string.
+
+    """
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext == '.scptd':
+            filepath = description_file(path)
+            if filepath.endswith('.rtf'):
+                with open(filepath, 'rb') as fp:
+                    text = rtf_to_text(fp.read().decode('latin-1'))
+            elif filepath.endswith('.plist'):
+                info = plistlib.readPlist(filepath)
+                text = info.get('CFBundleGetInfoString') or ''
+            else:
+                text = ''
+
+        elif ext in COMMENT_SYNTAX:
+            with open(path, 'rb') as fp:
+                data = fp.read(DESCRIPTION_READ_SIZE)
+            if data.startswith((codecs.BOM_UTF16_BE, codecs.BOM_UTF16_LE)):
+                data = data.decode('utf-16', 'replace')
+            else:
+                data = data.decode('utf-8-sig', 'replace')
+            text = leading_comment(data, *COMMENT_SYNTAX[ext])
+
+        else:
+            return ''
+
+    except Exception as err:  # unreadable file or invalid plist
+        log.warning('could not read description of %r: %s', path, err)
+        return ''
+
+    text = ' '.join(text.split())
+    if len(text) > DESCRIPTION_LENGTH:
+        text = text[:DESCRIPTION_LENGTH - 1].rstrip() + '…'
+    return text
+
+
 # Data object. appdir is bool: whether script was in an application
-# directory or not.
-Script = namedtuple('Script', 'name path appdir')
+# directory or not. description is extracted by `script_description`.
+Script = namedtuple('Script', 'name path appdir description')
+# indexes cached before descriptions were added have no description
+Script.__new__.__defaults__ = ('',)
 
 
 class AppScripts(object):
@@ -123,7 +443,11 @@ class AppScripts(object):
             log.debug('Installing default paths file...')
             shutil.copy(DEFAULT_PATHS_FILE, self.search_paths_file)
 
-        self.args = docopt(__doc__, version=wf.version, argv=wf.args)
+        self.args = fast_args(wf)
+        if self.args is None:
+            from docopt import docopt
+            self.args = docopt(__doc__, version=wf.version, argv=wf.args,
+                               cachedir=wf.cachedir)
         log.debug('args=%r', self.args)
 
         if self.args.get('search'):
@@ -134,13 +458,15 @@ class AppScripts(object):
             return self.do_userpaths()
         elif self.args.get('toggle'):
             return self.do_toggle()
+        elif self.args.get('reindex'):
+            return self.do_reindex()
         else:
             raise ValueError('Unknown action')
 
     # ---------------------------------------------------------
     # Application actions
 
-    def do_search(self):
+    def do_search(self, budget=SEARCH_BUDGET):
         """View and filter available scripts.
 
         - Get frontmost app
@@ -149,36 +475,63 @@ class AppScripts(object):
         - Show list of available scripts or warning if
           none match query/were found
 
+        If there is no cached script list and scanning the directories
+        takes longer than ``budget`` seconds, the scripts found so far
+        are shown, and Alfred is told to re-run the search while the
+        scan is completed in the background.
+
+        Args:
+            budget (float, optional): Time limit for scanning
+                directories in seconds. ``0`` means no limit.
+
         """
         args = self.args
         wf = self.wf
 
         query = args.get('<query>')
+        update_available = wf.update_available
 
-        if wf.update_available:
+        if update_available:
             wf.add_item('A new version is available',
                         '↩ or ⇥ to install update',
                         autocomplete='workflow:update',
                         icon=ICON_UPDATE)
 
+        # Stat index before loading it. If the index is replaced after
+        # this, the key won't match the feedback rendered from it.
+        mtime = self._index_mtime()
         try:
-            scripts = self.get_scripts_for_app()
+            scripts = self.get_scripts_for_app(budget)
         except RuntimeError as err:
             self.show_error(unicode(err, 'utf-8'))
             return 1
 
+        # Scan exceeded budget and is being finished in the background
+        partial = bool(wf.rerun)
+
         if not scripts:
-            self.show_warning('No scripts for ' + self.app_name)
+            if partial:
+                self.show_scanning()
+            else:
+                self.show_warning('No scripts for ' + self.app_name)
             return 0
 
+        # Output without a query only depends on the app, the script
+        # index and whether an update is available
+        key = None
+        if not query and not partial:
+            key = self._feedback_key(mtime, update_available)
+            if key and self._send_cached_feedback(key):
+                return 0
+
         if query:
-            scripts = wf.filter(query,
-                                scripts,
-                                key=lambda t: os.path.basename(t[0]),
-                                min_score=30)
+            scripts = self.filter_scripts(query, scripts)
 
         if not scripts:
-            self.show_warning('No matching scripts')
+            if partial:
+                self.show_scanning()
+            else:
+                self.show_warning('No matching scripts')
             return 0
 
         for script in scripts:
@@ -188,14 +541,42 @@ class AppScripts(object):
                 icon_file = script.path
             wf.add_item(
                 script.name,
-                '↩ to run',
+                script.description or '↩ to run',
                 arg=script.path,
                 uid=script.path,
                 valid=True,
                 icon=icon_file,
                 icontype='fileicon',
             )
-        wf.send_feedback()
+
+        if partial:
+            self.show_message('Scanning for more scripts…',
+                              'Results will update automatically',
+                              ICON_SYNC)
+
+        if key:
+            self._cache_feedback(key)
+        else:
+            wf.send_feedback()
+
+    def filter_scripts(self, query, scripts):
+        """Return ``scripts`` that match ``query``.
+
+        Scripts whose names match are returned first, followed by
+        scripts whose descriptions contain ``query``.
+
+        """
+        wf = self.wf
+        matches = wf.filter(query, scripts, key=lambda s: s.name,
+                            min_score=30)
+        if len(matches) < len(scripts):
+            found = set(matches)
+            rest = [s for s in scripts if s.description and s not in found]
+            matches += wf.filter(query, rest, key=lambda s: s.description,
+                                 min_score=30, match_on=MATCH_STARTSWITH |
+                                 MATCH_ATOM | MATCH_SUBSTRING)
+
+        return matches
 
     def do_config(self):
         """Show configuration options."""
@@ -274,8 +655,27 @@ class AppScripts(object):
             status = 'on'
         print("Option '{0}' turned {1}".format(key, status))
 
-        # Clear cached scripts
-        wf.clear_cache(lambda filename: filename.startswith('appscripts-'))
+        # Clear cached scripts and descriptions
+        wf.clear_cache(lambda filename: filename.startswith(
+            ('appscripts-', DESCRIPTIONS_CACHE)))
+
+    def do_reindex(self):
+        """Update cached list of scripts for application.
+
+        Run in the background by :meth:`get_scripts_for_app` when the
+        cached list has expired. The application is passed in the
+        arguments, as it may no longer be frontmost.
+
+        """
+        args = self.args
+        self._bundle_id = args.get('<bundleid>')
+        self._app_name = args.get('<appname>')
+        self._app_path = args.get('<apppath>')
+
+        with timer('find scripts'):
+            scripts = self._get_scripts_for_app()
+
+        self.wf.cache_data(self.cache_name, scripts)
 
     # ---------------------------------------------------------
     # Properties for active application
@@ -301,6 +701,11 @@ class AppScripts(object):
             self._get_frontmost_app()
         return self._bundle_id
 
+    @property
+    def cache_name(self):
+        """Name of cache for active application's scripts."""
+        return 'appscripts-' + self.bundle_id
+
     # ---------------------------------------------------------
     # Helper methods
 
@@ -325,6 +730,79 @@ class AppScripts(object):
             self._app_path = app_path
             self._bundle_id = bundle_id
 
+    @property
+    def feedback_cache(self):
+        """Path to rendered feedback for active application."""
+        return self.wf.cachefile(self.cache_name + '.feedback')
+
+    def _index_mtime(self):
+        """Return modification time of script index.
+
+        Returns:
+            float: Modification time or ``None`` if there is no index.
+
+        """
+        wf = self.wf
+        index = wf.cachefile('{0}.{1}'.format(self.cache_name,
+                                              wf.cache_serializer))
+        try:
+            return os.stat(index).st_mtime
+        except OSError:
+            return None
+
+    def _feedback_key(self, mtime, update_available):
+        """Return key for rendered feedback.
+
+        The key changes whenever the workflow version, application,
+        script index or update status changes.
+
+        Args:
+            mtime (float): Modification time of script index when
+                it was loaded (see :meth:`_index_mtime`).
+            update_available (bool): Whether an update is available.
+
+        Returns:
+            str: Key or ``None`` if there was no script index.
+
+        """
+        if mtime is None:
+            return None
+
+        wf = self.wf
+        return json.dumps([str(wf.version), self.bundle_id, self.app_path,
+                           repr(mtime), bool(update_available)])
+
+    def _send_cached_feedback(self, key):
+        """Send rendered feedback if it was saved with ``key``.
+
+        Returns:
+            bool: ``True`` if feedback was sent.
+
+        """
+        try:
+            with open(self.feedback_cache, 'rb') as fp:
+                if fp.readline().rstrip(b'\n') != key:
+                    log.debug('rendered feedback is stale')
+                    return False
+                output = fp.read()
+        except IOError:
+            return False
+
+        log.debug('sending rendered feedback')
+        sys.stdout.write(output)
+        sys.stdout.flush()
+        return True
+
+    def _cache_feedback(self, key):
+        """Send feedback and save it under ``key``."""
+        output = self.wf.render_feedback()
+        sys.stdout.write(output)
+        sys.stdout.flush()
+
+        with atomic_writer(self.feedback_cache, 'wb') as fp:
+            fp.write(key + b'\n')
+            fp.write(output)
+
     def show_error(self, title, subtitle=''):
         """Show Alfred result with error icon and send feedback."""
         self.show_message(title, subtitle, ICON_ERROR)
@@ -335,25 +813,60 @@ class AppScripts(object):
         self.show_message(title, subtitle, ICON_WARNING)
         self.wf.send_feedback()
 
+    def show_scanning(self):
+        """Show placeholder while scripts are scanned and send feedback."""
+        self.show_message('Scanning for scripts…',
+                          'Results will appear automatically', ICON_SYNC)
+        self.wf.send_feedback()
+
     def show_message(self, title, subtitle='', icon=ICON_INFO):
         """Show Alfred result, but do not send feedback."""
         self.wf.add_item(title, subtitle, icon=icon)
 
-    def get_scripts_for_app(self):
+    def get_scripts_for_app(self, budget=0):
         """Return list of AppleScripts in app's script directories.
 
+        Directories are only scanned in the foreground if there is no
+        cached list for the app. A stale list is returned as-is and
+        updated by a ``reindex`` job in the background.
+
+        If the scan takes longer than ``budget`` seconds, the scripts
+        found so far are returned, the scan is completed by a
+        ``reindex`` job and :attr:`Workflow3.rerun` is set.
+
+        :param budget: Time limit for scanning in seconds (``0`` means
+            no limit)
+        :type budget: ``float``
         :returns: List of paths to AppleScripts
         :rtype: ``list``
 
         """
-        # wf.cached_data needs a bare function (no arguments), so
-        # wrap the call
-        def _wrapper():
-            with timer('find scripts'):
-                return self._get_scripts_for_app()
+        wf = self.wf
+        cmd = [b'/usr/bin/python', os.path.abspath(__file__),
+               b'reindex', self.bundle_id.encode('utf-8'),
+               self.app_name.encode('utf-8'), self.app_path.encode('utf-8')]
+
+        scripts = wf.cached_data(self.cache_name, max_age=30,
+                                 stale_ok=True, refresh=cmd)
+        if scripts is not None:
+            return scripts
 
-        return self.wf.cached_data('appscripts-' + self.bundle_id,
-                                   _wrapper, max_age=30)
+        deadline = None
+        if budget:
+            deadline = time() + budget
+
+        with timer('find scripts'):
+            scripts, complete = self._find_scripts(deadline)
+
+        if complete:
+            wf.cache_data(self.cache_name, scripts)
+        else:
+            log.debug('scan exceeded %0.2fs budget, finishing in background',
+                      budget)
+            wf.refresh_cache(self.cache_name, cmd)
+            wf.rerun = RERUN_INTERVAL
+
+        return scripts
 
     def _get_scripts_for_app(self):
         """Return list of AppleScripts in script directories.
@@ -364,50 +877,56 @@ class AppScripts(object):
                 application.
 
         """
-        scripts = {}
+        return self._find_scripts()[0]
+
+    def _find_scripts(self, deadline=None):
+        """Scan script directories until done or ``deadline`` is passed.
+
+        :param deadline: Time (as returned by :func:`time.time`) after
+            which to stop scanning
+        :type deadline: ``float``
+        :returns: List of scripts found and whether all directories
+            were scanned
+        :rtype: 2-tuple ``(list, bool)``
+
+        """
+        scripts = {}  # (st_dev, st_ino): Script
+        seen = set()  # (st_dev, st_ino) of scanned directories
+        complete = True
         with timer('load script dirs'):
             scriptdirs = self._load_script_directories()
 
+        # Scan application directories first, so if they're also inside
+        # a general directory, their scripts are application-specific
+        scriptdirs.sort(key=lambda t: not t[1])
+
         recursive = self.wf.settings.get('recursive', False)
         for scriptdir, appdir in scriptdirs:
 
-            if recursive:
-                log.debug('recursively loading scripts from `%s`...',
-                          scriptdir)
-                for root, _, filenames in os.walk(scriptdir):
-                    for filename in filenames:
-                        if not is_script(filename):
-                            continue
-
-                        path = os.path.join(root, filename)
-                        name = os.path.splitext(os.path.basename(path))[0]
-                        script = Script(name, path, appdir)
-                        log.debug('%r', script)
-                        # Overwrite existing entry if script later
-                        # found in an application-specific folder
-                        if path in scripts:
-                            if appdir:
-                                scripts[script.path] = script
-                        else:
-                            scripts[script.path] = script
-
-            else:
-                log.debug('loading scripts from `%s`...', scriptdir)
-                for filename in os.listdir(scriptdir):
-                    if not is_script(filename):
+            if deadline and time() > deadline:
+                complete = False
+                break
+
+            log.debug('%sloading scripts from `%s`...',
+                      'recursively ' if recursive else '', scriptdir)
+            with LogSummary(log, 'script(s) in `%s`', scriptdir) as found:
+                for path, key in walk_scripts(scriptdir, recursive, seen):
+                    if key is None:  # start of a directory
+                        if deadline and time() > deadline:
+                            complete = False
+                            break
                         continue
 
-                    path = os.path.join(scriptdir, filename)
                     name = os.path.splitext(os.path.basename(path))[0]
                     script = Script(name, path, appdir)
-                    log.debug('%r', script)
+                    found.add(script)
                     # Overwrite existing entry if script later
                     # found in an application-specific folder
-                    if path in scripts:
+                    if key in scripts:
                         if appdir:
-                            scripts[path] = script
+                            scripts[key] = script
                     else:
-                        scripts[path] = script
+                        scripts[key] = script
 
         # Sort scripts. Ensure app-specific scripts appear first.
         scripts = sorted([((1, 0)[s.appdir], s.name, s)
@@ -416,7 +935,104 @@ class AppScripts(object):
 
         log.debug('%d script(s) found for %s', len(scripts), self.app_name)
 
-        return scripts
+        with timer('describe scripts'):
+            scripts, described = self._describe_scripts(
+                scripts, read=deadline is None)
+
+        return scripts, complete and described
+
+    def _describe_scripts(self, scripts, read=True):
+        """Add descriptions to ``scripts``.
+
+        Descriptions are cached by path and the modification time and
+        size of the file they're read from, so scripts are only read
+        again when they change. Descriptions that aren't cached are
+        read by a pool of `DESCRIPTION_WORKERS` threads and saved with
+        :meth:`_save_descriptions`.
+
+        :param scripts: Scripts to describe
+        :type scripts: ``list``
+        :param read: Whether to read scripts whose descriptions aren't
+            cached. If ``False``, they are returned without one.
+        :type read: ``Boolean``
+        :returns: Scripts with descriptions and whether all scripts
+            were described
+        :rtype: 2-tuple ``(list, bool)``
+
+        """
+        wf = self.wf
+        cache = wf.cached_data(DESCRIPTIONS_CACHE, max_age=0) or {}
+        keys = {}
+        for script in scripts:
+            if os.path.splitext(script.path)[1].lower() == '.scpt':
+                continue  # compiled scripts have no description
+
+            try:
+                st = os.stat(description_file(script.path))
+            except OSError:
+                continue
+            keys[script.path] = (st.st_mtime, st.st_size)
+
+        todo = [path for path, key in keys.items()
+                if cache.get(path, (None,))[0] != key]
+
+        if todo and read:
+            from multiprocessing.pool import ThreadPool
+            log.debug('reading %d description(s)...', len(todo))
+            pool = ThreadPool(min(DESCRIPTION_WORKERS, len(todo)))
+            try:
+                descriptions = pool.map(script_description, todo)
+            finally:
+                pool.close()
+
+            cache = self._save_descriptions(
+                dict((path, (keys[path], description))
+                     for path, description in zip(todo, descriptions)),
+                keys)
+            todo = []
+        elif read and any(path not in keys and not os.path.lexists(path)
+                          for path in cache):
+            cache = self._save_descriptions({}, keys)
+
+        described = []
+        for script in scripts:
+            key, description = cache.get(script.path, (None, ''))
+            if key is not None and key == keys.get(script.path):
+                script = script._replace(description=description)
+            described.append(script)
+
+        return described, not todo
+
+    def _save_descriptions(self, descriptions, keys):
+        """Add ``descriptions`` to cache and remove deleted scripts.
+
+        The cache is shared with searches for other applications,
+        including ``reindex`` jobs running at the same time, so it's
+        re-read and updated under a lock. Entries of scripts that
+        weren't just scanned are only removed if the script no longer
+        exists, as they may belong to another application.
+
+        :param descriptions: New cache entries
+        :type descriptions: ``dict``
+        :param keys: Cache keys of scanned scripts
+        :type keys: ``dict``
+        :returns: Updated cache
+        :rtype: ``dict``
+
+        """
+        wf = self.wf
+        path = wf.cachefile('{0}.{1}'.format(DESCRIPTIONS_CACHE,
+                                             wf.cache_serializer))
+        with LockFile(path, timeout=5):
+            cache = wf.cached_data(DESCRIPTIONS_CACHE, max_age=0) or {}
+            cache.update(descriptions)
+            for p in cache.keys():
+                if p not in keys and not os.path.lexists(p):
+                    del cache[p]
+            wf.cache_data(DESCRIPTIONS_CACHE, cache)
+
+        log.debug('%d description(s) cached', len(cache))
+        return cache
 
     def _load_script_directories(self):
         """Read script directories from ``self.search_paths_file``.
@@ -425,8 +1041,13 @@ class AppScripts(object):
         ``appdir`` is a boolean indicating whether the directory
         belongs to a specific app or is a "general" script directory.
 
+        Directories are identified by device and inode, so if several
+        paths lead to the same directory (e.g. via a symlink), only the
+        first is returned. It is an app directory if any of them is.
+
         """
         scriptdirs = []
+        seen = {}  # (st_dev, st_ino): index in scriptdirs
 
         with open(self.search_paths_file) as fp:
             for line in fp:
@@ -443,9 +1064,21 @@ class AppScripts(object):
                 path = path.format(app_name=self.app_name,
                                    bundle_id=self.bundle_id)
 
-                if not os.path.exists(path):
+                try:
+                    st = os.stat(path)
+                except OSError:  # doesn't exist
+                    continue
+
+                key = (st.st_dev, st.st_ino)
+                if key in seen:
+                    i = seen[key]
+                    log.debug('`%s` is the same directory as `%s`',
+                              path, scriptdirs[i][0])
+                    if appdir:
+                        scriptdirs[i] = (scriptdirs[i][0], True)
                     continue
 
+                seen[key] = len(scriptdirs)
                 scriptdirs.append((path, appdir))
 
         return scriptdirs
@@ -453,7 +1086,8 @@ class AppScripts(object):
 
 if __name__ == '__main__':
     wf = Workflow3(update_settings=UPDATE_SETTINGS,
-                   help_url=HELP_URL)
+                   help_url=HELP_URL,
+                   async_logging=True)
     log = wf.logger
     app = AppScripts()
     wf.run(app.run)
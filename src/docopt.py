@@ -8,9 +8,16 @@
 """
 import sys
 import re
+import os
+import hashlib
+import tempfile
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
 
 
-__all__ = ['docopt']
+__all__ = ['docopt', 'Grammar']
 __version__ = '0.6.2'
 
 
@@ -490,7 +497,88 @@ class Dict(dict):
         return '{%s}' % ',\n '.join('%r: %r' % i for i in sorted(self.items()))
 
 
-def docopt(doc, argv=None, help=True, version=None, options_first=False):
+class Grammar(object):
+
+    """Usage-message `doc` parsed into the pattern that argv is matched to.
+
+    Building a `Grammar` does all the work of `docopt` that depends only
+    on `doc`, so parsing argv with `Grammar.parse` only has to tokenize
+    and match it.
+
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.usage = printable_usage(doc)
+        self.options = parse_defaults(doc)
+        self.pattern = parse_pattern(formal_usage(self.usage), self.options)
+        pattern_options = set(self.pattern.flat(Option))
+        for ao in self.pattern.flat(AnyOptions):
+            doc_options = parse_defaults(doc)
+            ao.children = list(set(doc_options) - pattern_options)
+        self.pattern.fix()
+
+    @classmethod
+    def load(class_, doc, cachedir=None):
+        """Return `Grammar` for `doc`, built at most once.
+
+        Grammars are kept for the life of the process and, if `cachedir`
+        is given, pickled there in a file named after a hash of `doc`,
+        so other processes can load them instead of rebuilding them.
+
+        """
+        grammar = _grammars.get(doc)
+        if grammar is not None:
+            return grammar
+        path = None
+        if cachedir is not None:
+            key = hashlib.sha1((__version__ + doc).encode('utf-8'))
+            path = os.path.join(cachedir,
+                                'docopt-%s.pickle' % key.hexdigest())
+            try:
+                with open(path, 'rb') as f:
+                    grammar = pickle.load(f)
+            except Exception:  # missing or unreadable
+                grammar = None
+        if grammar is None or grammar.doc != doc:
+            grammar = class_(doc)
+            if path is not None:
+                grammar._save(path)
+        _grammars[doc] = grammar
+        return grammar
+
+    def _save(self, path):
+        try:
+            fd, tmp = tempfile.mkstemp(prefix='.docopt-',
+                                       dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(self, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp, path)
+        except (IOError, OSError):  # cache is an optimisation only
+            pass
+
+    def parse(self, argv=None, help=True, version=None, options_first=False):
+        """Parse `argv` as `docopt` does."""
+        if argv is None:
+            argv = sys.argv[1:]
+        DocoptExit.usage = self.usage
+        argv = parse_argv(TokenStream(argv, DocoptExit), list(self.options),
+                          options_first)
+        extras(help, version, argv, self.doc)
+        matched, left, collected = self.pattern.match(argv)
+        if matched and left == []:  # better error message if left?
+            # copy list defaults, which belong to the (reused) pattern
+            return Dict((a.name, list(a.value) if type(a.value) is list
+                         else a.value)
+                        for a in (self.pattern.flat() + collected))
+        raise DocoptExit()
+
+
+_grammars = {}
+
+
+def docopt(doc, argv=None, help=True, version=None, options_first=False,
+           cachedir=None):
     """Parse `argv` based on command-line interface described in `doc`.
 
     `docopt` creates your command-line interface based on its
@@ -514,6 +602,9 @@ def docopt(doc, argv=None, help=True, version=None, options_first=False):
     options_first : bool (default: False)
         Set to True to require options preceed positional arguments,
         i.e. to forbid options and positional arguments intermix.
+    cachedir : str, optional
+        Directory to cache the parsed `doc` in, so later processes
+        only have to parse `argv`. See `Grammar.load`.
 
     Returns
     -------
@@ -553,27 +644,5 @@ def docopt(doc, argv=None, help=True, version=None, options_first=False):
       at https://github.com/docopt/docopt#readme
 
     """
-    if argv is None:
-        argv = sys.argv[1:]
-    DocoptExit.usage = printable_usage(doc)
-    options = parse_defaults(doc)
-    pattern = parse_pattern(formal_usage(DocoptExit.usage), options)
-    # [default] syntax for argument is disabled
-    #for a in pattern.flat(Argument):
-    #    same_name = [d for d in arguments if d.name == a.name]
-    #    if same_name:
-    #        a.value = same_name[0].value
-    argv = parse_argv(TokenStream(argv, DocoptExit), list(options),
-                      options_first)
-    pattern_options = set(pattern.flat(Option))
-    for ao in pattern.flat(AnyOptions):
-        doc_options = parse_defaults(doc)
-        ao.children = list(set(doc_options) - pattern_options)
-        #if any_options:
-        #    ao.children += [Option(o.short, o.long, o.argcount)
-        #                    for o in argv if type(o) is Option]
-    extras(help, version, argv, doc)
-    matched, left, collected = pattern.fix().match(argv)
-    if matched and left == []:  # better error message if left?
-        return Dict((a.name, a.value) for a in (pattern.flat() + collected))
-    raise DocoptExit()
+    grammar = Grammar.load(doc, cachedir)
+    return grammar.parse(argv, help, version, options_first)
@@ -15,19 +15,56 @@ while you fetch fresh data in the background.
 
 See :ref:`the User Manual <background-processes>` for more information
 and examples.
+
+.. versionchanged:: 1.38
+
+Jobs are passed over a Unix socket to a job daemon, which runs them
+on a pool of worker threads. The daemon is started by the first job
+and exits after :data:`IDLE_TIMEOUT` seconds without work. If the
+daemon can't be reached, a background process is forked for the job
+as before.
 """
 
 from __future__ import print_function, unicode_literals
 
+import errno
+import hashlib
+import json
 import signal
+import socket
 import sys
 import os
 import subprocess
 import pickle
+import Queue
+import tempfile
+import threading
+import time
 
 from workflow import Workflow
+from util import LockFile, atomic_writer
+
+__all__ = ['is_running', 'job_status', 'last_success', 'run_in_background']
+
+#: Name of the job daemon's "job" (i.e. its PID file)
+DAEMON_NAME = '__workflow_job_daemon'
+
+#: Maximum number of jobs the daemon runs at once
+MAX_WORKERS = 4
+
+#: Seconds the daemon waits for a new job before exiting
+IDLE_TIMEOUT = 60
 
-__all__ = ['is_running', 'run_in_background']
+#: Seconds to wait for a newly-started daemon to accept connections
+DAEMON_START_TIMEOUT = 1.0
+
+#: Number of runs kept in a job's history
+JOB_HISTORY = 20
+
+#: Keyword arguments for :class:`subprocess.Popen` that may be passed
+#: to the job daemon. Jobs with other arguments are forked.
+JOB_KWARGS = ('bufsize', 'close_fds', 'cwd', 'env', 'executable', 'shell',
+              'universal_newlines')
 
 _wf = None
 
@@ -67,6 +104,79 @@ def _pid_file(name):
     return wf().cachefile(name + '.pid')
 
 
+def _status_file(name):
+    """Return path to status file for ``name``.
+
+    :param name: name of task
+    :type name: ``unicode``
+    :returns: Path to status file for task
+    :rtype: ``unicode`` filepath
+
+    """
+    return wf().cachefile(name + '.job')
+
+
+def _socket_path():
+    """Return path to the job daemon's socket.
+
+    The socket is in the temporary directory, not the cache directory,
+    as the latter's path may exceed the maximum length of a socket path.
+
+    :returns: Path to socket
+    :rtype: ``unicode`` filepath
+
+    """
+    h = hashlib.md5(wf().bundleid.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(),
+                        'alfred-workflow-{0}.sock'.format(h))
+
+
+def _utf8(obj):
+    """Encode strings in JSON-decoded ``obj`` as UTF-8.
+
+    :param obj: JSON-decoded object
+    :returns: ``obj`` with :class:`unicode` strings encoded
+    """
+    if isinstance(obj, unicode):
+        return obj.encode('utf-8')
+    if isinstance(obj, list):
+        return [_utf8(o) for o in obj]
+    if isinstance(obj, dict):
+        return {_utf8(k): _utf8(v) for k, v in obj.items()}
+    return obj
+
+
+def _load_job(data):
+    """Decode and check a job sent by :func:`_submit_job`.
+
+    :param data: JSON-encoded job
+    :type data: ``str``
+    :raises ValueError: if job is invalid
+    :returns: Job with keys ``name``, ``args`` and ``kwargs``
+    :rtype: ``dict``
+
+    """
+    job = json.loads(data)
+    if not isinstance(job, dict):
+        raise ValueError('job is not an object')
+
+    name, args, kwargs = job.get('name'), job.get('args'), job.get('kwargs')
+    if not isinstance(name, unicode) or not name:
+        raise ValueError('invalid job name: {0!r}'.format(name))
+    if not (isinstance(args, unicode) or isinstance(args, list) and
+            args and all(isinstance(a, unicode) for a in args)):
+        raise ValueError('invalid command: {0!r}'.format(args))
+    if not isinstance(kwargs, dict):
+        raise ValueError('invalid arguments: {0!r}'.format(kwargs))
+
+    unknown = set(kwargs) - set(JOB_KWARGS)
+    if unknown:
+        raise ValueError('unsupported arguments: {0}'.format(
+                         ', '.join(sorted(unknown))))
+
+    return {'name': name, 'args': _utf8(args), 'kwargs': _utf8(kwargs)}
+
+
 def _process_exists(pid):
     """Check if a process with PID ``pid`` exists.
 
@@ -83,6 +193,22 @@ def _process_exists(pid):
     return True
 
 
+def _remove_pid_file(pidfile):
+    """Delete ``pidfile`` if it contains the PID of this process.
+
+    :param pidfile: Path to PID file
+    :type pidfile: ``unicode`` filepath
+
+    """
+    try:
+        with open(pidfile, 'rb') as fp:
+            if fp.read().strip() != str(os.getpid()):
+                return
+        os.unlink(pidfile)
+    except (IOError, OSError):
+        pass
+
+
 def _job_pid(name):
     """Get PID of job or `None` if job does not exist.
 
@@ -127,7 +253,10 @@ def _background(pidfile, stdin='/dev/null', stdout='/dev/null',
                 stderr='/dev/null'):  # pragma: no cover
     """Fork the current process into a background daemon.
 
-    :param pidfile: file to write PID of daemon process to.
+    .. versionchanged:: 1.38
+
+    :param pidfile: file to write PID of daemon process to, or ``None``
+        to write no PID file.
     :type pidfile: filepath
     :param stdin: where to read input
     :type stdin: filepath
@@ -161,7 +290,7 @@ def _background(pidfile, stdin='/dev/null', stdout='/dev/null',
     os.setsid()
 
     # Do second fork and write PID to pidfile.
-    _fork_and_exit_parent('fork #2 failed', write=True)
+    _fork_and_exit_parent('fork #2 failed', write=pidfile is not None)
 
     # Now I am a daemon!
     # Redirect standard file descriptors.
@@ -196,35 +325,379 @@ def kill(name, sig=signal.SIGTERM):
     return True
 
 
-def run_in_background(name, args, **kwargs):
-    r"""Cache arguments then call this script again via :func:`subprocess.call`.
+def job_status(name):
+    """Return status of the last run of job ``name``.
 
-    :param name: name of job
-    :type name: unicode
-    :param args: arguments passed as first argument to :func:`subprocess.call`
-    :param \**kwargs: keyword arguments to :func:`subprocess.call`
-    :returns: exit code of sub-process
-    :rtype: int
+    .. versionadded:: 1.38
 
-    When you call this function, it caches its arguments and then calls
-    ``background.py`` in a subprocess. The Python subprocess will load the
-    cached arguments, fork into the background, and then run the command you
-    specified.
+    The status is a dict with the keys:
 
-    This function will return as soon as the ``background.py`` subprocess has
-    forked, returning the exit code of *that* process (i.e. not of the command
-    you're trying to run).
+    - ``started``: UNIX timestamp of the last run's start.
+    - ``finished``: UNIX timestamp of the last run's end, or ``None``
+      if the job is still running (or was killed).
+    - ``retcode``: Exit status of the last run, or ``None``.
+    - ``duration``: Runtime of the last run in seconds, or ``None``.
+    - ``last_success``: UNIX timestamp of the end of the last run
+      that exited with status 0, or ``None``.
+    - ``history``: List of ``[started, duration, retcode]`` lists for
+      the last :data:`JOB_HISTORY` completed runs, oldest first.
 
-    If that process fails, an error will be written to the log file.
+    Args:
+        name (str): Name of the job
 
-    If a process is already running under the same name, this function will
-    return immediately and will not run the specified command.
+    Returns:
+        dict: Job status or ``None`` if job has never been run.
+    """
+    try:
+        with open(_status_file(name), 'rb') as fp:
+            return json.load(fp)
+    except (IOError, ValueError):
+        return None
+
+
+def last_success(name):
+    """Return time job ``name`` last completed successfully.
+
+    .. versionadded:: 1.38
+
+    Use this instead of checking the age of a job's output files
+    to decide whether a job's results are fresh enough.
+
+    Args:
+        name (str): Name of the job
 
+    Returns:
+        float: UNIX timestamp or ``None`` if the job has never
+            completed successfully.
     """
-    if is_running(name):
-        _log().info('[%s] job already running', name)
-        return
+    status = job_status(name)
+    if status is None:
+        return None
+    return status.get('last_success')
+
+
+def _update_status(name, update):
+    """Update job's status file.
+
+    Args:
+        name (str): Name of the job
+        update (callable): Called with the job's status dict, which it
+            should modify in place.
+    """
+    path = _status_file(name)
+    with LockFile(path):
+        status = job_status(name) or {'last_success': None, 'history': []}
+        update(status)
+        with atomic_writer(path, 'wb') as fp:
+            json.dump(status, fp, separators=(',', ':'))
+
+
+def _record_start(name):
+    """Record start of job ``name``.
+
+    Args:
+        name (str): Name of the job
+
+    Returns:
+        float: Start time.
+    """
+    started = time.time()
+
+    def update(status):
+        status.update(started=started, finished=None,
+                      retcode=None, duration=None)
+
+    _update_status(name, update)
+    return started
 
+
+def _record_end(name, started, retcode):
+    """Record end of job ``name``.
+
+    Args:
+        name (str): Name of the job
+        started (float): Start time returned by :func:`_record_start`.
+        retcode (int): Exit status of job.
+    """
+    finished = time.time()
+    duration = finished - started
+
+    def update(status):
+        status.update(started=started, finished=finished,
+                      retcode=retcode, duration=duration)
+        if retcode == 0:
+            status['last_success'] = finished
+
+        history = status['history']
+        history.append([started, duration, retcode])
+        del history[:-JOB_HISTORY]
+
+    _update_status(name, update)
+
+
+class JobDaemon(object):
+    """Run jobs received over a Unix socket.
+
+    .. versionadded:: 1.38
+
+    Jobs are run by a fixed number of worker threads. A job is rejected
+    if a job with the same name is already queued or running. While a
+    job runs, its PID is written to the same PID file as for a forked
+    job, so :func:`is_running` and :func:`kill` work as normal.
+
+    Args:
+        path (unicode): Path of socket to listen on.
+        workers (int, optional): Number of worker threads.
+        idle_timeout (float, optional): Exit after this many seconds
+            without any jobs.
+        pidfile (unicode, optional): File to write the daemon's PID to
+            while it is serving. Not written if another daemon is
+            already using ``path``.
+
+    """
+
+    def __init__(self, path, workers=MAX_WORKERS, idle_timeout=IDLE_TIMEOUT,
+                 pidfile=None):
+        """Create a new `JobDaemon`."""
+        self.path = path
+        self.pidfile = pidfile
+        self.workers = workers
+        self.idle_timeout = idle_timeout
+        self._queue = Queue.Queue()
+        # Names of queued and running jobs
+        self._jobs = set()
+        self._lock = threading.Lock()
+
+    def submit(self, job):
+        """Add ``job`` to the queue.
+
+        Args:
+            job (dict): Job with keys ``name``, ``args`` and ``kwargs``.
+
+        Returns:
+            bool: ``False`` if a job with the same name is queued
+                or running, else ``True``.
+
+        """
+        with self._lock:
+            if job['name'] in self._jobs:
+                return False
+            self._jobs.add(job['name'])
+
+        self._queue.put(job)
+        return True
+
+    @property
+    def busy(self):
+        """Whether any jobs are queued or running."""
+        with self._lock:
+            return bool(self._jobs)
+
+    def _worker(self):
+        """Run jobs from the queue."""
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            except Exception as err:
+                _log().exception('[%s] job failed: %s', job['name'], err)
+            finally:
+                with self._lock:
+                    self._jobs.discard(job['name'])
+
+    def _run(self, job):
+        """Run ``job`` and wait for it to finish."""
+        name = job['name']
+        pidfile = _pid_file(name)
+
+        _log().debug('[%s] running command: %r', name, job['args'])
+        started = _record_start(name)
+        proc = subprocess.Popen(job['args'], **job['kwargs'])
+        try:
+            with atomic_writer(pidfile, 'wb') as fp:
+                fp.write(str(proc.pid))
+
+            retcode = proc.wait()
+        finally:
+            try:
+                os.unlink(pidfile)
+            except OSError:  # pragma: no cover
+                pass
+
+        _record_end(name, started, retcode)
+        if retcode:
+            _log().error('[%s] command failed with status %d', name, retcode)
+        else:
+            _log().debug('[%s] job complete', name)
+
+    def _handle(self, conn):
+        """Read a job from connection ``conn`` and reply."""
+        conn.settimeout(5)
+        chunks = []
+        while True:
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+        job = _load_job(b''.join(chunks))
+        if self.submit(job):
+            conn.sendall(b'queued')
+        else:
+            conn.sendall(b'duplicate')
+
+    def serve(self):
+        """Accept jobs until idle for :attr:`idle_timeout` seconds.
+
+        Returns immediately if another daemon is using :attr:`path`.
+
+        """
+        lock = LockFile(self.path)
+        if not lock.acquire(blocking=False):
+            _log().debug('job daemon already running')
+            return
+
+        server = None
+        try:
+            if self.pidfile:
+                with atomic_writer(self.pidfile, 'wb') as fp:
+                    fp.write(str(os.getpid()))
+
+            # Remove socket left by a daemon that died
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            # Create socket with mode 0600, so there's no window in which
+            # other users can connect to it
+            umask = os.umask(0o177)
+            try:
+                server.bind(self.path)
+            finally:
+                os.umask(umask)
+            server.listen(16)
+            server.settimeout(self.idle_timeout)
+
+            for _ in range(self.workers):
+                t = threading.Thread(target=self._worker)
+                t.daemon = True
+                t.start()
+
+            _log().debug('job daemon listening on %s', self.path)
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    if self.busy:
+                        continue
+                    break
+
+                try:
+                    self._handle(conn)
+                except Exception as err:
+                    _log().exception('bad job request: %s', err)
+                finally:
+                    conn.close()
+
+        finally:
+            if server is not None:
+                server.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            if self.pidfile:
+                _remove_pid_file(self.pidfile)
+            lock.release()
+
+        _log().debug('job daemon exiting')
+
+
+def _submit_job(name, args, kwargs):
+    """Pass job to the job daemon.
+
+    The job is sent as JSON, so ``kwargs`` may only contain
+    the arguments in :data:`JOB_KWARGS`.
+
+    Args:
+        name (unicode): Name of job.
+        args (list): Command to run.
+        kwargs (dict): Keyword arguments for :class:`subprocess.Popen`.
+
+    Returns:
+        str: Daemon's reply (``queued`` or ``duplicate``) or ``None``
+            if the daemon couldn't be reached.
+
+    """
+    kwargs = dict(kwargs)
+    # Run job with the caller's environment, not the daemon's
+    kwargs.setdefault('env', dict(os.environ))
+    # Don't leak the daemon's socket and lockfile to jobs
+    kwargs.setdefault('close_fds', True)
+    try:
+        data = json.dumps({'name': name, 'args': args, 'kwargs': kwargs},
+                          encoding='utf-8')
+    except (TypeError, UnicodeDecodeError) as err:
+        _log().debug('[%s] job cannot be sent to daemon: %s', name, err)
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(2)
+    try:
+        sock.connect(_socket_path())
+        sock.sendall(data)
+        sock.shutdown(socket.SHUT_WR)
+        reply = sock.recv(64)
+    except socket.error as err:
+        if err.errno not in (errno.ENOENT, errno.ECONNREFUSED,
+                             errno.ECONNRESET, errno.EPIPE):
+            _log().warning('[%s] error contacting job daemon: %s', name, err)
+        return None
+    finally:
+        sock.close()
+
+    return reply or None
+
+
+def _start_daemon():
+    """Start the job daemon and wait for it to accept connections.
+
+    Returns:
+        bool: ``True`` if daemon is accepting connections.
+
+    """
+    cmd = ['/usr/bin/python', __file__, DAEMON_NAME]
+    _log().debug('starting job daemon: %r', cmd)
+    if subprocess.call(cmd):  # pragma: no cover
+        return False
+
+    path = _socket_path()
+    start = time.time()
+    while time.time() - start < DAEMON_START_TIMEOUT:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+            return True
+        except socket.error:
+            time.sleep(0.01)
+        finally:
+            sock.close()
+
+    return False
+
+
+def _fork_job(name, args, kwargs):
+    """Cache arguments then run job in a forked background process.
+
+    Args:
+        name (unicode): Name of job.
+        args (list): Command to run.
+        kwargs (dict): Keyword arguments for :func:`subprocess.call`.
+
+    Returns:
+        int: Exit code of background runner.
+
+    """
     argcache = _arg_cache(name)
 
     # Cache arguments
@@ -245,15 +718,83 @@ def run_in_background(name, args, **kwargs):
     return retcode
 
 
+def run_in_background(name, args, **kwargs):
+    r"""Run a command in the background via the job daemon.
+
+    .. versionchanged:: 1.38
+
+    :param name: name of job
+    :type name: unicode
+    :param args: arguments passed as first argument to :func:`subprocess.call`
+    :param \**kwargs: keyword arguments to :func:`subprocess.call`
+    :returns: ``0`` if the job was started, else the exit code of the
+        background runner
+    :rtype: int
+
+    When you call this function, it passes its arguments to the job
+    daemon over a Unix socket, starting the daemon first if necessary.
+    The daemon runs the command you specified on one of its worker
+    threads.
+
+    Only the keyword arguments in :data:`JOB_KWARGS` can be passed to
+    the daemon. If ``kwargs`` contains others, or the daemon can't be
+    reached, this function caches its arguments
+    and calls ``background.py`` in a subprocess. The Python subprocess
+    will load the cached arguments, fork into the background, and then
+    run the command you specified. In this case, the function returns
+    the exit code of *that* process (i.e. not of the command you're
+    trying to run).
+
+    If a process is already running (or queued) under the same name,
+    this function will return immediately and will not run the
+    specified command.
+
+    """
+    if is_running(name):
+        _log().info('[%s] job already running', name)
+        return
+
+    if not set(kwargs) <= set(JOB_KWARGS):
+        _log().debug('[%s] arguments not supported by job daemon, '
+                     'forking job', name)
+        return _fork_job(name, args, kwargs)
+
+    reply = _submit_job(name, args, kwargs)
+    if reply is None and _start_daemon():
+        reply = _submit_job(name, args, kwargs)
+
+    if reply is None:
+        _log().warning('[%s] job daemon unavailable, forking job', name)
+        return _fork_job(name, args, kwargs)
+
+    if reply == b'duplicate':
+        _log().info('[%s] job already queued', name)
+        return
+
+    _log().debug('[%s] job passed to daemon', name)
+    return 0
+
+
 def main(wf):  # pragma: no cover
     """Run command in a background process.
 
     Load cached arguments, fork into background, then call
     :meth:`subprocess.call` with cached arguments.
 
+    If called with :data:`DAEMON_NAME`, fork into background and
+    run a :class:`JobDaemon` instead.
+
     """
     log = wf.logger
     name = wf.args[0]
+
+    if name == DAEMON_NAME:
+        # PID file is written by the daemon that wins the socket lock,
+        # so a losing daemon doesn't overwrite or delete it
+        _background(None)
+        JobDaemon(_socket_path(), pidfile=_pid_file(name)).serve()
+        return
+
     argcache = _arg_cache(name)
     if not os.path.exists(argcache):
         msg = '[{0}] command cache not found: {1}'.format(name, argcache)
@@ -279,12 +820,14 @@ def main(wf):  # pragma: no cover
         # Run the command
         log.debug('[%s] running command: %r', name, args)
 
+        started = _record_start(name)
         retcode = subprocess.call(args, **kwargs)
+        _record_end(name, started, retcode)
 
         if retcode:
             log.error('[%s] command failed with status %d', name, retcode)
     finally:
-        os.unlink(pidfile)
+        _remove_pid_file(pidfile)
 
     log.debug('[%s] job complete', name)
 
@@ -25,11 +25,14 @@ from __future__ import print_function, unicode_literals
 
 from collections import defaultdict
 from functools import total_ordering
+import hashlib
 import json
 import os
+import shutil
 import tempfile
 import re
 import subprocess
+import zipfile
 
 import workflow
 import web
@@ -40,6 +43,10 @@ import web
 RELEASES_BASE = 'https://api.github.com/repos/{}/releases'
 match_workflow = re.compile(r'\.alfred(\d+)?workflow$').search
 
+#: Extension of delta update manifests. The manifest for
+#: ``Name.alfredworkflow`` is ``Name.alfredworkflow.manifest``.
+MANIFEST_EXTENSION = '.manifest'
+
 _wf = None
 
 
@@ -64,6 +71,9 @@ class Download(object):
         prerelease (bool): Whether version is a pre-release.
         alfred_version (Version): Minimum compatible version
             of Alfred.
+        digest (str): SHA-256 hex digest of workflow file or ``None``
+            if unknown.
+        manifest_url (str): URL of delta update manifest or ``None``.
 
     """
 
@@ -72,7 +82,9 @@ class Download(object):
         """Create a `Download` from a `dict`."""
         return cls(url=d['url'], filename=d['filename'],
                    version=Version(d['version']),
-                   prerelease=d['prerelease'])
+                   prerelease=d['prerelease'],
+                   digest=d.get('digest'),
+                   manifest_url=d.get('manifest_url'))
 
     @classmethod
     def from_releases(cls, js):
@@ -92,47 +104,68 @@ class Download(object):
         Returns:
             list: Sequence of `Download`.
         """
-        releases = json.loads(js)
         downloads = []
-        for release in releases:
-            tag = release['tag_name']
-            dupes = defaultdict(int)
-            try:
-                version = Version(tag)
-            except ValueError as err:
-                wf().logger.debug('ignored release: bad version "%s": %s',
-                                  tag, err)
+        for release in iter_json_array(js):
+            downloads.extend(cls.from_release(release))
+
+        downloads.sort(reverse=True)
+        return downloads
+
+    @classmethod
+    def from_release(cls, release):
+        """Extract downloads from a single GitHub release.
+
+        .. versionadded:: 1.38
+
+        Args:
+            release (dict): Decoded release from GitHub's releases endpoint.
+
+        Returns:
+            list: Sequence of `Download`, latest Alfred version first.
+                Empty if the release has no valid downloads.
+        """
+        tag = release['tag_name']
+        dupes = defaultdict(int)
+        try:
+            version = Version(tag)
+        except ValueError as err:
+            wf().logger.debug('ignored release: bad version "%s": %s',
+                              tag, err)
+            return []
+
+        dls = []
+        manifests = {}
+        for asset in release.get('assets', []):
+            url = asset.get('browser_download_url')
+            filename = os.path.basename(url)
+            if filename.endswith(MANIFEST_EXTENSION):
+                manifests[filename[:-len(MANIFEST_EXTENSION)]] = url
                 continue
 
-            dls = []
-            for asset in release.get('assets', []):
-                url = asset.get('browser_download_url')
-                filename = os.path.basename(url)
-                m = match_workflow(filename)
-                if not m:
-                    wf().logger.debug('unwanted file: %s', filename)
-                    continue
+            m = match_workflow(filename)
+            if not m:
+                wf().logger.debug('unwanted file: %s', filename)
+                continue
 
-                ext = m.group(0)
-                dupes[ext] = dupes[ext] + 1
-                dls.append(Download(url, filename, version,
-                                    release['prerelease']))
+            ext = m.group(0)
+            dupes[ext] = dupes[ext] + 1
+            dls.append(cls(url, filename, version, release['prerelease'],
+                           _sha256_digest(asset)))
 
-            valid = True
-            for ext, n in dupes.items():
-                if n > 1:
-                    wf().logger.debug('ignored release "%s": multiple assets '
-                                      'with extension "%s"', tag, ext)
-                    valid = False
-                    break
+        for dl in dls:
+            dl.manifest_url = manifests.get(dl.filename)
 
-            if valid:
-                downloads.extend(dls)
+        for ext, n in dupes.items():
+            if n > 1:
+                wf().logger.debug('ignored release "%s": multiple assets '
+                                  'with extension "%s"', tag, ext)
+                return []
 
-        downloads.sort(reverse=True)
-        return downloads
+        dls.sort(reverse=True)
+        return dls
 
-    def __init__(self, url, filename, version, prerelease=False):
+    def __init__(self, url, filename, version, prerelease=False,
+                 digest=None, manifest_url=None):
         """Create a new Download.
 
         Args:
@@ -141,6 +174,8 @@ class Download(object):
             version (Version): Version of workflow.
             prerelease (bool, optional): Whether version is
                 pre-release. Defaults to False.
+            digest (str, optional): SHA-256 hex digest of workflow file.
+            manifest_url (str, optional): URL of delta update manifest.
 
         """
         if isinstance(version, basestring):
@@ -150,6 +185,8 @@ class Download(object):
         self.filename = filename
         self.version = version
         self.prerelease = prerelease
+        self.digest = digest
+        self.manifest_url = manifest_url
 
     @property
     def alfred_version(self):
@@ -163,7 +200,8 @@ class Download(object):
     def dict(self):
         """Convert `Download` to `dict`."""
         return dict(url=self.url, filename=self.filename,
-                    version=str(self.version), prerelease=self.prerelease)
+                    version=str(self.version), prerelease=self.prerelease,
+                    digest=self.digest, manifest_url=self.manifest_url)
 
     def __str__(self):
         """Format `Download` for printing."""
@@ -198,6 +236,17 @@ class Download(object):
         return self.alfred_version < other.alfred_version
 
 
+def _sha256_digest(asset):
+    """Return SHA-256 digest of GitHub release asset or ``None``.
+
+    GitHub gives the digest in the form ``sha256:<hex digest>``.
+    """
+    algorithm, _, digest = (asset.get('digest') or '').partition(':')
+    if algorithm == 'sha256' and digest:
+        return digest
+    return None
+
+
 class Version(object):
     """Mostly semantic versioning.
 
@@ -224,9 +273,19 @@ class Version(object):
     #: Match version and pre-release/build information in version strings
     match_version = re.compile(r'([0-9][0-9\.]*)(.+)?').match
 
+    #: Parsed version strings. Maps version string to a tuple of
+    #: major, minor, patch, suffix and build, or to the error message
+    #: if the string is invalid.
+    _cache = {}
+
     def __init__(self, vstr):
         """Create new `Version` object.
 
+        .. versionchanged:: 1.38
+
+        Parsed version strings are cached, as the same ones are
+        parsed over and over when checking for updates.
+
         Args:
             vstr (basestring): Semantic version string.
         """
@@ -234,12 +293,28 @@ class Version(object):
             raise ValueError('invalid version number: {!r}'.format(vstr))
 
         self.vstr = vstr
+        parsed = self._cache.get(vstr)
+        if isinstance(parsed, tuple):
+            (self.major, self.minor, self.patch,
+             self.suffix, self.build) = parsed
+            return
+
+        if parsed is not None:  # known to be invalid
+            raise ValueError(parsed)
+
         self.major = 0
         self.minor = 0
         self.patch = 0
         self.suffix = ''
         self.build = ''
-        self._parse(vstr)
+        try:
+            self._parse(vstr)
+        except ValueError as err:
+            self._cache[vstr] = unicode(err)
+            raise
+
+        self._cache[vstr] = (self.major, self.minor, self.patch,
+                             self.suffix, self.build)
 
     def _parse(self, vstr):
         if vstr.startswith('v'):
@@ -349,6 +424,17 @@ def retrieve_download(dl):
 
     .. versionadded: 1.37
 
+    .. versionchanged:: 1.38
+
+    An interrupted download is resumed, and the file is checked
+    against the download's digest, if it has one.
+
+    If the download has a manifest, and the workflow file of an earlier
+    update is cached, only the parts of the file that have changed are
+    downloaded (see :func:`retrieve_delta`). The first update of a
+    workflow that wasn't installed by this function is always a full
+    download.
+
     Args:
         url (unicode): URL to .alfredworkflow file in GitHub repo
 
@@ -360,17 +446,208 @@ def retrieve_download(dl):
         raise ValueError('attachment not a workflow: ' + dl.filename)
 
     path = os.path.join(tempfile.gettempdir(), dl.filename)
-    wf().logger.debug('downloading update from '
-                      '%r to %r ...', dl.url, path)
 
-    r = web.get(dl.url)
-    r.raise_for_status()
+    delta = False
+    if dl.manifest_url:
+        try:
+            delta = retrieve_delta(dl, path)
+        except Exception as err:
+            wf().logger.warning('delta update failed: %s', err)
 
-    r.save_to_path(path)
+    if not delta:
+        wf().logger.debug('downloading update from '
+                          '%r to %r ...', dl.url, path)
+        web.download(dl.url, path, dl.digest)
+
+    # Keep a copy as the base of the next delta update
+    shutil.copy(path, _base_archive())
 
     return path
 
 
+def _base_archive():
+    """Path to cached workflow file used as base for delta updates."""
+    return wf().cachefile('__workflow_update_base.zip')
+
+
+def archive_segments(path):
+    """Split a workflow file into one segment per file.
+
+    .. versionadded:: 1.38
+
+    Each segment is the contiguous range of bytes of a file's entry in
+    the ZIP archive (i.e. its header, data and data descriptor). Any
+    data before the first entry, and the central directory at the end
+    of the archive, are also segments. So together, the segments
+    cover the whole archive.
+
+    Args:
+        path (unicode): Path to workflow file.
+
+    Returns:
+        list: ``[name, offset, length, sha256]`` list for each segment.
+            ``name`` is empty for segments that aren't files.
+    """
+    with zipfile.ZipFile(path) as zf:
+        infos = sorted(zf.infolist(), key=lambda zi: zi.header_offset)
+        end_of_entries = zf.start_dir
+
+    size = os.path.getsize(path)
+    bounds = [('', 0)]
+    bounds.extend((zi.filename, zi.header_offset) for zi in infos)
+    bounds.append(('', end_of_entries))
+    bounds.append(('', size))
+
+    segments = []
+    with open(path, 'rb') as fp:
+        for (name, start), (_, end) in zip(bounds, bounds[1:]):
+            if end > start:
+                fp.seek(start)
+                h = hashlib.sha256(fp.read(end - start))
+                segments.append([name, start, end - start, h.hexdigest()])
+
+    return segments
+
+
+def build_manifest(path):
+    """Create delta update manifest for workflow file at ``path``.
+
+    .. versionadded:: 1.38
+
+    Upload the manifest to the release alongside the workflow file,
+    named like the workflow file plus :data:`MANIFEST_EXTENSION`.
+
+    Args:
+        path (unicode): Path to workflow file.
+
+    Returns:
+        dict: Manifest with keys ``filename``, ``size``, ``sha256``
+            and ``segments`` (see :func:`archive_segments`).
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(65536), b''):
+            h.update(chunk)
+
+    return {
+        'filename': os.path.basename(path),
+        'size': os.path.getsize(path),
+        'sha256': h.hexdigest(),
+        'segments': archive_segments(path),
+    }
+
+
+def retrieve_delta(dl, path):
+    """Rebuild workflow file from cached base file and changed segments.
+
+    .. versionadded:: 1.38
+
+    Segments of the new workflow file listed in its manifest that are
+    also in the base file (the file of the previous update) are copied
+    from the base file. Only the other segments are downloaded, with
+    HTTP ``Range`` requests. The rebuilt file is verified against the
+    digest in the manifest.
+
+    The base file is the workflow file saved by the last call to
+    :func:`retrieve_download`. It can't be rebuilt from the installed
+    workflow, as segments are compared byte-for-byte, and re-zipping
+    the files wouldn't reproduce the original compressed data. So a
+    workflow that was installed some other way (e.g. by the user
+    downloading it) gets a full download on its first update, and
+    delta updates thereafter.
+
+    Args:
+        dl (Download): Download with a manifest.
+        path (unicode): Path to save workflow file to.
+
+    Returns:
+        bool: ``True`` if file was rebuilt, ``False`` if there is no
+            base file to rebuild it from.
+
+    Raises:
+        ValueError: Raised if the rebuilt file is corrupt.
+    """
+    base = _base_archive()
+    if not os.path.exists(base):
+        wf().logger.debug('no base file for delta update')
+        return False
+
+    r = web.get(dl.manifest_url)
+    r.raise_for_status()
+    manifest = r.json()
+    if dl.digest and manifest['sha256'] != dl.digest:
+        raise ValueError('manifest does not match download')
+
+    local = {}
+    for _, offset, length, digest in archive_segments(base):
+        local[digest] = (offset, length)
+
+    hasher = hashlib.sha256()
+    fetched = [0]
+    partial = path + '.part'
+
+    def fetch(start, end, out):
+        """Download bytes ``start`` to ``end`` of workflow file."""
+        r = web.get(dl.url, headers={'Range': 'bytes={0}-{1}'.format(
+                    start, end - 1), 'Accept-Encoding': 'identity'},
+                    stream=True)
+        try:
+            r.raise_for_status()
+            if r.status_code != 206:
+                raise ValueError('server does not support Range requests')
+
+            n = 0
+            for data in r.iter_buffers():
+                out.write(data)
+                hasher.update(data)
+                n += len(data)
+        finally:
+            if r.raw is not None:
+                r.raw.close()
+
+        if n != end - start:
+            raise ValueError('incomplete range: {0} of {1} bytes'.format(
+                             n, end - start))
+        fetched[0] += n
+
+    try:
+        with open(base, 'rb') as src, open(partial, 'wb') as out:
+            # [start, end) of consecutive segments to download
+            pending = None
+            for _, offset, length, digest in manifest['segments']:
+                if digest not in local:
+                    if pending is None:
+                        pending = [offset, offset + length]
+                    else:
+                        pending[1] = offset + length
+                    continue
+
+                if pending is not None:
+                    fetch(pending[0], pending[1], out)
+                    pending = None
+
+                src.seek(local[digest][0])
+                data = src.read(length)
+                out.write(data)
+                hasher.update(data)
+
+            if pending is not None:
+                fetch(pending[0], pending[1], out)
+
+        if hasher.hexdigest() != manifest['sha256']:
+            raise ValueError('rebuilt workflow is corrupt')
+
+    except Exception:
+        if os.path.exists(partial):
+            os.unlink(partial)
+        raise
+
+    os.rename(partial, path)
+    wf().logger.info('delta update: downloaded %d of %d bytes',
+                     fetched[0], manifest['size'])
+    return True
+
+
 def build_api_url(repo):
     """Generate releases URL from GitHub repo.
 
@@ -387,29 +664,212 @@ def build_api_url(repo):
     return RELEASES_BASE.format(repo)
 
 
+_match_array_start = re.compile(r'\s*\[\s*').match
+_match_array_sep = re.compile(r'\s*([,\]])\s*').match
+_match_next_link = re.compile(r'<([^>]+)>\s*;\s*rel="next"').search
+
+
+def iter_json_array(js):
+    """Decode the items of JSON array ``js`` one at a time.
+
+    .. versionadded:: 1.38
+
+    Unlike :func:`json.loads`, only as much of ``js`` as is needed
+    for the items actually consumed is decoded.
+
+    Args:
+        js (str): JSON array.
+
+    Yields:
+        object: Decoded array items.
+    """
+    decoder = json.JSONDecoder()
+    m = _match_array_start(js)
+    if not m:
+        raise ValueError('not a JSON array')
+
+    idx = m.end()
+    if js[idx] == ']':
+        return
+
+    while True:
+        obj, idx = decoder.raw_decode(js, idx)
+        yield obj
+        m = _match_array_sep(js, idx)
+        if not m:
+            raise ValueError('invalid JSON array at char {0}'.format(idx))
+        if m.group(1) == ']':
+            return
+        idx = m.end()
+
+
+def release_pages(repo, per_page=100):
+    """Fetch pages of GitHub releases for repo, newest first.
+
+    .. versionadded:: 1.38
+
+    Pages are fetched only as they are needed, following the ``next``
+    link in each response's ``Link`` header. Each page is cached for
+    60 seconds and thereafter fetched with a conditional request, so
+    if it hasn't changed since the last check, GitHub responds with
+    304 and the cached page is used.
+
+    The downloads of each page are cached, not its JSON, so a cached
+    or unchanged page isn't parsed again.
+
+    Args:
+        repo (unicode): GitHub repo to load releases for.
+        per_page (int, optional): Number of releases per page.
+
+    Yields:
+        list: For each page, a list of each release's downloads (see
+            :meth:`Download.from_release`). Releases without valid
+            downloads are omitted.
+    """
+    validators = web.ValidatorStore(
+        wf().cachefile('__workflow_http_validators.json'))
+    url = '{0}?per_page={1}'.format(build_api_url(repo), per_page)
+    page = 1
+    while url:
+        key = 'github-releases-{0}-{1}'.format(repo.replace('/', '-'), page)
+        previous = wf().cached_data(key, max_age=0)
+        if previous and previous['url'] != url:
+            previous = None
+
+        if previous and wf().cached_data_fresh(key, 60):
+            releases, url = previous['releases'], previous['next']
+        else:
+            if previous is None:  # can't use a 304 without cached page
+                validators.delete(url)
+
+            wf().logger.info('retrieving releases for %r (page %d) ...',
+                             repo, page)
+            r = web.get(url, validators=validators)
+            r.raise_for_status()
+            if r.not_modified:  # 304 has no Link header
+                wf().logger.debug('releases for %r (page %d) unchanged',
+                                  repo, page)
+                releases, next_url = previous['releases'], previous['next']
+                # Mark cached page fresh without writing it again
+                os.utime(wf().cachefile('{0}.{1}'.format(
+                         key, wf().cache_serializer)), None)
+            else:
+                releases = []
+                for release in iter_json_array(r.content):
+                    dls = Download.from_release(release)
+                    if dls:
+                        releases.append([dl.dict for dl in dls])
+                m = _match_next_link(r.headers.get('link') or '')
+                next_url = m.group(1) if m else None
+                wf().cache_data(key, {'url': url, 'releases': releases,
+                                      'next': next_url})
+
+            url = next_url
+
+        yield [[Download.from_dict(d) for d in dls] for dls in releases]
+        page += 1
+
+
+def iter_downloads(repo):
+    """Generate available ``Download``s for GitHub repo.
+
+    .. versionadded:: 1.38
+
+    Releases are fetched a page at a time, so a caller that stops
+    early only pays for the pages it has looked at.
+
+    Args:
+        repo (unicode): GitHub repo to load releases for.
+
+    Yields:
+        Download: Downloads in the order their releases are listed
+            by GitHub (newest first).
+    """
+    for releases in release_pages(repo):
+        for dls in releases:
+            for dl in dls:
+                yield dl
+
+
 def get_downloads(repo):
     """Load available ``Download``s for GitHub repo.
 
     .. versionadded: 1.37
 
+    .. versionchanged:: 1.38
+
+    All pages of releases are loaded (see :func:`release_pages`).
+
     Args:
         repo (unicode): GitHub repo to load releases for.
 
     Returns:
         list: Sequence of `Download` contained in GitHub releases.
     """
-    url = build_api_url(repo)
+    dls = list(iter_downloads(repo))
+    # Same order as `Download.__lt__`, but each Alfred version is
+    # only parsed once
+    dls.sort(key=lambda dl: (dl.version, dl.alfred_version), reverse=True)
+    return dls
+
+
+def find_update(repo, current_version, alfred_version=None,
+                prereleases=False):
+    """Return newest compatible `Download` if it's newer than installed.
+
+    .. versionadded:: 1.38
+
+    GitHub lists releases by creation date, not version, so a page of
+    releases may start with, e.g., a backport of an older version.
+    Each page's compatible releases are compared, and if the newest is
+    newer than the installed version, no further pages are fetched.
+    Otherwise, the next page is checked.
+
+    Args:
+        repo (unicode): ``username/repo`` for workflow's GitHub repo
+        current_version (Version): Installed version of the workflow.
+        alfred_version (unicode, optional): Version of running Alfred.
+            Defaults to ``$alfred_version`` environment variable.
+        prereleases (bool, optional): Whether to include pre-releases.
+
+    Returns:
+        Download: Newer compatible download, or ``None`` if there
+            isn't one.
+    """
+    alfred_version = alfred_version or os.getenv('alfred_version')
+    version = None
+    if alfred_version:
+        version = Version(alfred_version)
 
-    def _fetch():
-        wf().logger.info('retrieving releases for %r ...', repo)
-        r = web.get(url)
-        r.raise_for_status()
-        return r.content
+    latest = None
+    for releases in release_pages(repo):
+        for dls in releases:
+            # sorted by Alfred version, so first compatible is best
+            for dl in dls:
+                if dl.prerelease and not prereleases:
+                    wf().logger.debug('ignored prerelease: %s', dl.version)
+                    continue
+                if version and dl.alfred_version > version:
+                    wf().logger.debug('ignored incompatible (%s > %s): %s',
+                                      dl.alfred_version, version,
+                                      dl.filename)
+                    continue
+                if latest is None or dl > latest:
+                    latest = dl
+                break
 
-    key = 'github-releases-' + repo.replace('/', '-')
-    js = wf().cached_data(key, _fetch, max_age=60)
+        if latest and latest.version > current_version:
+            break
 
-    return Download.from_releases(js)
+    if not latest:
+        wf().logger.warning('no compatible downloads for %s', repo)
+        return None
+
+    wf().logger.debug('latest=%r, installed=%r', latest.version,
+                      current_version)
+    if latest.version > current_version:
+        return latest
+    return None
 
 
 def latest_download(dls, alfred_version=None, prereleases=False):
@@ -463,24 +923,8 @@ def check_update(repo, current_version, prereleases=False,
     }
     current = Version(current_version)
 
-    dls = get_downloads(repo)
-    if not len(dls):
-        wf().logger.warning('no valid downloads for %s', repo)
-        wf().cache_data(key, no_update)
-        return False
-
-    wf().logger.info('%d download(s) for %s', len(dls), repo)
-
-    dl = latest_download(dls, alfred_version, prereleases)
-
-    if not dl:
-        wf().logger.warning('no compatible downloads for %s', repo)
-        wf().cache_data(key, no_update)
-        return False
-
-    wf().logger.debug('latest=%r, installed=%r', dl.version, current)
-
-    if dl.version > current:
+    dl = find_update(repo, current, alfred_version, prereleases)
+    if dl:
         wf().cache_data(key, {
             'version': str(dl.version),
             'download': dl.dict,
@@ -534,6 +978,7 @@ if __name__ == '__main__':  # pragma: nocover
         """Print help message."""
         print('usage: update.py (check|install) '
               '[--prereleases] <repo> <version>')
+        print('       update.py manifest <workflow file>')
         sys.exit(status)
 
     argv = sys.argv[:]
@@ -544,6 +989,12 @@ if __name__ == '__main__':  # pragma: nocover
         argv.remove('--prereleases')
         prereleases = True
 
+    if len(argv) == 3 and argv[1] == 'manifest':
+        path = argv[2]
+        with open(path + MANIFEST_EXTENSION, 'wb') as fp:
+            json.dump(build_manifest(path), fp, separators=(',', ':'))
+        sys.exit(0)
+
     if len(argv) != 4:
         show_help(1)
 
@@ -19,12 +19,15 @@ import errno
 import fcntl
 import functools
 import json
+import logging
 import os
+import Queue
 import signal
 import subprocess
 import sys
-from threading import Event
+from threading import Event, Lock, Thread
 import time
+import weakref
 
 # JXA scripts to call Alfred's API via the Scripting Bridge
 # {app} is automatically replaced with "Alfred 3" or
@@ -362,15 +365,147 @@ def atomic_writer(fpath, mode):
     """
     suffix = '.{}.tmp'.format(os.getpid())
     temppath = fpath + suffix
-    with open(temppath, mode) as fp:
-        try:
+    try:
+        # Close (i.e. flush) file before renaming it, so readers
+        # never see a partially-written file
+        with open(temppath, mode) as fp:
             yield fp
-            os.rename(temppath, fpath)
-        finally:
-            try:
-                os.remove(temppath)
-            except (OSError, IOError):
-                pass
+        os.rename(temppath, fpath)
+    finally:
+        try:
+            os.remove(temppath)
+        except (OSError, IOError):
+            pass
+
+
+# LockFiles currently held by this process. Released at exit.
+_held_locks = weakref.WeakSet()
+
+
+@atexit.register
+def _release_held_locks():
+    """Release any locks still held when the process exits."""
+    for lock in list(_held_locks):
+        lock.release()
+
+
+def _flock(fp, operation):
+    """Call :func:`fcntl.flock`, retrying if interrupted by a signal."""
+    while True:
+        try:
+            return fcntl.flock(fp, operation)
+        except IOError as err:
+            if err.errno != errno.EINTR:
+                raise
+
+
+# Helper threads of `_flock_timeout` that are still blocked in
+# `flock` after the caller gave up, keyed by ``(lockfile, operation)``
+_waiters = {}
+# Protects `_waiters` and the state of all `_Waiter` objects
+_waiters_lock = Lock()
+
+
+class _Waiter(Thread):
+    """Helper thread that blocks in :func:`fcntl.flock`.
+
+    Args:
+        key (tuple): ``(lockfile, operation)``
+        fp (file): Open lockfile.
+
+    Attributes:
+        abandoned (bool): Whether the caller gave up waiting. If so,
+            :attr:`fp` is closed when ``flock`` returns.
+        done (threading.Event): Set when ``flock`` returns.
+        error (Exception): Error raised by ``flock``.
+        pid (int): PID of process that started the thread.
+
+    """
+
+    def __init__(self, key, fp):
+        """Create new `_Waiter`."""
+        super(_Waiter, self).__init__()
+        self.daemon = True
+        self.key = key
+        self.fp = fp
+        self.pid = os.getpid()
+        self.done = Event()
+        self.error = None
+        self.abandoned = False
+
+    def run(self):
+        """Call ``flock``, closing the file if abandoned."""
+        try:
+            _flock(self.fp, self.key[1])
+        except Exception as err:
+            self.error = err
+
+        with _waiters_lock:
+            self.done.set()
+            if self.abandoned:
+                if _waiters.get(self.key) is self:
+                    del _waiters[self.key]
+                self.fp.close()
+
+
+def _flock_timeout(lockfile, fp, operation, timeout):
+    """Wait up to ``timeout`` seconds for a blocking :func:`fcntl.flock`.
+
+    The blocking call is made in a helper thread, so the wait happens
+    in the kernel rather than by polling. If the timeout expires, the
+    helper thread takes ownership of ``fp`` and closes it (releasing
+    the lock) once ``flock`` returns.
+
+    Until then, the thread holds a file descriptor open. To avoid
+    starting a new thread (and opening another file) each time an
+    acquisition of the same lock times out, the next call for the
+    same ``lockfile`` and ``operation`` waits on the abandoned
+    thread instead, and takes over its file.
+
+    Args:
+        lockfile (unicode): Path of lockfile.
+        fp (file): Open lockfile.
+        operation (int): ``fcntl.LOCK_SH`` or ``fcntl.LOCK_EX``.
+        timeout (float): Seconds to wait.
+
+    Returns:
+        file: Locked file (``fp`` or the file of an abandoned helper
+            thread) or ``None`` if the timeout expired. Either way,
+            ``fp`` is no longer owned by the caller.
+
+    """
+    key = (lockfile, operation)
+    with _waiters_lock:
+        waiter = _waiters.pop(key, None)
+        if waiter is not None and waiter.pid != os.getpid():
+            # Thread of parent process, which doesn't exist after fork
+            waiter.fp.close()
+            waiter = None
+
+        if waiter is not None:
+            waiter.abandoned = False
+
+    if waiter is None:
+        waiter = _Waiter(key, fp)
+        waiter.start()
+    else:
+        fp.close()
+
+    waiter.done.wait(timeout)
+
+    with _waiters_lock:
+        if not waiter.done.is_set():
+            waiter.abandoned = True
+            # If another thread's waiter is already registered, this
+            # one just closes its file when `flock` returns
+            _waiters.setdefault(key, waiter)
+            return None
+
+    if waiter.error is not None:
+        waiter.fp.close()
+        raise waiter.error
+
+    return waiter.fp
 
 
 class LockFile(object):
@@ -378,8 +513,15 @@ class LockFile(object):
 
     .. versionadded:: 1.13
 
+    .. versionchanged:: 1.38
+
     Creates a lockfile alongside ``protected_path``. Other ``LockFile``
-    instances will refuse to lock the same path.
+    instances will refuse to lock the same path, unless both are
+    ``shared`` locks. Use shared locks for readers and exclusive
+    locks (the default) for writers.
+
+    Waiting for a lock held by another process blocks in the kernel
+    (via :func:`fcntl.flock`) instead of polling.
 
     >>> path = '/path/to/file'
     >>> with LockFile(path):
@@ -392,24 +534,29 @@ class LockFile(object):
             if lock cannot be acquired within this number of seconds.
             If ``timeout`` is 0 (the default), wait forever.
         delay (float, optional): How often to check (in seconds) if
-            lock has been released.
+            lock has been released by another thread using the same
+            :class:`LockFile` instance.
+        shared (bool, optional): Acquire a shared (read) lock instead
+            of an exclusive (write) lock.
 
     Attributes:
         delay (float): How often to check (in seconds) whether the lock
-            can be acquired.
+            held by this instance has been released.
         lockfile (unicode): Path of the lockfile.
+        shared (bool): Whether this is a shared lock.
         timeout (float): How long to wait to acquire the lock.
 
     """
 
-    def __init__(self, protected_path, timeout=0.0, delay=0.05):
+    def __init__(self, protected_path, timeout=0.0, delay=0.05,
+                 shared=False):
         """Create new :class:`LockFile` object."""
         self.lockfile = protected_path + '.lock'
         self._lockfile = None
         self.timeout = timeout
         self.delay = delay
+        self.shared = shared
         self._lock = Event()
-        atexit.register(self.release)
 
     @property
     def locked(self):
@@ -422,62 +569,108 @@ class LockFile(object):
         If the lock is in use and ``blocking`` is ``False``, return
         ``False``.
 
-        Otherwise, check every :attr:`delay` seconds until it acquires
-        lock or exceeds attr:`timeout` and raises an :class:`AcquisitionError`.
+        Otherwise, wait until the lock is released or :attr:`timeout`
+        is exceeded, in which case raise an :class:`AcquisitionError`.
 
         """
         if self.locked and not blocking:
             return False
 
         start = time.time()
-        while True:
-            # Raise error if we've been waiting too long to acquire the lock
-            if self.timeout and (time.time() - start) >= self.timeout:
+
+        def _remaining():
+            """Seconds left before timeout (or ``None``)."""
+            if not self.timeout:
+                return None
+
+            remaining = self.timeout - (time.time() - start)
+            if remaining <= 0:
                 raise AcquisitionError('lock acquisition timed out')
 
-            # If already locked, wait then try again
-            if self.locked:
-                time.sleep(self.delay)
-                continue
+            return remaining
 
-            # Create in append mode so we don't lose any contents
-            if self._lockfile is None:
-                self._lockfile = open(self.lockfile, 'a')
+        # Held by another thread using this instance
+        while self.locked:
+            _remaining()
+            time.sleep(self.delay)
 
-            # Try to acquire the lock
+        if self.shared:
+            operation = fcntl.LOCK_SH
+        else:
+            operation = fcntl.LOCK_EX
+
+        while True:
+            # Create in append mode so we don't lose any contents
+            fp = open(self.lockfile, 'a')
             try:
-                fcntl.lockf(self._lockfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
-                self._lock.set()
-                break
-            except IOError as err:  # pragma: no cover
+                _flock(fp, operation | fcntl.LOCK_NB)
+            except IOError as err:
                 if err.errno not in (errno.EACCES, errno.EAGAIN):
+                    fp.close()
                     raise
 
                 # Don't try again
-                if not blocking:  # pragma: no cover
+                if not blocking:
+                    fp.close()
                     return False
 
-                # Wait, then try again
-                time.sleep(self.delay)
+                try:
+                    timeout = _remaining()
+                except AcquisitionError:
+                    fp.close()
+                    raise
+
+                if timeout is None:
+                    _flock(fp, operation)
+                else:
+                    fp = _flock_timeout(self.lockfile, fp, operation,
+                                        timeout)
+                    if fp is None:
+                        raise AcquisitionError('lock acquisition timed out')
+
+            # The previous holder may have deleted the lockfile while
+            # we were waiting, in which case we've locked an orphan
+            try:
+                current = os.stat(self.lockfile).st_ino
+            except OSError:
+                current = None
+
+            if current == os.fstat(fp.fileno()).st_ino:
+                break
+
+            fp.close()
 
+        self._lockfile = fp
+        self._lock.set()
+        _held_locks.add(self)
         return True
 
     def release(self):
-        """Release the lock by deleting `self.lockfile`."""
+        """Release the lock.
+
+        Exclusive locks also delete :attr:`lockfile`.
+
+        """
         if not self._lock.is_set():
             return False
 
         try:
-            fcntl.lockf(self._lockfile, fcntl.LOCK_UN)
+            # Delete lockfile before unlocking, so waiting processes
+            # can tell they've locked an orphan
+            if not self.shared:
+                try:
+                    os.unlink(self.lockfile)
+                except (IOError, OSError):  # pragma: no cover
+                    pass
+
+            fcntl.flock(self._lockfile, fcntl.LOCK_UN)
         except IOError:  # pragma: no cover
             pass
         finally:
-            self._lock.clear()
+            self._lockfile.close()
             self._lockfile = None
-            try:
-                os.unlink(self.lockfile)
-            except (IOError, OSError):  # pragma: no cover
-                pass
+            self._lock.clear()
+            _held_locks.discard(self)
 
             return True
 
@@ -550,3 +743,171 @@ class uninterruptible(object):
         """Decorator API."""
         return self.__class__(self.func.__get__(obj, klass),
                               klass.__name__)
+
+
+class QueueHandler(logging.Handler):
+    """Log handler that passes records to other handlers in a thread.
+
+    .. versionadded:: 1.38
+
+    Records are put on a queue and formatted and written by
+    ``handlers`` in a background thread, so logging costs the
+    calling thread little more than creating the record. The thread
+    is started by the first record. Records still queued when the
+    program exits are written when :mod:`logging` flushes its
+    handlers at exit.
+
+    As records are formatted later, don't change objects after
+    passing them to a logging call as arguments.
+
+    In a child process forked after the thread has started, records
+    are written immediately.
+
+    Args:
+        handlers (list): :class:`logging.Handler` objects to
+            pass records to.
+
+    """
+
+    def __init__(self, handlers):
+        """Create new `QueueHandler`."""
+        logging.Handler.__init__(self)
+        self.handlers = list(handlers)
+        self.queue = Queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._start_lock = Lock()
+
+    def handle(self, record):
+        """Queue ``record`` if it passes filters.
+
+        Unlike :meth:`logging.Handler.handle`, doesn't take the
+        handler's lock, as the queue has its own.
+        """
+        if self.filter(record):
+            self.emit(record)
+            return True
+        return False
+
+    def emit(self, record):
+        """Queue ``record`` for the background thread."""
+        pid = os.getpid()
+        if pid != self._pid:
+            with self._start_lock:
+                if self._pid is None:
+                    self._thread = Thread(target=self._run)
+                    self._thread.daemon = True
+                    self._thread.start()
+                    self._pid = pid
+
+            if pid != self._pid:  # forked child without thread
+                return self._write(record)
+
+        self.queue.put(record)
+
+    def flush(self):
+        """Wait until queued records have been written."""
+        if self._pid == os.getpid():
+            self.queue.join()
+        for h in self.handlers:
+            h.flush()
+
+    def close(self):
+        """Write queued records, stop thread and close handlers."""
+        if self._pid == os.getpid() and self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+        for h in self.handlers:
+            h.close()
+        logging.Handler.close(self)
+
+    def _run(self):
+        """Write queued records until ``None`` is received."""
+        while True:
+            record = self.queue.get()
+            try:
+                if record is None:
+                    return
+                self._write(record)
+            finally:
+                self.queue.task_done()
+
+    def _write(self, record):
+        """Pass ``record`` to ``self.handlers``."""
+        for h in self.handlers:
+            if record.levelno >= h.level:
+                h.handle(record)
+
+
+class LogSummary(object):
+    """Log the items processed by a loop as a single record.
+
+    .. versionadded:: 1.38
+
+    Logging every item in a loop that processes thousands of them
+    can take longer than the loop itself. Instead, add the items to a
+    `LogSummary`, and it logs one record when the ``with`` block exits
+    with the number of items and the first few of them::
+
+        with LogSummary(log, 'script(s) in %s', dirpath) as found:
+            for script in scripts:
+                found.add(script)
+
+    logs ``12 script(s) in /some/path: Script(...), Script(...),
+    Script(...), ... (+9 more)``.
+
+    The record is attributed to the line that created the summary.
+
+    Args:
+        logger (logging.Logger): Logger to log summary to.
+        msg (str): Description of items. The count is put before it.
+        *args: Arguments for ``msg``.
+        level (int, optional): Level of summary record. Defaults to
+            ``logging.DEBUG``.
+        sample (int, optional): How many items to include. Defaults
+            to 3.
+
+    """
+
+    def __init__(self, logger, msg, *args, **kwargs):
+        """Create new `LogSummary`."""
+        self.logger = logger
+        self.msg = msg
+        self.args = args
+        self.level = kwargs.pop('level', logging.DEBUG)
+        self.sample = kwargs.pop('sample', 3)
+        if kwargs:
+            raise TypeError('unexpected arguments: %s' % ', '.join(kwargs))
+
+        self.count = 0
+        self.items = []
+        caller = sys._getframe(1)
+        self._caller = (caller.f_code.co_filename, caller.f_lineno,
+                        caller.f_code.co_name)
+
+    def add(self, item):
+        """Count ``item`` and keep it if it's one of the first few."""
+        self.count += 1
+        if len(self.items) < self.sample:
+            self.items.append(item)
+
+    def __enter__(self):
+        """Start collecting items."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Log summary record."""
+        if not self.logger.isEnabledFor(self.level):
+            return
+
+        detail = ''
+        if self.items:
+            detail = ': ' + ', '.join(repr(i) for i in self.items)
+            if self.count > len(self.items):
+                detail += ', ... (+%d more)' % (self.count - len(self.items))
+
+        fn, lno, func = self._caller
+        record = self.logger.makeRecord(
+            self.logger.name, self.level, fn, lno, '%d ' + self.msg + '%s',
+            (self.count,) + self.args + (detail,), None, func)
+        self.logger.handle(record)
@@ -10,19 +10,30 @@
 """Lightweight HTTP library with a requests-like interface."""
 
 import codecs
+from cStringIO import StringIO
+from email.utils import mktime_tz, parsedate_tz
+import errno
+import hashlib
+import httplib
 import json
 import mimetypes
 import os
+import Queue
 import random
 import re
 import socket
 import string
+import sys
+import threading
+import time
 import unicodedata
 import urllib
 import urllib2
 import urlparse
 import zlib
 
+from util import atomic_writer
+
 
 USER_AGENT = u'Alfred-Workflow/1.36 (+http://www.deanishe.net/alfred-workflow)'
 
@@ -104,6 +115,309 @@ class NoRedirectHandler(urllib2.HTTPRedirectHandler):
         return None
 
 
+class ConnectionPool(object):
+    """Keep idle HTTP(S) connections for reuse.
+
+    .. versionadded:: 1.38
+
+    Connections are kept per scheme and host. A connection is only
+    returned to the pool once its response has been read to the end,
+    and only if the server didn't ask to close it.
+
+    Args:
+        maxsize (int, optional): Maximum number of idle connections
+            to keep per host.
+        idle_timeout (float, optional): Discard connections that have
+            been idle for longer than this many seconds.
+
+    Attributes:
+        created (int): Number of connections opened.
+        reused (int): Number of times a connection was reused.
+
+    """
+
+    def __init__(self, maxsize=4, idle_timeout=30):
+        """Create new `ConnectionPool`."""
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.created = 0
+        self.reused = 0
+        # (scheme, host) -> [(connection, time returned to pool), ...]
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def get(self, scheme, host, timeout):
+        """Return an idle connection to ``host`` or a new one.
+
+        :param scheme: ``http`` or ``https``
+        :type scheme: str
+        :param host: Host (and port) to connect to
+        :type host: str
+        :param timeout: Socket timeout
+        :type timeout: float
+        :returns: ``(connection, reused)`` tuple
+        :rtype: 2-tuple ``(httplib.HTTPConnection, bool)``
+
+        """
+        if timeout is socket._GLOBAL_DEFAULT_TIMEOUT:
+            timeout = socket.getdefaulttimeout()
+
+        now = time.time()
+        conn = None
+        with self._lock:
+            idle = self._idle.get((scheme, host), [])
+            while idle:
+                c, last_used = idle.pop()
+                if now - last_used < self.idle_timeout:
+                    conn = c
+                    self.reused += 1
+                    break
+                c.close()
+
+            if conn is None:
+                self.created += 1
+
+        if conn is not None:
+            conn.timeout = timeout
+            conn.sock.settimeout(timeout)
+            return conn, True
+
+        if scheme == 'https':
+            conn = httplib.HTTPSConnection(host, timeout=timeout)
+        else:
+            conn = httplib.HTTPConnection(host, timeout=timeout)
+
+        conn.response_class = _PooledResponse
+        return conn, False
+
+    def put(self, scheme, host, conn):
+        """Return connection to pool.
+
+        :param scheme: ``http`` or ``https``
+        :type scheme: str
+        :param host: Host (and port) of connection
+        :type host: str
+        :param conn: Connection whose response has been read
+        :type conn: :class:`httplib.HTTPConnection`
+
+        """
+        if conn.sock is None:  # closed by server
+            return
+
+        with self._lock:
+            idle = self._idle.setdefault((scheme, host), [])
+            if len(idle) < self.maxsize:
+                idle.append((conn, time.time()))
+                return
+
+        conn.close()
+
+    def clear(self):
+        """Close all idle connections."""
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle = {}
+
+
+class _PooledResponse(httplib.HTTPResponse):
+    """Response that returns its connection to the pool when read."""
+
+    # Called with `True` if response was read to the end,
+    # or `False` if it was closed early
+    _release = None
+    _reading = False
+
+    def read(self, amt=None):
+        self._reading = True
+        try:
+            data = httplib.HTTPResponse.read(self, amt)
+        finally:
+            self._reading = False
+
+        if self.fp is None:
+            # Connection closed before `Content-Length` bytes were read
+            # can't be reused
+            self._done(not self.length)
+
+        return data
+
+    def readinto(self, b):
+        """Read up to ``len(b)`` bytes directly into buffer ``b``.
+
+        Only responses with a ``Content-Length`` are read straight
+        from the socket. Others are read via :meth:`read`.
+        """
+        if self.fp is None:
+            return 0
+
+        if self.chunked or self.length is None or self._method == 'HEAD':
+            data = self.read(len(b))
+            b[:len(data)] = data
+            return len(data)
+
+        view = memoryview(b)[:min(len(b), self.length)]
+        # Return data already read into socket file's buffer first
+        buffered = _buffered_bytes(self.fp)
+        if buffered or not len(view):
+            data = self.read(min(len(view), buffered))
+            view[:len(data)] = data
+            return len(data)
+
+        while True:
+            try:
+                n = self.fp._sock.recv_into(view)
+                break
+            except socket.error as err:
+                if err.args[0] != errno.EINTR:
+                    raise
+
+        self.length -= n
+        if not n or not self.length:
+            self._reading = True
+            try:
+                self.close()
+            finally:
+                self._reading = False
+            self._done(not self.length)
+
+        return n
+
+    def close(self):
+        httplib.HTTPResponse.close(self)
+        if not self._reading:
+            self._done(False)
+
+    def _done(self, complete):
+        release, self._release = self._release, None
+        if release is not None:
+            release(complete)
+
+
+#: Requests that are retried if a reused connection fails
+_RETRY_METHODS = ('GET', 'HEAD')
+
+
+class _PooledHandlerMixin(object):
+    """Open requests with connections from a `ConnectionPool`.
+
+    Based on :meth:`urllib2.AbstractHTTPHandler.do_open`, but
+    without the ``Connection: close`` header.
+
+    If a reused connection fails, ``GET`` and ``HEAD`` requests are
+    retried on another connection. Other requests raise
+    :class:`urllib2.URLError`, as the server may have acted on them.
+    """
+
+    def pooled_open(self, scheme, req):
+        # Tunnelling through a proxy isn't supported
+        if req._tunnel_host:
+            if scheme == 'https':
+                return urllib2.HTTPSHandler.https_open(self, req)
+            return urllib2.HTTPHandler.http_open(self, req)
+
+        host = req.get_host()
+        if not host:
+            raise urllib2.URLError('no host given')
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update(dict((k, v) for k, v in req.headers.items()
+                            if k not in headers))
+        headers = dict(
+            (name.title(), val) for name, val in headers.items())
+
+        while True:
+            conn, reused = self.pool.get(scheme, host, req.timeout)
+            try:
+                conn.request(req.get_method(), req.get_selector(), req.data,
+                             headers)
+                r = conn.getresponse(buffering=True)
+            except (socket.error, httplib.HTTPException) as err:
+                conn.close()
+                # Server may have closed an idle connection. Other
+                # requests may have been received, so aren't repeated.
+                if reused and req.get_method() in _RETRY_METHODS:
+                    continue
+                raise urllib2.URLError(err)
+            break
+
+        def release(complete):
+            if complete:
+                self.pool.put(scheme, host, conn)
+            else:
+                conn.close()
+
+        r._release = release
+        # Nothing to read, so connection can be reused straight away
+        if r.length == 0 or req.get_method() == 'HEAD':
+            r.read()
+
+        r.recv = r.read
+        fp = socket._fileobject(r, close=True)
+
+        resp = urllib2.addinfourl(fp, r.msg, req.get_full_url())
+        resp.code = r.status
+        resp.msg = r.reason
+        # Allow `Response` to read directly into a buffer
+        resp.readinto = r.readinto
+        return resp
+
+
+def _buffered_bytes(fileobj):
+    """Return number of bytes in read buffer of :class:`socket._fileobject`.
+    """
+    rbuf = getattr(fileobj, '_rbuf', None)
+    if rbuf is None:
+        return 0
+    rbuf.seek(0, os.SEEK_END)
+    return rbuf.tell()
+
+
+class PooledHTTPHandler(_PooledHandlerMixin, urllib2.HTTPHandler):
+    """HTTP handler that reuses connections.
+
+    .. versionadded:: 1.38
+
+    :param pool: Pool to take connections from
+    :type pool: :class:`ConnectionPool`
+
+    """
+
+    def __init__(self, pool):
+        """Create new handler using ``pool``."""
+        urllib2.HTTPHandler.__init__(self)
+        self.pool = pool
+
+    def http_open(self, req):
+        """Open HTTP request."""
+        return self.pooled_open('http', req)
+
+
+class PooledHTTPSHandler(_PooledHandlerMixin, urllib2.HTTPSHandler):
+    """HTTPS handler that reuses connections.
+
+    .. versionadded:: 1.38
+
+    :param pool: Pool to take connections from
+    :type pool: :class:`ConnectionPool`
+
+    """
+
+    def __init__(self, pool):
+        """Create new handler using ``pool``."""
+        urllib2.HTTPSHandler.__init__(self)
+        self.pool = pool
+
+    def https_open(self, req):
+        """Open HTTPS request."""
+        return self.pooled_open('https', req)
+
+
+#: Connections shared by all requests
+pool = ConnectionPool()
+
+
 # Adapted from https://gist.github.com/babakness/3901174
 class CaseInsensitiveDictionary(dict):
     """Dictionary with caseless key search.
@@ -178,6 +492,438 @@ class CaseInsensitiveDictionary(dict):
             yield v['val']
 
 
+class ValidatorStore(object):
+    """Save ``ETag`` and ``Last-Modified`` headers of responses to disk.
+
+    .. versionadded:: 1.38
+
+    Pass a `ValidatorStore` as the ``validators`` argument of
+    :func:`request`/:func:`get` to make a conditional request. If the
+    store holds validators for the URL, they are sent as ``If-None-Match``
+    and ``If-Modified-Since`` headers, and if the resource hasn't changed,
+    the server responds with 304 (see :attr:`Response.not_modified`).
+    Validators of successful responses are saved to the store.
+
+    Validators for all URLs are saved in one JSON file.
+
+    Args:
+        filepath (unicode): Path of JSON file.
+
+    """
+
+    def __init__(self, filepath):
+        """Create new `ValidatorStore` backed by ``filepath``."""
+        self._filepath = filepath
+        self._data = None
+
+    @property
+    def data(self):
+        """Mapping of URLs to validators."""
+        if self._data is None:
+            try:
+                with open(self._filepath, 'rb') as fp:
+                    self._data = json.load(fp)
+            except (IOError, ValueError):
+                self._data = {}
+
+        return self._data
+
+    def get(self, url):
+        """Return validators for ``url``.
+
+        :param url: URL of resource
+        :type url: unicode
+        :returns: mapping with keys ``etag`` and ``last-modified``
+            or ``None`` if there are no validators for ``url``.
+        :rtype: dict
+
+        """
+        return self.data.get(url)
+
+    def headers(self, url):
+        """Return conditional request headers for ``url``.
+
+        :param url: URL of resource
+        :type url: unicode
+        :returns: mapping of HTTP headers, which is empty if there are
+            no validators for ``url``.
+        :rtype: dict
+
+        """
+        headers = {}
+        validators = self.get(url) or {}
+        if validators.get('etag'):
+            headers['if-none-match'] = validators['etag']
+        if validators.get('last-modified'):
+            headers['if-modified-since'] = validators['last-modified']
+
+        return headers
+
+    def update(self, url, response):
+        """Save validators from ``response``.
+
+        Does nothing if the request failed or the response contains
+        no validators.
+
+        :param url: URL of resource
+        :type url: unicode
+        :param response: Response for ``url``
+        :type response: :class:`Response`
+
+        """
+        if response.error is not None:
+            return
+
+        validators = {}
+        for key in ('etag', 'last-modified'):
+            if response.headers.get(key):
+                validators[key] = response.headers[key]
+
+        if not validators or self.get(url) == validators:
+            return
+
+        self.data[url] = validators
+        self._save()
+
+    def delete(self, url):
+        """Delete validators for ``url``.
+
+        :param url: URL of resource
+        :type url: unicode
+
+        """
+        if self.data.pop(url, None) is not None:
+            self._save()
+
+    def _save(self):
+        """Write validators to disk."""
+        with atomic_writer(self._filepath, 'wb') as fp:
+            json.dump(self.data, fp, separators=(',', ':'))
+
+
+class ResponseCache(object):
+    """On-disk cache of HTTP responses.
+
+    .. versionadded:: 1.38
+
+    Pass a `ResponseCache` as the ``cache`` argument of
+    :func:`request`/:func:`get` to cache responses to GET requests.
+    Responses are cached according to their ``Cache-Control``,
+    ``Expires``, ``ETag`` and ``Last-Modified`` headers:
+
+    - A response is fresh for ``max-age`` seconds, or until its
+      ``Expires`` date, and fresh responses are returned without
+      contacting the server.
+    - Stale responses with validators are revalidated with a conditional
+      request, and if the server responds with 304, the cached response
+      is returned.
+    - Responses with ``Cache-Control: no-store``, responses without
+      freshness information or validators, and responses larger than
+      half of ``max_size`` aren't cached.
+
+    Each response is stored in one file in ``dirpath``. When the total
+    size of the files exceeds ``max_size``, the least recently used
+    responses are deleted.
+
+    Args:
+        dirpath (unicode): Directory to save responses in.
+        max_size (int, optional): Maximum size of cache in bytes.
+
+    Attributes:
+        hits (int): Number of requests answered from the cache
+            without contacting the server.
+        revalidations (int): Number of requests answered from the
+            cache after the server responded with 304.
+        misses (int): Number of requests answered by the server.
+
+    """
+
+    def __init__(self, dirpath, max_size=10485760):
+        """Create new `ResponseCache` in ``dirpath``."""
+        self.dirpath = dirpath
+        self.max_size = max_size
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    def _path(self, url):
+        """Return path of cache file for ``url``."""
+        return os.path.join(self.dirpath,
+                            hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def get(self, url):
+        """Return cached response for ``url``.
+
+        :param url: URL of resource
+        :type url: str
+        :returns: ``(meta, body)`` tuple or ``None`` if ``url``
+            isn't cached. ``meta`` is a :class:`dict`.
+        :rtype: 2-tuple ``(dict, str)``
+
+        """
+        url = _unicode_url(url)
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as fp:
+                meta = json.loads(fp.readline())
+                body = fp.read()
+        except (IOError, ValueError):
+            return None
+
+        if meta.get('url') != url or len(body) != meta.get('size'):
+            return None
+
+        # Update modification time for LRU eviction
+        try:
+            os.utime(path, None)
+        except OSError:  # pragma: no cover
+            pass
+
+        return meta, body
+
+    def store(self, url, resp):
+        """Cache ``resp`` if it's cacheable.
+
+        :param url: URL of resource
+        :type url: str
+        :param resp: Response returned by :mod:`urllib2`
+        :type resp: :class:`urllib.addinfourl`
+        :returns: ``resp`` or a new response with the same contents
+            if ``resp`` was read to be cached.
+        :rtype: :class:`urllib.addinfourl`
+
+        """
+        headers = resp.info()
+        cc = _cache_control(headers)
+        vary = [s.strip().lower() for s in headers.get('vary', '').split(',')
+                if s.strip()]
+        length = headers.get('content-length', '')
+        if (resp.code != 200 or 'no-store' in cc or
+                [v for v in vary if v != 'accept-encoding'] or
+                (length.isdigit() and int(length) > self.max_size // 2)):
+            return resp
+
+        now = time.time()
+        expires = _expiry(headers, now)
+        if expires <= now and not (headers.get('etag') or
+                                   headers.get('last-modified')):
+            return resp
+
+        body = resp.read()
+        meta = {'url': _unicode_url(url), 'code': resp.code, 'msg': resp.msg,
+                'headers': ''.join(headers.headers), 'expires': expires,
+                'size': len(body)}
+        if len(body) <= self.max_size // 2:
+            self._save(meta, body)
+
+        resp = self.response(meta, body)
+        resp.from_cache = False
+        return resp
+
+    def refresh(self, meta, body, headers):
+        """Update cached response with headers from a 304 response.
+
+        :param meta: Cached response metadata (as returned by :meth:`get`)
+        :type meta: dict
+        :param body: Cached response body
+        :type body: str
+        :param headers: Headers of 304 response
+        :type headers: :class:`httplib.HTTPMessage`
+        :returns: Updated metadata
+        :rtype: dict
+
+        """
+        msg = httplib.HTTPMessage(StringIO(meta['headers']))
+        for key in headers.keys():
+            if key not in ('content-length', 'transfer-encoding'):
+                msg[key] = headers[key]
+
+        meta = dict(meta, headers=''.join(msg.headers),
+                    expires=_expiry(msg, time.time()))
+        self._save(meta, body)
+        return meta
+
+    def response(self, meta, body):
+        """Create a :mod:`urllib2` response from cached data.
+
+        :param meta: Cached response metadata (as returned by :meth:`get`)
+        :type meta: dict
+        :param body: Cached response body
+        :type body: str
+        :returns: Response
+        :rtype: :class:`urllib.addinfourl`
+
+        """
+        headers = httplib.HTTPMessage(StringIO(meta['headers']))
+        resp = urllib2.addinfourl(StringIO(body), headers,
+                                  meta['url'].encode('utf-8'), meta['code'])
+        resp.msg = meta['msg']
+        resp.from_cache = True
+        return resp
+
+    def clear(self):
+        """Delete all cached responses."""
+        for path in self._files():
+            try:
+                os.unlink(path)
+            except OSError:  # pragma: no cover
+                pass
+
+    def _files(self):
+        """Return paths of cache files."""
+        try:
+            return [os.path.join(self.dirpath, fn)
+                    for fn in os.listdir(self.dirpath)
+                    if not fn.startswith('.')]
+        except OSError:
+            return []
+
+    def _save(self, meta, body):
+        """Save response to disk and evict old responses."""
+        if not os.path.exists(self.dirpath):
+            os.makedirs(self.dirpath)
+
+        with atomic_writer(self._path(meta['url']), 'wb') as fp:
+            fp.write(json.dumps(meta, separators=(',', ':')) + b'\n')
+            fp.write(body)
+
+        self._evict()
+
+    def _evict(self):
+        """Delete least recently used responses if cache is too big."""
+        files = []
+        total = 0
+        for path in self._files():
+            try:
+                st = os.stat(path)
+            except OSError:  # deleted by another process
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        files.sort()
+        while total > self.max_size and files:
+            _, size, path = files.pop(0)
+            try:
+                os.unlink(path)
+            except OSError:  # pragma: no cover
+                pass
+            total -= size
+
+
+def _unicode_url(url):
+    """Decode UTF-8 ``url``."""
+    if isinstance(url, str):
+        url = url.decode('utf-8')
+    return url
+
+
+def _cache_control(headers):
+    """Parse ``Cache-Control`` header into a :class:`dict`."""
+    directives = {}
+    for part in headers.get('cache-control', '').split(','):
+        key, _, value = part.strip().partition('=')
+        if key:
+            directives[key.lower()] = value.strip('"')
+
+    return directives
+
+
+def _expiry(headers, now):
+    """Return time response with ``headers`` becomes stale.
+
+    :param headers: Response headers
+    :type headers: :class:`httplib.HTTPMessage`
+    :param now: Time response was received
+    :type now: float
+    :returns: UNIX timestamp. If ``now``, response must be revalidated.
+    :rtype: float
+
+    """
+    cc = _cache_control(headers)
+    if 'no-cache' in cc:
+        return now
+
+    age = headers.get('age', '')
+    age = int(age) if age.isdigit() else 0
+
+    if cc.get('max-age', '').isdigit():
+        return now + max(int(cc['max-age']) - age, 0)
+
+    expires = parsedate_tz(headers.get('expires', ''))
+    if expires is not None:
+        # Expiry relative to server's clock
+        date = parsedate_tz(headers.get('date', ''))
+        date = mktime_tz(date) if date is not None else now
+        return now + max(mktime_tz(expires) - date - age, 0)
+
+    return now
+
+
+class CacheHandler(urllib2.BaseHandler):
+    """Answer GET requests from a `ResponseCache`.
+
+    .. versionadded:: 1.38
+
+    :param cache: Cache of responses
+    :type cache: :class:`ResponseCache`
+
+    """
+
+    # Must process responses before `HTTPErrorProcessor` turns
+    # 304s into errors
+    handler_order = 900
+
+    def __init__(self, cache):
+        """Create new handler using ``cache``."""
+        self.cache = cache
+
+    def default_open(self, req):
+        """Return fresh cached response or add validators to request."""
+        if req.get_method() != 'GET':
+            return None
+
+        entry = self.cache.get(req.get_full_url())
+        if entry is None:
+            return None
+
+        meta, body = entry
+        if meta['expires'] > time.time():
+            self.cache.hits += 1
+            return self.cache.response(meta, body)
+
+        # Revalidate, unless caller is making their own conditional request
+        if req.has_header('If-none-match') or \
+                req.has_header('If-modified-since'):
+            return None
+
+        headers = httplib.HTTPMessage(StringIO(meta['headers']))
+        if headers.get('etag'):
+            req.add_unredirected_header('If-None-Match', headers['etag'])
+        if headers.get('last-modified'):
+            req.add_unredirected_header('If-Modified-Since',
+                                        headers['last-modified'])
+        req.cache_entry = entry
+        return None
+
+    def http_response(self, req, resp):
+        """Return cached response for 304 or cache response."""
+        if req.get_method() != 'GET' or getattr(resp, 'from_cache', False):
+            return resp
+
+        entry = getattr(req, 'cache_entry', None)
+        if resp.code == 304 and entry is not None:
+            self.cache.revalidations += 1
+            resp.close()
+            meta = self.cache.refresh(entry[0], entry[1], resp.info())
+            return self.cache.response(meta, entry[1])
+
+        self.cache.misses += 1
+        return self.cache.store(req.get_full_url(), resp)
+
+    https_response = http_response
+
+
 class Response(object):
     """
     Returned by :func:`request` / :func:`get` / :func:`post` functions.
@@ -197,12 +943,18 @@ class Response(object):
 
     """
 
-    def __init__(self, request, stream=False):
+    def __init__(self, request, stream=False, opener=None, timeout=None):
         """Call `request` with :mod:`urllib2` and process results.
 
         :param request: :class:`urllib2.Request` instance
         :param stream: Whether to stream response or retrieve it all at once
         :type stream: bool
+        :param opener: Opener to open ``request`` with. If not
+            specified, the installed opener is used.
+        :type opener: :class:`urllib2.OpenerDirector`
+        :param timeout: connection timeout limit in seconds. If not
+            specified, the default socket timeout is used.
+        :type timeout: int
 
         """
         self.request = request
@@ -217,10 +969,17 @@ class Response(object):
         self._content = None
         self._content_loaded = False
         self._gzipped = False
+        self.bytes_read = 0
+        self.read_time = 0.0
+        self.from_cache = False
+
+        urlopen = urllib2.urlopen if opener is None else opener.open
+        if timeout is None:
+            timeout = socket._GLOBAL_DEFAULT_TIMEOUT
 
         # Execute query
         try:
-            self.raw = urllib2.urlopen(request)
+            self.raw = urlopen(request, timeout=timeout)
         except urllib2.HTTPError as err:
             self.error = err
             try:
@@ -235,6 +994,7 @@ class Response(object):
         else:
             self.status_code = self.raw.getcode()
             self.url = self.raw.geturl()
+            self.from_cache = getattr(self.raw, 'from_cache', False)
         self.reason = RESPONSES.get(self.status_code)
 
         # Parse additional info if request succeeded
@@ -385,12 +1145,112 @@ class Response(object):
 
         return chunks
 
-    def save_to_path(self, filepath):
+    def iter_buffers(self, chunk_size=65536, max_chunk_size=1048576,
+                     progress=None):
+        """Iterate over response data in a reusable buffer.
+
+        .. versionadded:: 1.38
+
+        Unlike :meth:`iter_content`, which returns a new string for
+        every chunk, data are read directly into a buffer, and a
+        :class:`memoryview` of the buffer is yielded. The buffer is
+        overwritten on the next iteration, so copy the data (e.g. with
+        ``view.tobytes()``) if you need to keep them.
+
+        The buffer starts at ``chunk_size`` bytes and doubles each time
+        a chunk fills it, up to ``max_chunk_size`` bytes.
+
+        :attr:`bytes_read` and :attr:`read_time` are updated as data are
+        read, so :attr:`bytes_per_second` shows the download speed.
+
+        :param chunk_size: Initial buffer size
+        :type chunk_size: int
+        :param max_chunk_size: Maximum buffer size
+        :type max_chunk_size: int
+        :param progress: Called with number of bytes read so far and
+            ``Content-Length`` (or ``None`` if unknown) after each chunk
+        :type progress: callable
+        :returns: iterator of :class:`memoryview`
+
+        """
+        if self._content_loaded:
+            raise RuntimeError(
+                "`content` has already been read from this Response.")
+
+        self.stream = True
+        total = self.headers.get('content-length')
+        if total and total.isdigit() and not self._gzipped:
+            total = int(total)
+        else:
+            total = None
+
+        start = time.time()
+
+        # Compressed data must be decompressed into new strings
+        if (self._gzipped or not hasattr(self.raw, 'readinto') or
+                _buffered_bytes(self.raw.fp)):
+            def chunks():
+                for data in self.iter_content(chunk_size):
+                    yield memoryview(data)
+        else:
+            def chunks():
+                buf = bytearray(chunk_size)
+                view = memoryview(buf)
+                while True:
+                    # Fill buffer to reduce number of yields/writes
+                    n = 0
+                    while n < len(buf):
+                        i = self.raw.readinto(view[n:])
+                        if not i:
+                            break
+                        n += i
+
+                    if not n:
+                        break
+
+                    yield view[:n]
+                    if n < len(buf):  # end of data
+                        break
+
+                    if len(buf) < max_chunk_size:
+                        buf = bytearray(min(len(buf) * 2, max_chunk_size))
+                        view = memoryview(buf)
+
+        for data in chunks():
+            self.bytes_read += len(data)
+            self.read_time = time.time() - start
+            if progress:
+                progress(self.bytes_read, total)
+            yield data
+
+        self._content_loaded = True
+
+    @property
+    def bytes_per_second(self):
+        """Download speed of :meth:`iter_buffers`.
+
+        .. versionadded:: 1.38
+
+        :returns: Bytes read per second or ``None`` if nothing has been
+            read.
+        :rtype: float
+
+        """
+        if not self.read_time:
+            return None
+        return self.bytes_read / self.read_time
+
+    def save_to_path(self, filepath, progress=None):
         """Save retrieved data to file at ``filepath``.
 
         .. versionadded: 1.9.6
 
+        .. versionchanged:: 1.38
+
+        Data are read with :meth:`iter_buffers`.
+
         :param filepath: Path to save retrieved data.
+        :param progress: Progress callback (see :meth:`iter_buffers`).
 
         """
         filepath = os.path.abspath(filepath)
@@ -398,18 +1258,33 @@ class Response(object):
         if not os.path.exists(dirname):
             os.makedirs(dirname)
 
-        self.stream = True
-
         with open(filepath, 'wb') as fileobj:
-            for data in self.iter_content():
+            for data in self.iter_buffers(progress=progress):
                 fileobj.write(data)
 
+    @property
+    def not_modified(self):
+        """Whether server responded to a conditional request with 304.
+
+        .. versionadded:: 1.38
+
+        :returns: ``True`` if resource hasn't changed
+        :rtype: bool
+
+        """
+        return self.status_code == 304
+
     def raise_for_status(self):
         """Raise stored error if one occurred.
 
         error will be instance of :class:`urllib2.HTTPError`
+
+        .. versionchanged:: 1.38
+
+        A 304 response is not considered an error.
+
         """
-        if self.error is not None:
+        if self.error is not None and not self.not_modified:
             raise self.error
         return
 
@@ -465,7 +1340,7 @@ class Response(object):
 
 def request(method, url, params=None, data=None, headers=None, cookies=None,
             files=None, auth=None, timeout=60, allow_redirects=False,
-            stream=False):
+            stream=False, validators=None, cache=None):
     """Initiate an HTTP(S) request. Returns :class:`Response` object.
 
     :param method: 'GET' or 'POST'
@@ -491,6 +1366,12 @@ def request(method, url, params=None, data=None, headers=None, cookies=None,
     :type allow_redirects: bool
     :param stream: Stream content instead of fetching it all at once.
     :type stream: bool
+    :param validators: Store of ``ETag``/``Last-Modified`` headers used
+        to make a conditional request (see :class:`ValidatorStore`).
+    :type validators: :class:`ValidatorStore`
+    :param cache: Cache for responses to GET requests
+        (see :class:`ResponseCache`).
+    :type cache: :class:`ResponseCache`
     :returns: Response object
     :rtype: :class:`Response`
 
@@ -506,13 +1387,16 @@ def request(method, url, params=None, data=None, headers=None, cookies=None,
     * ``mimetype`` is optional. If not provided, :mod:`mimetypes` will
       be used to guess the mimetype, or ``application/octet-stream``
       will be used.
+    * ``content`` may also be an open file, which is streamed to the
+      server (see :class:`MultipartEncoder`).
 
     """
     # TODO: cookies
-    socket.setdefaulttimeout(timeout)
-
     # Default handlers
-    openers = []
+    openers = [PooledHTTPHandler(pool), PooledHTTPSHandler(pool)]
+
+    if cache is not None:
+        openers.append(CacheHandler(cache))
 
     if not allow_redirects:
         openers.append(NoRedirectHandler())
@@ -524,9 +1408,9 @@ def request(method, url, params=None, data=None, headers=None, cookies=None,
         auth_manager = urllib2.HTTPBasicAuthHandler(password_manager)
         openers.append(auth_manager)
 
-    # Install our custom chain of openers
+    # Use a local opener and pass `timeout` to it, rather than
+    # changing global state, as requests may be made concurrently
     opener = urllib2.build_opener(*openers)
-    urllib2.install_opener(opener)
 
     if not headers:
         headers = CaseInsensitiveDictionary()
@@ -536,13 +1420,9 @@ def request(method, url, params=None, data=None, headers=None, cookies=None,
     if 'user-agent' not in headers:
         headers['user-agent'] = USER_AGENT
 
-    # Accept gzip-encoded content
-    encodings = [s.strip() for s in
-                 headers.get('accept-encoding', '').split(',')]
-    if 'gzip' not in encodings:
-        encodings.append('gzip')
-
-    headers['accept-encoding'] = ', '.join(encodings)
+    # Accept gzip-encoded content unless caller says otherwise
+    if 'accept-encoding' not in headers:
+        headers['accept-encoding'] = 'gzip'
 
     # Force POST by providing an empty data string
     if method == 'POST' and not data:
@@ -551,8 +1431,8 @@ def request(method, url, params=None, data=None, headers=None, cookies=None,
     if files:
         if not data:
             data = {}
-        new_headers, data = encode_multipart_formdata(data, files)
-        headers.update(new_headers)
+        data = MultipartEncoder(data, files)
+        headers.update(data.headers)
     elif data and isinstance(data, dict):
         data = urllib.urlencode(str_dict(data))
 
@@ -575,12 +1455,23 @@ def request(method, url, params=None, data=None, headers=None, cookies=None,
         query = urllib.urlencode(str_dict(params), doseq=True)
         url = urlparse.urlunsplit((scheme, netloc, path, query, fragment))
 
+    # Conditional request. Headers set by caller take precedence.
+    if validators is not None:
+        for key, value in validators.headers(url.decode('utf-8')).items():
+            if key not in headers:
+                headers[key.encode('utf-8')] = value.encode('utf-8')
+
     req = urllib2.Request(url, data, headers)
-    return Response(req, stream)
+    r = Response(req, stream, opener, timeout)
+    if validators is not None:
+        validators.update(url.decode('utf-8'), r)
+
+    return r
 
 
 def get(url, params=None, headers=None, cookies=None, auth=None,
-        timeout=60, allow_redirects=True, stream=False):
+        timeout=60, allow_redirects=True, stream=False, validators=None,
+        cache=None):
     """Initiate a GET request. Arguments as for :func:`request`.
 
     :returns: :class:`Response` instance
@@ -588,7 +1479,7 @@ def get(url, params=None, headers=None, cookies=None, auth=None,
     """
     return request('GET', url, params, headers=headers, cookies=cookies,
                    auth=auth, timeout=timeout, allow_redirects=allow_redirects,
-                   stream=stream)
+                   stream=stream, validators=validators, cache=cache)
 
 
 def post(url, params=None, data=None, headers=None, cookies=None, files=None,
@@ -602,6 +1493,447 @@ def post(url, params=None, data=None, headers=None, cookies=None, files=None,
                    timeout, allow_redirects, stream)
 
 
+def imap(requests, max_workers=4, timeout=60, stream=False):
+    """Make ``requests`` concurrently. Yield responses in order.
+
+    .. versionadded:: 1.38
+
+    Each request is either a URL to GET or a :class:`dict` of keyword
+    arguments for :func:`request`. The ``method`` key defaults to
+    ``GET``, and GET requests follow redirects, as with :func:`get`.
+
+    Requests are made on a pool of ``max_workers`` threads. Responses
+    are yielded in the same order as ``requests`` as soon as they are
+    available, so you can start processing the first response while
+    later ones are still loading.
+
+    If a request raises an exception (e.g. :class:`urllib2.URLError`
+    if the server can't be reached), the exception is raised in place
+    of the response.
+
+    The worker threads are daemon threads. If the iterator is closed
+    (or garbage-collected) before it is exhausted, requests that
+    haven't started are cancelled, and responses that haven't been
+    yielded are closed. Requests in progress are left to finish.
+
+    :param requests: URLs and/or mappings of request arguments
+    :type requests: iterable
+    :param max_workers: maximum number of concurrent requests
+    :type max_workers: int
+    :param timeout: default connection timeout in seconds
+    :type timeout: int
+    :param stream: default for ``stream`` argument of :func:`request`
+    :type stream: bool
+    :returns: iterator of :class:`Response`
+
+    """
+    requests = list(requests)
+    results = [None] * len(requests)
+    done = [threading.Event() for _ in requests]
+    cancelled = threading.Event()
+    jobs = Queue.Queue()
+    for i, spec in enumerate(requests):
+        jobs.put((i, spec))
+
+    def worker():
+        while not cancelled.is_set():
+            try:
+                i, spec = jobs.get_nowait()
+            except Queue.Empty:
+                return
+
+            kwargs = {'method': 'GET', 'timeout': timeout, 'stream': stream}
+            if isinstance(spec, basestring):
+                kwargs['url'] = spec
+            else:
+                kwargs.update(spec)
+            kwargs.setdefault('allow_redirects', kwargs['method'] == 'GET')
+
+            try:
+                results[i] = (request(**kwargs), None)
+            except Exception:
+                results[i] = (None, sys.exc_info())
+            done[i].set()
+
+    for _ in range(min(max_workers, len(requests))):
+        t = threading.Thread(target=worker)
+        t.daemon = True
+        t.start()
+
+    try:
+        for i in range(len(requests)):
+            done[i].wait()
+            r, exc_info = results[i]
+            results[i] = None
+            if exc_info is not None:
+                raise exc_info[0], exc_info[1], exc_info[2]
+            yield r
+    finally:
+        # Stop workers starting new requests and release connections
+        # of responses that won't be used
+        cancelled.set()
+        for result in results:
+            if result is not None and result[0] is not None \
+                    and result[0].raw is not None:
+                result[0].raw.close()
+
+
+def map(requests, max_workers=4, timeout=60, stream=False):
+    """Make ``requests`` concurrently. Return list of responses.
+
+    .. versionadded:: 1.38
+
+    Arguments as for :func:`imap`.
+
+    :returns: list of :class:`Response` in the same order as ``requests``
+
+    """
+    return list(imap(requests, max_workers, timeout, stream))
+
+
+def download(url, filepath, digest=None, algorithm='sha256', headers=None,
+             timeout=60, retries=3, chunk_size=65536, progress=None):
+    """Download ``url`` to ``filepath``, resuming if interrupted.
+
+    .. versionadded:: 1.38
+
+    Data are written to ``filepath`` + ``.part``, which is renamed to
+    ``filepath`` when the download is complete. If the connection
+    fails, or a ``.part`` file is left by an earlier call, the download
+    is resumed with an HTTP ``Range`` request. If the server doesn't
+    support ranges, the download starts again from the beginning.
+
+    The response's ``ETag`` or ``Last-Modified`` header is saved to
+    ``filepath`` + ``.part.validator`` and sent as ``If-Range`` when
+    resuming, so the server sends the whole file if it has changed.
+    If the server sent neither header, the partial file can't be
+    validated, and the download starts again from the beginning.
+
+    Connection errors and server (5xx) errors are retried. Other
+    HTTP errors are raised immediately.
+
+    Data are hashed as they are written. If ``digest`` is given, the
+    download is checked against it.
+
+    :param url: URL to download
+    :type url: unicode
+    :param filepath: Path to save data to
+    :type filepath: unicode
+    :param digest: Expected hex digest of data
+    :type digest: str
+    :param algorithm: Name of :mod:`hashlib` algorithm
+    :type algorithm: str
+    :param headers: HTTP headers
+    :type headers: dict
+    :param timeout: connection timeout limit in seconds
+    :type timeout: int
+    :param retries: Number of times to retry a failed connection
+    :type retries: int
+    :param chunk_size: Number of bytes to read at a time
+    :type chunk_size: int
+    :param progress: Called with number of bytes downloaded and total
+        size (or ``None`` if unknown) after each chunk
+    :type progress: callable
+    :raises ValueError: if data don't match ``digest``
+    :returns: Hex digest of downloaded data
+    :rtype: str
+
+    """
+    partial = filepath + '.part'
+    validator_file = partial + '.validator'
+    hasher = hashlib.new(algorithm)
+    size = 0
+    validator = None
+
+    if os.path.exists(validator_file):
+        with open(validator_file) as fp:
+            validator = fp.read().strip() or None
+
+    # Hash data from an earlier attempt
+    if validator and os.path.exists(partial):
+        with open(partial, 'rb') as fp:
+            while True:
+                chunk = fp.read(chunk_size)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                size += len(chunk)
+
+    failures = 0
+    while True:
+        hdrs = CaseInsensitiveDictionary(headers)
+        # Range is meaningless for compressed content
+        hdrs['accept-encoding'] = 'identity'
+        if size and validator:
+            hdrs['range'] = 'bytes={0}-'.format(size)
+            hdrs['if-range'] = validator
+        else:  # partial file can't be validated
+            hasher = hashlib.new(algorithm)
+            size = 0
+
+        r = None
+        try:
+            r = get(url, headers=hdrs, timeout=timeout, stream=True)
+            start, total = _content_range(r)
+
+            if r.status_code == 416:
+                # Partial file is already complete
+                if total == size:
+                    break
+
+                # Partial file isn't from this resource. Start again.
+                hasher = hashlib.new(algorithm)
+                size = 0
+                raise urllib2.URLError('range not satisfiable')
+
+            r.raise_for_status()
+
+            if start != size:  # server ignored Range or file changed
+                hasher = hashlib.new(algorithm)
+                size = 0
+
+            if not size:
+                validator = _validator(r)
+                if validator:
+                    with open(validator_file, 'wb') as fp:
+                        fp.write(validator)
+                elif os.path.exists(validator_file):
+                    os.unlink(validator_file)
+
+            with open(partial, 'ab' if size else 'wb') as fp:
+                for chunk in r.iter_buffers(chunk_size):
+                    fp.write(chunk)
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    if progress:
+                        progress(size, total)
+
+            if total is not None and size < total:
+                raise httplib.IncompleteRead(b'', total - size)
+
+            break
+
+        except urllib2.HTTPError as err:
+            # Only server errors may go away
+            failures += 1
+            if err.code < 500 or failures > retries:
+                raise
+        except (socket.error, httplib.HTTPException, urllib2.URLError):
+            failures += 1
+            if failures > retries:
+                raise
+        finally:
+            if r is not None and r.raw is not None:
+                r.raw.close()
+
+    if os.path.exists(validator_file):
+        os.unlink(validator_file)
+
+    hexdigest = hasher.hexdigest()
+    if digest and hexdigest != digest.lower():
+        os.unlink(partial)
+        raise ValueError('{0} digest of {1} is {2}, expected {3}'.format(
+                         algorithm, url, hexdigest, digest))
+
+    os.rename(partial, filepath)
+    return hexdigest
+
+
+def _validator(r):
+    """Return value for ``If-Range`` header from response ``r``.
+
+    Weak ETags may not be used in ``If-Range``, so ``Last-Modified``
+    is used instead.
+
+    :param r: Response to a download request
+    :type r: :class:`Response`
+    :returns: ``ETag`` or ``Last-Modified`` header or ``None``
+    :rtype: str
+
+    """
+    etag = r.headers.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return r.headers.get('last-modified') or None
+
+
+def _content_range(r):
+    """Return start offset and total size of content in response ``r``.
+
+    :param r: Response to a (possibly) ``Range`` request
+    :type r: :class:`Response`
+    :returns: ``(start, total)``. ``total`` is ``None`` if unknown.
+    :rtype: 2-tuple ``(int, int)``
+
+    """
+    headers = r.headers
+    if r.error is not None:
+        headers = CaseInsensitiveDictionary(dict(r.error.info().items()))
+
+    # e.g. "bytes 100-999/1000" or "bytes */1000"
+    m = re.match(r'bytes\s+(\d+|\*)(?:-\d+)?/(\d+|\*)',
+                 headers.get('content-range', ''))
+
+    if r.status_code == 206 and m:
+        start, total = m.groups()
+        return int(start), int(total) if total.isdigit() else None
+
+    if r.status_code == 416:
+        if m and m.group(2).isdigit():
+            return 0, int(m.group(2))
+        return 0, None
+
+    length = headers.get('content-length', '')
+    return 0, int(length) if length.isdigit() else None
+
+
+class MultipartEncoder(object):
+    """File-like ``multipart/form-data`` request body.
+
+    .. versionadded:: 1.38
+
+    The body is generated as it is read. File contents may be strings
+    or open files, which are read in chunks, so uploading a large file
+    doesn't require loading it into memory. The length of the body is
+    calculated from the file sizes up front, so the request is sent
+    with a ``Content-Length`` header.
+
+    Arguments are the same as for :func:`encode_multipart_formdata`.
+
+    Attributes:
+        boundary (str): Multipart boundary.
+        headers (dict): ``Content-Type`` and ``Content-Length`` headers
+            for body.
+        len (int): Length of body in bytes.
+
+    """
+
+    def __init__(self, fields, files, chunk_size=65536):
+        """Create new `MultipartEncoder`."""
+        self.boundary = '-----' + ''.join(random.choice(BOUNDARY_CHARS)
+                                          for i in range(30))
+        self.chunk_size = chunk_size
+        # Strings and `(file, offset, size)` tuples
+        self._parts = []
+        self._index = 0  # current part
+        self._pos = 0  # position in current part
+
+        # Normal form fields
+        for (name, value) in fields.items():
+            if isinstance(name, unicode):
+                name = name.encode('utf-8')
+            if isinstance(value, unicode):
+                value = value.encode('utf-8')
+            self._parts.append(
+                '--{0}\r\nContent-Disposition: form-data; '
+                'name="{1}"\r\n\r\n'.format(self.boundary, name))
+            self._add_content(value)
+
+        # Files to upload
+        for name, d in files.items():
+            filename = d[u'filename']
+            content = d[u'content']
+            if u'mimetype' in d:
+                mimetype = d[u'mimetype']
+            else:
+                mimetype = (mimetypes.guess_type(filename)[0] or
+                            'application/octet-stream')
+            if isinstance(name, unicode):
+                name = name.encode('utf-8')
+            if isinstance(filename, unicode):
+                filename = filename.encode('utf-8')
+            if isinstance(mimetype, unicode):
+                mimetype = mimetype.encode('utf-8')
+            self._parts.append(
+                '--{0}\r\nContent-Disposition: form-data; '
+                'name="{1}"; filename="{2}"\r\n'
+                'Content-Type: {3}\r\n\r\n'.format(self.boundary, name,
+                                                   filename, mimetype))
+            self._add_content(content)
+
+        self._parts.append('--{0}--\r\n'.format(self.boundary))
+
+        self.len = sum(len(p) if isinstance(p, str) else p[2]
+                       for p in self._parts)
+        self.headers = {
+            'Content-Type': ('multipart/form-data; '
+                             'boundary={0}'.format(self.boundary)),
+            'Content-Length': str(self.len),
+        }
+
+    def _add_content(self, content):
+        """Add field or file ``content`` followed by a line break."""
+        if hasattr(content, 'read'):
+            offset = content.tell()
+            try:
+                size = os.fstat(content.fileno()).st_size - offset
+            except (AttributeError, IOError):  # not a real file
+                content.seek(0, os.SEEK_END)
+                size = content.tell() - offset
+                content.seek(offset)
+            self._parts.append((content, offset, size))
+        else:
+            self._parts.append(content)
+
+        self._parts.append('\r\n')
+
+    def __len__(self):
+        """Length of body in bytes."""
+        return self.len
+
+    def read(self, size=-1):
+        """Read up to ``size`` bytes of body.
+
+        :param size: Number of bytes to read. Read whole body if
+            negative.
+        :type size: int
+        :returns: Next part of body or an empty string at the end.
+        :rtype: str
+
+        """
+        if size < 0:
+            size = self.len
+
+        output = []
+        while size > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, str):
+                data = part[self._pos:self._pos + size]
+                remaining = len(part) - self._pos
+            else:
+                fp, offset, length = part
+                if self._pos == 0:
+                    fp.seek(offset)
+                data = fp.read(min(size, length - self._pos, self.chunk_size))
+                if not data:
+                    raise IOError('file shorter than expected: '
+                                  '{0!r}'.format(fp))
+                remaining = length - self._pos
+
+            output.append(data)
+            size -= len(data)
+            if len(data) < remaining:
+                self._pos += len(data)
+            else:
+                self._index += 1
+                self._pos = 0
+
+        return b''.join(output)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """Rewind body to beginning.
+
+        Only rewinding (``seek(0)``) is supported.
+
+        :raises IOError: if ``offset`` or ``whence`` isn't 0
+        """
+        if offset != 0 or whence != os.SEEK_SET:
+            raise IOError('MultipartEncoder can only be rewound')
+
+        self._index = 0
+        self._pos = 0
+
+
 def encode_multipart_formdata(fields, files):
     """Encode form data (``fields``) and ``files`` for POST request.
 
@@ -626,60 +1958,10 @@ def encode_multipart_formdata(fields, files):
       be used to guess the mimetype, or ``application/octet-stream``
       will be used.
 
-    """
-    def get_content_type(filename):
-        """Return or guess mimetype of ``filename``.
+    .. versionchanged:: 1.38
 
-        :param filename: filename of file
-        :type filename: unicode/str
-        :returns: mime-type, e.g. ``text/html``
-        :rtype: str
+    Use :class:`MultipartEncoder` to stream the body instead.
 
-        """
-        return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
-
-    boundary = '-----' + ''.join(random.choice(BOUNDARY_CHARS)
-                                 for i in range(30))
-    CRLF = '\r\n'
-    output = []
-
-    # Normal form fields
-    for (name, value) in fields.items():
-        if isinstance(name, unicode):
-            name = name.encode('utf-8')
-        if isinstance(value, unicode):
-            value = value.encode('utf-8')
-        output.append('--' + boundary)
-        output.append('Content-Disposition: form-data; name="%s"' % name)
-        output.append('')
-        output.append(value)
-
-    # Files to upload
-    for name, d in files.items():
-        filename = d[u'filename']
-        content = d[u'content']
-        if u'mimetype' in d:
-            mimetype = d[u'mimetype']
-        else:
-            mimetype = get_content_type(filename)
-        if isinstance(name, unicode):
-            name = name.encode('utf-8')
-        if isinstance(filename, unicode):
-            filename = filename.encode('utf-8')
-        if isinstance(mimetype, unicode):
-            mimetype = mimetype.encode('utf-8')
-        output.append('--' + boundary)
-        output.append('Content-Disposition: form-data; '
-                      'name="%s"; filename="%s"' % (name, filename))
-        output.append('Content-Type: %s' % mimetype)
-        output.append('')
-        output.append(content)
-
-    output.append('--' + boundary + '--')
-    output.append('')
-    body = CRLF.join(output)
-    headers = {
-        'Content-Type': 'multipart/form-data; boundary=%s' % boundary,
-        'Content-Length': str(len(body)),
-    }
-    return (headers, body)
+    """
+    encoder = MultipartEncoder(fields, files)
+    return (encoder.headers, encoder.read())
@@ -22,8 +22,11 @@ up your Python script to best utilise the :class:`Workflow` object.
 from __future__ import print_function, unicode_literals
 
 import binascii
+from contextlib import contextmanager
 import cPickle
 from copy import deepcopy
+from cStringIO import StringIO
+import errno
 import json
 import logging
 import logging.handlers
@@ -48,6 +51,7 @@ from util import AcquisitionError  # noqa: F401
 from util import (
     atomic_writer,
     LockFile,
+    QueueHandler,
     uninterruptible,
 )
 
@@ -437,6 +441,18 @@ MATCH_ALLCHARS = 64
 MATCH_ALL = 127
 
 
+####################################################################
+# Used by `Workflow.store_data` and `Workflow.stored_data`
+####################################################################
+
+# First field of datastore file header
+DATASTORE_MAGIC = b'alfred-workflow-data'
+# Version of datastore file format
+DATASTORE_VERSION = 1
+# File extension of datastores
+DATASTORE_EXTENSION = 'alfred-workflow-data'
+
+
 ####################################################################
 # Used by `Workflow.check_update`
 ####################################################################
@@ -799,6 +815,49 @@ class Item(object):
         return root
 
 
+class XMLFeedbackWriter(object):
+    """Writes Alfred XML feedback one item at a time.
+
+    .. versionadded:: 1.38
+
+    Used by :meth:`Workflow.send_feedback`. The ``<items>`` element is
+    opened when the first item is written and closed by :meth:`close`,
+    so the whole document never has to be held in memory.
+
+    Args:
+        fp (file): File-like object to write feedback to.
+
+    """
+
+    def __init__(self, fp):
+        """Create new :class:`XMLFeedbackWriter`."""
+        self.fp = fp
+        self.started = False
+
+    def _start(self):
+        """Write XML header and open ``<items>`` element."""
+        if not self.started:
+            self.fp.write('<?xml version="1.0" encoding="utf-8"?>\n<items>')
+            self.started = True
+
+    def write_item(self, item):
+        """Write :class:`Item` ``item``."""
+        self._start()
+        self.fp.write(ET.tostring(item.elem))
+
+    def close(self, extra=None):
+        """Close ``<items>`` element and flush output.
+
+        Args:
+            extra (dict, optional): Ignored. XML feedback has no
+                top-level fields besides items.
+
+        """
+        self._start()
+        self.fp.write('</items>')
+        self.fp.flush()
+
+
 class Settings(dict):
     """A dictionary that saves itself when changed.
 
@@ -806,10 +865,22 @@ class Settings(dict):
     at ``filepath``. If the file does not exist, the dictionary
     (and settings file) will be initialised with ``defaults``.
 
+    .. versionchanged:: 1.38
+
+    Use :meth:`transaction` to save several changes in one write.
+    If ``skip_unchanged`` is ``True`` (the default), the settings file
+    is only rewritten if its contents would change or the file has
+    been changed by another process.
+
+    Settings are read without taking the lock. Writes replace the file
+    atomically, so a reader always sees a complete file.
+
     :param filepath: where to save the settings
     :type filepath: :class:`unicode`
     :param defaults: dict of default settings
     :type defaults: :class:`dict`
+    :param skip_unchanged: don't rewrite file if contents are unchanged
+    :type skip_unchanged: ``Boolean``
 
 
     An appropriate instance is provided by :class:`Workflow` instances at
@@ -817,27 +888,38 @@ class Settings(dict):
 
     """
 
-    def __init__(self, filepath, defaults=None):
+    def __init__(self, filepath, defaults=None, skip_unchanged=True):
         """Create new :class:`Settings` object."""
         super(Settings, self).__init__()
         self._filepath = filepath
         self._nosave = False
         self._original = {}
+        self._skip_unchanged = skip_unchanged
+        # Contents and stat of settings file as last read/written
+        self._saved = None
+        self._saved_stat = None
+        # Depth of nested `transaction()` blocks
+        self._transactions = 0
         if os.path.exists(self._filepath):
             self._load()
         elif defaults:
-            for key, val in defaults.items():
-                self[key] = val
-            self.save()  # save default settings
+            with self.transaction():
+                for key, val in defaults.items():
+                    self[key] = val
 
     def _load(self):
         """Load cached settings from JSON file `self._filepath`."""
         data = {}
-        with LockFile(self._filepath, 0.5):
-            with open(self._filepath, 'rb') as fp:
-                data.update(json.load(fp))
+        # Writers replace the file atomically, so it needn't be locked
+        with open(self._filepath, 'rb') as fp:
+            raw = fp.read()
+            stat = self._stat(os.fstat(fp.fileno()))
+
+        data.update(json.loads(raw))
 
         self._original = deepcopy(data)
+        self._saved = raw
+        self._saved_stat = stat
 
         self._nosave = True
         self.update(data)
@@ -850,17 +932,67 @@ class Settings(dict):
         If you're using this class via :attr:`Workflow.settings`, which
         you probably are, ``self._filepath`` will be ``settings.json``
         in your workflow's data directory (see :attr:`~Workflow.datadir`).
+
+        Does nothing within a :meth:`transaction` block. The settings
+        are saved when the outermost block exits.
         """
-        if self._nosave:
+        if self._nosave or self._transactions:
             return
 
         data = {}
         data.update(self)
 
+        raw = json.dumps(data, sort_keys=True, indent=2, encoding='utf-8')
+        # Skip only if the file is still the one last read/written.
+        # Another process may have replaced it since then.
+        if (self._skip_unchanged and raw == self._saved and
+                self._file_stat() == self._saved_stat):
+            return
+
         with LockFile(self._filepath, 0.5):
             with atomic_writer(self._filepath, 'wb') as fp:
-                json.dump(data, fp, sort_keys=True, indent=2,
-                          encoding='utf-8')
+                fp.write(raw)
+            self._saved_stat = self._file_stat()
+
+        self._saved = raw
+
+    @staticmethod
+    def _stat(st):
+        """Return values identifying a version of the settings file.
+
+        :meth:`save` replaces the file, so its inode changes on each write.
+
+        """
+        return (st.st_ino, st.st_mtime, st.st_size)
+
+    def _file_stat(self):
+        """Return :meth:`_stat` of settings file or ``None``."""
+        try:
+            return self._stat(os.stat(self._filepath))
+        except OSError:
+            return None
+
+    @contextmanager
+    def transaction(self):
+        """Context manager to save several changes in one write.
+
+        .. versionadded:: 1.38
+
+        Changes made within the block are saved when it exits (even if
+        an exception is raised). Blocks may be nested, in which case
+        the settings are saved when the outermost block exits.
+
+        >>> with wf.settings.transaction():
+        >>>     wf.settings['username'] = 'deanishe'
+        >>>     wf.settings['count'] = 20
+
+        """
+        self._transactions += 1
+        try:
+            yield self
+        finally:
+            self._transactions -= 1
+            self.save()
 
     # dict methods
     def __setitem__(self, key, value):
@@ -929,6 +1061,15 @@ class Workflow(object):
         also be opened directly in a web browser with the ``workflow:help``
         :ref:`magic argument <magic-arguments>`.
     :type help_url: :class:`unicode` or :class:`str`
+    :param stream_feedback: write each item to STDOUT as soon as the
+        next one is added, instead of holding all items until
+        :meth:`send_feedback` is called. Items can only be modified
+        until the next item is added.
+    :type stream_feedback: :class:`Boolean`
+    :param async_logging: write log messages in a background thread
+        and open the log file only when the first message is logged.
+        See :attr:`logger`.
+    :type async_logging: :class:`Boolean`
 
     """
 
@@ -936,10 +1077,13 @@ class Workflow(object):
     # won't want to change this
     item_class = Item
 
+    # Which class to use to write feedback
+    writer_class = XMLFeedbackWriter
+
     def __init__(self, default_settings=None, update_settings=None,
                  input_encoding='utf-8', normalization='NFC',
                  capture_args=True, libraries=None,
-                 help_url=None):
+                 help_url=None, stream_feedback=False, async_logging=False):
         """Create new :class:`Workflow` object."""
         self._default_settings = default_settings or {}
         self._update_settings = update_settings or {}
@@ -947,6 +1091,8 @@ class Workflow(object):
         self._normalizsation = normalization
         self._capture_args = capture_args
         self.help_url = help_url
+        self.stream_feedback = stream_feedback
+        self.async_logging = async_logging
         self._workflowdir = None
         self._settings_path = None
         self._settings = None
@@ -959,6 +1105,7 @@ class Workflow(object):
         self._info_loaded = False
         self._logger = None
         self._items = []
+        self._writer = None
         self._alfred_env = None
         # Version number of the workflow
         self._version = UNSET
@@ -1387,6 +1534,15 @@ class Workflow(object):
 
         Use :meth:`open_log` to open the log file in Console.
 
+        .. versionchanged:: 1.38
+
+        If :class:`Workflow` was created with ``async_logging=True``,
+        messages are formatted and written in a background thread
+        (see :class:`~workflow.util.QueueHandler`) and the log file
+        isn't opened until the first message is written. Use
+        :class:`~workflow.util.LogSummary` to log loops over many
+        items.
+
         :returns: an initialised :class:`~logging.Logger`
 
         """
@@ -1409,13 +1565,18 @@ class Workflow(object):
             logfile = logging.handlers.RotatingFileHandler(
                 self.logfile,
                 maxBytes=1024 * 1024,
-                backupCount=1)
+                backupCount=1,
+                delay=self.async_logging)
             logfile.setFormatter(fmt)
-            logger.addHandler(logfile)
 
             console = logging.StreamHandler()
             console.setFormatter(fmt)
-            logger.addHandler(console)
+
+            if self.async_logging:
+                logger.addHandler(QueueHandler([logfile, console]))
+            else:
+                logger.addHandler(logfile)
+                logger.addHandler(console)
 
         if self.debugging:
             logger.setLevel(logging.DEBUG)
@@ -1555,25 +1716,30 @@ class Workflow(object):
 
         self._data_serializer = serializer_name
 
-    def stored_data(self, name):
-        """Retrieve data from data directory.
+    def _datastore_path(self, name):
+        """Path to datastore ``name``."""
+        return self.datafile('{0}.{1}'.format(name, DATASTORE_EXTENSION))
 
-        Returns ``None`` if there are no data stored under ``name``.
+    def _load_legacy_datastore(self, name):
+        """Load datastore ``name`` saved by version 1.37 or earlier.
 
-        .. versionadded:: 1.8
+        Older versions saved the name of the serializer in one file
+        and the data in another.
 
         :param name: name of datastore
+        :returns: ``(serializer_name, data)`` or ``None``
 
         """
         metadata_path = self.datafile('.{0}.alfred-workflow'.format(name))
 
-        if not os.path.exists(metadata_path):
-            self.logger.debug('no data stored for `%s`', name)
+        try:
+            with open(metadata_path, 'rb') as file_obj:
+                serializer_name = file_obj.read().strip()
+        except IOError as err:
+            if err.errno != errno.ENOENT:
+                raise
             return None
 
-        with open(metadata_path, 'rb') as file_obj:
-            serializer_name = file_obj.read().strip()
-
         serializer = manager.serializer(serializer_name)
 
         if serializer is None:
@@ -1582,21 +1748,99 @@ class Workflow(object):
                 'serializer with `manager.register()` '
                 'to load this data.'.format(serializer_name))
 
-        self.logger.debug('data `%s` stored as `%s`', name, serializer_name)
-
-        filename = '{0}.{1}'.format(name, serializer_name)
-        data_path = self.datafile(filename)
+        data_path = self.datafile('{0}.{1}'.format(name, serializer_name))
 
         if not os.path.exists(data_path):
-            self.logger.debug('no data stored: %s', name)
-            if os.path.exists(metadata_path):
-                os.unlink(metadata_path)
-
+            os.unlink(metadata_path)
             return None
 
         with open(data_path, 'rb') as file_obj:
             data = serializer.load(file_obj)
 
+        return serializer_name, data
+
+    def _delete_legacy_datastore(self, name):
+        """Delete datastore ``name`` saved by version 1.37 or earlier."""
+        metadata_path = self.datafile('.{0}.alfred-workflow'.format(name))
+
+        try:
+            with open(metadata_path, 'rb') as file_obj:
+                serializer_name = file_obj.read().strip()
+        except IOError as err:
+            if err.errno != errno.ENOENT:
+                raise
+            return
+
+        for path in (self.datafile('{0}.{1}'.format(name, serializer_name)),
+                     metadata_path):
+            if os.path.exists(path):
+                os.unlink(path)
+                self.logger.debug('deleted data file: %s', path)
+
+    def stored_data(self, name):
+        """Retrieve data from data directory.
+
+        Returns ``None`` if there are no data stored under ``name``.
+
+        .. versionadded:: 1.8
+
+        .. versionchanged:: 1.38
+
+        Data are stored in a single file with a header containing
+        the name of the serializer and a checksum. Datastores saved
+        by earlier versions are converted to the new format.
+
+        :param name: name of datastore
+
+        """
+        data_path = self._datastore_path(name)
+
+        try:
+            with open(data_path, 'rb') as file_obj:
+                raw = file_obj.read()
+        except IOError as err:
+            if err.errno != errno.ENOENT:
+                raise
+
+            legacy = self._load_legacy_datastore(name)
+            if legacy is None:
+                self.logger.debug('no data stored for `%s`', name)
+                return None
+
+            serializer_name, data = legacy
+            self.logger.debug('converting datastore `%s` to new format',
+                              name)
+            self.store_data(name, data, serializer_name)
+            self._delete_legacy_datastore(name)
+            return data
+
+        i = raw.find(b'\n')
+        header = raw[:i].split(b' ')
+        if len(header) != 4 or header[0] != DATASTORE_MAGIC:
+            raise ValueError('Invalid datastore: {0}'.format(data_path))
+
+        _, version, serializer_name, checksum = header
+        if version != str(DATASTORE_VERSION):
+            raise ValueError('Unsupported datastore version {0}: {1}'.format(
+                             version, data_path))
+
+        payload = raw[i + 1:]
+
+        if int(checksum, 16) != binascii.crc32(payload) & 0xffffffff:
+            raise ValueError('Corrupt datastore: {0}'.format(data_path))
+
+        serializer = manager.serializer(serializer_name)
+
+        if serializer is None:
+            raise ValueError(
+                'Unknown serializer `{0}`. Register a corresponding '
+                'serializer with `manager.register()` '
+                'to load this data.'.format(serializer_name))
+
+        self.logger.debug('data `%s` stored as `%s`', name, serializer_name)
+
+        data = serializer.load(StringIO(payload))
+
         self.logger.debug('stored data loaded: %s', data_path)
 
         return data
@@ -1630,18 +1874,10 @@ class Workflow(object):
 
         serializer_name = serializer or self.data_serializer
 
-        # In order for `stored_data()` to be able to load data stored with
-        # an arbitrary serializer, yet still have meaningful file extensions,
-        # the format (i.e. extension) is saved to an accompanying file
-        metadata_path = self.datafile('.{0}.alfred-workflow'.format(name))
-        filename = '{0}.{1}'.format(name, serializer_name)
-        data_path = self.datafile(filename)
-
-        if data_path == self.settings_path:
-            raise ValueError(
-                'Cannot save data to' +
-                '`{0}` with format `{1}`. '.format(name, serializer_name) +
-                "This would overwrite Alfred-Workflow's settings file.")
+        # The serializer name is saved in the file header, so that
+        # `stored_data()` can load data stored with an arbitrary
+        # serializer
+        data_path = self._datastore_path(name)
 
         serializer = manager.serializer(serializer_name)
 
@@ -1651,45 +1887,73 @@ class Workflow(object):
                 '`manager.register()` first.'.format(serializer_name))
 
         if data is None:  # Delete cached data
-            delete_paths((metadata_path, data_path))
+            delete_paths((data_path,))
+            self._delete_legacy_datastore(name)
             return
 
+        buf = StringIO()
+        serializer.dump(data, buf)
+        payload = buf.getvalue()
+
+        header = b'{0} {1} {2} {3:08x}\n'.format(
+            DATASTORE_MAGIC, DATASTORE_VERSION, serializer_name,
+            binascii.crc32(payload) & 0xffffffff)
+
         # Ensure write is not interrupted by SIGTERM
         @uninterruptible
         def _store():
-            # Save file extension
-            with atomic_writer(metadata_path, 'wb') as file_obj:
-                file_obj.write(serializer_name)
-
             with atomic_writer(data_path, 'wb') as file_obj:
-                serializer.dump(data, file_obj)
+                file_obj.write(header)
+                file_obj.write(payload)
 
         _store()
 
         self.logger.debug('saved data: %s', data_path)
 
-    def cached_data(self, name, data_func=None, max_age=60):
+    def cached_data(self, name, data_func=None, max_age=60, stale_ok=False,
+                    refresh=None):
         """Return cached data if younger than ``max_age`` seconds.
 
         Retrieve data from cache or re-generate and re-cache data if
         stale/non-existant. If ``max_age`` is 0, return cached data no
         matter how old.
 
+        .. versionchanged:: 1.38
+
+        If ``stale_ok`` is ``True``, stale data are returned immediately
+        and the command ``refresh`` is run in the background (via
+        :func:`~workflow.background.run_in_background`) to update the
+        cache. ``refresh`` should call :meth:`cache_data` with the same
+        ``name``. Only one refresh job per cache ``name`` runs at a time.
+        ``data_func`` is still called if there are no cached data at all.
+
         :param name: name of datastore
         :param data_func: function to (re-)generate data.
         :type data_func: ``callable``
         :param max_age: maximum age of cached data in seconds
         :type max_age: ``int``
+        :param stale_ok: return stale data and refresh in the background
+        :type stale_ok: ``Boolean``
+        :param refresh: command to update the cache. Required if
+            ``stale_ok`` is ``True``.
+        :type refresh: ``list``
         :returns: cached data, return value of ``data_func`` or ``None``
             if ``data_func`` is not set
 
         """
+        if stale_ok and not refresh:
+            raise ValueError('`refresh` command required with `stale_ok`')
+
         serializer = manager.serializer(self.cache_serializer)
 
         cache_path = self.cachefile('%s.%s' % (name, self.cache_serializer))
         age = self.cached_data_age(name)
 
-        if (age < max_age or max_age == 0) and os.path.exists(cache_path):
+        fresh = age < max_age or max_age == 0
+        if (fresh or stale_ok) and os.path.exists(cache_path):
+
+            if not fresh:
+                self.refresh_cache(name, refresh)
 
             with open(cache_path, 'rb') as file_obj:
                 self.logger.debug('loading cached data: %s', cache_path)
@@ -1703,6 +1967,25 @@ class Workflow(object):
 
         return data
 
+    def refresh_cache(self, name, cmd):
+        """Update cache ``name`` by running ``cmd`` in the background.
+
+        .. versionadded:: 1.38
+
+        Does nothing if a refresh job for ``name`` is already running.
+        ``cmd`` should call :meth:`cache_data` with the same ``name``.
+
+        :param name: name of datastore
+        :param cmd: command that re-caches the data
+        :type cmd: ``list``
+
+        """
+        from background import run_in_background
+
+        self.logger.debug('cache `%s` is stale, refreshing in background',
+                          name)
+        run_in_background('__workflow_refresh-' + name, cmd)
+
     def cache_data(self, name, data):
         """Save ``data`` to cache under ``name``.
 
@@ -2170,17 +2453,63 @@ class Workflow(object):
         item = self.item_class(title, subtitle, modifier_subtitles, arg,
                                autocomplete, valid, uid, icon, icontype, type,
                                largetext, copytext, quicklookurl)
-        self._items.append(item)
+        self._append_item(item)
         return item
 
+    def _append_item(self, item):
+        """Add ``item`` to feedback.
+
+        If :attr:`stream_feedback` is set, the previous item is written
+        to STDOUT, so only the most recent item is kept in memory.
+
+        """
+        if self.stream_feedback and self._items:
+            self._feedback_writer.write_item(self._items.pop())
+
+        self._items.append(item)
+
+    @property
+    def _feedback_writer(self):
+        """:attr:`writer_class` instance for current feedback."""
+        if self._writer is None:
+            self._writer = self.writer_class(sys.stdout)
+        return self._writer
+
+    def _feedback_extra(self):
+        """Top-level feedback fields other than items."""
+        return None
+
     def send_feedback(self):
-        """Print stored items to console/Alfred as XML."""
-        root = ET.Element('items')
+        """Print stored items to console/Alfred.
+
+        Feedback is written by :attr:`writer_class` (XML for
+        :class:`Workflow`, JSON for :class:`~workflow.Workflow3`).
+
+        """
+        writer = self._feedback_writer
+        for item in self._items:
+            writer.write_item(item)
+        writer.close(self._feedback_extra())
+        self._writer = None
+
+    def render_feedback(self):
+        """Return stored items formatted as by :meth:`send_feedback`.
+
+        .. versionadded:: 1.38
+
+        Use this instead of :meth:`send_feedback` if you want to save
+        the feedback as well as print it.
+
+        :returns: XML or JSON feedback
+        :rtype: ``str``
+
+        """
+        buf = StringIO()
+        writer = self.writer_class(buf)
         for item in self._items:
-            root.append(item.elem)
-        sys.stdout.write('<?xml version="1.0" encoding="utf-8"?>\n')
-        sys.stdout.write(ET.tostring(root).encode('utf-8'))
-        sys.stdout.flush()
+            writer.write_item(item)
+        writer.close(self._feedback_extra())
+        return buf.getvalue()
 
     ####################################################################
     # Updating methods
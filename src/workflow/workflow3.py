@@ -27,7 +27,6 @@ from __future__ import print_function, unicode_literals, absolute_import
 
 import json
 import os
-import sys
 
 from .workflow import ICON_WARNING, Workflow
 
@@ -109,6 +108,54 @@ class Variables(dict):
         return unicode(self).encode('utf-8')
 
 
+def _lazy_dict(slot, doc):
+    """Return a property backed by ``slot`` that creates a `dict` on demand.
+
+    Used by :class:`Item3` and :class:`Modifier` so that they only
+    allocate containers that are actually used.
+
+    Args:
+        slot (str): Name of attribute that holds the `dict` (or `None`).
+        doc (unicode): Docstring for property.
+
+    Returns:
+        property: Property that returns the `dict`.
+
+    """
+    def fget(self):
+        d = getattr(self, slot)
+        if d is None:
+            d = {}
+            setattr(self, slot, d)
+        return d
+
+    def fset(self, value):
+        setattr(self, slot, value)
+
+    return property(fget, fset, doc=doc)
+
+
+def _icon_obj(icon, icontype):
+    """Return `icon` object for feedback (may be empty).
+
+    Args:
+        icon (unicode): Filepath/UTI of icon or `None`.
+        icontype (unicode): Type of icon or `None`.
+
+    Returns:
+        dict: Mapping for item `icon`.
+
+    """
+    o = {}
+    if icon is not None:
+        o['path'] = icon
+
+    if icontype is not None:
+        o['type'] = icontype
+
+    return o
+
+
 class Modifier(object):
     """Modify :class:`Item3` arg/icon/variables when modifier key is pressed.
 
@@ -149,6 +196,15 @@ class Modifier(object):
 
     """
 
+    __slots__ = ('key', 'subtitle', 'arg', 'valid', 'icon', 'icontype',
+                 '_config', '_variables')
+
+    #: Optional attributes copied to feedback if not `None`
+    _fields = ('subtitle', 'arg', 'valid')
+
+    config = _lazy_dict('_config', 'Configuration for downstream element.')
+    variables = _lazy_dict('_variables', 'Workflow variables.')
+
     def __init__(self, key, subtitle=None, arg=None, valid=None, icon=None,
                  icontype=None):
         """Create a new :class:`Modifier`.
@@ -175,8 +231,8 @@ class Modifier(object):
         self.icon = icon
         self.icontype = icontype
 
-        self.config = {}
-        self.variables = {}
+        self._config = None
+        self._variables = None
 
     def setvar(self, name, value):
         """Set a workflow variable for this Item.
@@ -199,7 +255,9 @@ class Modifier(object):
             unicode or ``default``: Value of variable if set or ``default``.
 
         """
-        return self.variables.get(name, default)
+        if not self._variables:
+            return default
+        return self._variables.get(name, default)
 
     @property
     def obj(self):
@@ -211,24 +269,19 @@ class Modifier(object):
         """
         o = {}
 
-        if self.subtitle is not None:
-            o['subtitle'] = self.subtitle
-
-        if self.arg is not None:
-            o['arg'] = self.arg
+        for name in self._fields:
+            value = getattr(self, name)
+            if value is not None:
+                o[name] = value
 
-        if self.valid is not None:
-            o['valid'] = self.valid
+        if self._variables:
+            o['variables'] = self._variables
 
-        if self.variables:
-            o['variables'] = self.variables
-
-        if self.config:
-            o['config'] = self.config
+        if self._config:
+            o['config'] = self._config
 
-        icon = self._icon()
-        if icon:
-            o['icon'] = icon
+        if self.icon is not None or self.icontype is not None:
+            o['icon'] = self._icon()
 
         return o
 
@@ -239,14 +292,7 @@ class Modifier(object):
             dict: Mapping for item `icon` (may be empty).
 
         """
-        icon = {}
-        if self.icon is not None:
-            icon['path'] = self.icon
-
-        if self.icontype is not None:
-            icon['type'] = self.icontype
-
-        return icon
+        return _icon_obj(self.icon, self.icontype)
 
 
 class Item3(object):
@@ -259,8 +305,25 @@ class Item3(object):
     :meth:`Workflow3.add_item() <workflow.Workflow3.add_item>`.
     See :meth:`~workflow.Workflow3.add_item` for details of arguments.
 
+    .. versionchanged:: 1.38
+
+    Uses ``__slots__``, and the :attr:`modifiers`, :attr:`config` and
+    :attr:`variables` dicts are only created when they are accessed.
+
     """
 
+    __slots__ = ('title', 'subtitle', 'arg', 'autocomplete', 'match',
+                 'valid', 'uid', 'icon', 'icontype', 'type', 'quicklookurl',
+                 'largetext', 'copytext', '_modifiers', '_config',
+                 '_variables')
+
+    #: Optional attributes copied to feedback if not `None`
+    _fields = ('arg', 'autocomplete', 'match', 'uid', 'type', 'quicklookurl')
+
+    modifiers = _lazy_dict('_modifiers', 'Modifiers by key.')
+    config = _lazy_dict('_config', 'Configuration for downstream element.')
+    variables = _lazy_dict('_variables', 'Workflow variables.')
+
     def __init__(self, title, subtitle='', arg=None, autocomplete=None,
                  match=None, valid=False, uid=None, icon=None, icontype=None,
                  type=None, largetext=None, copytext=None, quicklookurl=None):
@@ -286,10 +349,9 @@ class Item3(object):
         self.largetext = largetext
         self.copytext = copytext
 
-        self.modifiers = {}
-
-        self.config = {}
-        self.variables = {}
+        self._modifiers = None
+        self._config = None
+        self._variables = None
 
     def setvar(self, name, value):
         """Set a workflow variable for this Item.
@@ -312,7 +374,9 @@ class Item3(object):
             unicode or ``default``: Value of variable if set or ``default``.
 
         """
-        return self.variables.get(name, default)
+        if not self._variables:
+            return default
+        return self._variables.get(name, default)
 
     def add_modifier(self, key, subtitle=None, arg=None, valid=None, icon=None,
                      icontype=None):
@@ -335,7 +399,8 @@ class Item3(object):
         mod = Modifier(key, subtitle, arg, valid, icon, icontype)
 
         # Add Item variables to Modifier
-        mod.variables.update(self.variables)
+        if self._variables:
+            mod.variables.update(self._variables)
 
         self.modifiers[key] = mod
 
@@ -357,43 +422,27 @@ class Item3(object):
         }
 
         # Optional values
-        if self.arg is not None:
-            o['arg'] = self.arg
-
-        if self.autocomplete is not None:
-            o['autocomplete'] = self.autocomplete
-
-        if self.match is not None:
-            o['match'] = self.match
-
-        if self.uid is not None:
-            o['uid'] = self.uid
-
-        if self.type is not None:
-            o['type'] = self.type
+        for name in self._fields:
+            value = getattr(self, name)
+            if value is not None:
+                o[name] = value
 
-        if self.quicklookurl is not None:
-            o['quicklookurl'] = self.quicklookurl
+        if self._variables:
+            o['variables'] = self._variables
 
-        if self.variables:
-            o['variables'] = self.variables
-
-        if self.config:
-            o['config'] = self.config
+        if self._config:
+            o['config'] = self._config
 
         # Largetype and copytext
-        text = self._text()
-        if text:
-            o['text'] = text
+        if self.largetext is not None or self.copytext is not None:
+            o['text'] = self._text()
 
-        icon = self._icon()
-        if icon:
-            o['icon'] = icon
+        if self.icon is not None or self.icontype is not None:
+            o['icon'] = self._icon()
 
         # Modifiers
-        mods = self._modifiers()
-        if mods:
-            o['mods'] = mods
+        if self._modifiers:
+            o['mods'] = self._mods()
 
         return o
 
@@ -404,14 +453,7 @@ class Item3(object):
             dict: Mapping for item `icon` (may be empty).
 
         """
-        icon = {}
-        if self.icon is not None:
-            icon['path'] = self.icon
-
-        if self.icontype is not None:
-            icon['type'] = self.icontype
-
-        return icon
+        return _icon_obj(self.icon, self.icontype)
 
     def _text(self):
         """Return `largetext` and `copytext` object for item.
@@ -429,16 +471,16 @@ class Item3(object):
 
         return text
 
-    def _modifiers(self):
+    def _mods(self):
         """Build `mods` dictionary for JSON feedback.
 
         Returns:
             dict: Modifier mapping or `None`.
 
         """
-        if self.modifiers:
+        if self._modifiers:
             mods = {}
-            for k, mod in self.modifiers.items():
+            for k, mod in self._modifiers.items():
                 mods[k] = mod.obj
 
             return mods
@@ -446,6 +488,61 @@ class Item3(object):
         return None
 
 
+class JSONFeedbackWriter(object):
+    """Writes Alfred JSON feedback one item at a time.
+
+    .. versionadded:: 1.38
+
+    Used by :meth:`Workflow3.send_feedback`. Each item is serialized
+    and written separately (with compact separators), so the whole
+    feedback never has to be held in memory.
+
+    Args:
+        fp (file): File-like object to write feedback to.
+
+    """
+
+    separators = (',', ':')
+
+    def __init__(self, fp):
+        """Create new :class:`JSONFeedbackWriter`."""
+        self.fp = fp
+        self.started = False
+
+    def _dumps(self, obj):
+        """Serialize ``obj`` to compact JSON."""
+        return json.dumps(obj, separators=self.separators)
+
+    def write_item(self, item):
+        """Write :class:`Item3` ``item``."""
+        if self.started:
+            self.fp.write(',')
+        else:
+            self.fp.write('{"items":[')
+            self.started = True
+
+        self.fp.write(self._dumps(item.obj))
+
+    def close(self, extra=None):
+        """Close item list and write top-level fields.
+
+        Args:
+            extra (dict, optional): Top-level fields, e.g.
+                ``variables`` or ``rerun``.
+
+        """
+        if not self.started:
+            self.fp.write('{"items":[')
+            self.started = True
+
+        self.fp.write(']')
+        for k, v in (extra or {}).items():
+            self.fp.write(',{0}:{1}'.format(self._dumps(k), self._dumps(v)))
+
+        self.fp.write('}')
+        self.fp.flush()
+
+
 class Workflow3(Workflow):
     """Workflow class that generates Alfred 3+ feedback.
 
@@ -459,6 +556,7 @@ class Workflow3(Workflow):
     """
 
     item_class = Item3
+    writer_class = JSONFeedbackWriter
 
     def __init__(self, **kwargs):
         """Create a new :class:`Workflow3` object.
@@ -584,9 +682,10 @@ class Workflow3(Workflow):
                                largetext, copytext, quicklookurl)
 
         # Add variables to child item
-        item.variables.update(self.variables)
+        if self.variables:
+            item.variables.update(self.variables)
 
-        self._items.append(item)
+        self._append_item(item)
         return item
 
     @property
@@ -622,7 +721,8 @@ class Workflow3(Workflow):
 
         return super(Workflow3, self).cache_data(name, data)
 
-    def cached_data(self, name, data_func=None, max_age=60, session=False):
+    def cached_data(self, name, data_func=None, max_age=60, session=False,
+                    stale_ok=False, refresh=None):
         """Cache API with session-scoped expiry.
 
         .. versionadded:: 1.25
@@ -634,8 +734,12 @@ class Workflow3(Workflow):
             max_age (int): Maximum allowable age of cache in seconds.
             session (bool, optional): Whether to scope the cache
                 to the current session.
+            stale_ok (bool, optional): Return stale data and run
+                ``refresh`` in the background.
+            refresh (list, optional): Command to update the cache.
 
-        ``name``, ``data_func`` and ``max_age`` are the same as for the
+        ``name``, ``data_func``, ``max_age``, ``stale_ok`` and ``refresh``
+        are the same as for the
         :meth:`~workflow.Workflow.cached_data` method on
         :class:`~workflow.Workflow`.
 
@@ -646,7 +750,8 @@ class Workflow3(Workflow):
         if session:
             name = self._mk_session_name(name)
 
-        return super(Workflow3, self).cached_data(name, data_func, max_age)
+        return super(Workflow3, self).cached_data(name, data_func, max_age,
+                                                  stale_ok, refresh)
 
     def clear_session_cache(self, current=False):
         """Remove session data from the cache.
@@ -683,10 +788,7 @@ class Workflow3(Workflow):
             items.append(item.obj)
 
         o = {'items': items}
-        if self.variables:
-            o['variables'] = self.variables
-        if self.rerun:
-            o['rerun'] = self.rerun
+        o.update(self._feedback_extra())
         return o
 
     def warn_empty(self, title, subtitle=u'', icon=None):
@@ -715,7 +817,11 @@ class Workflow3(Workflow):
         icon = icon or ICON_WARNING
         return self.add_item(title, subtitle, icon=icon)
 
-    def send_feedback(self):
-        """Print stored items to console/Alfred as JSON."""
-        json.dump(self.obj, sys.stdout)
-        sys.stdout.flush()
+    def _feedback_extra(self):
+        """Top-level feedback fields other than items."""
+        o = {}
+        if self.variables:
+            o['variables'] = self.variables
+        if self.rerun:
+            o['rerun'] = self.rerun
+        return o
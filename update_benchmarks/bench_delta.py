@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Compare full and delta updates end to end.
+
+A local HTTP server stands in for GitHub, serving two synthetic
+releases of a workflow with delta update manifests. Version 2
+changes a few small files and leaves a large binary unchanged.
+
+Delta updates need the workflow file of an earlier update, so the
+first install is always a full download.
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import BaseHTTPServer
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import SocketServer
+import sys
+import tempfile
+import threading
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+TEMPDIR = tempfile.mkdtemp()
+os.environ.update({
+    'alfred_workflow_bundleid': 'net.deanishe.bench',
+    'alfred_workflow_cache': os.path.join(TEMPDIR, 'cache'),
+    'alfred_workflow_data': os.path.join(TEMPDIR, 'data'),
+    'alfred_version': '4.0',
+})
+
+from workflow import update  # noqa: E402
+
+REPO = 'deanishe/bench'
+FILENAME = 'Bench.alfredworkflow'
+
+
+def make_release(dirpath, version, files):
+    """Build workflow file and manifest for ``version``."""
+    reldir = os.path.join(dirpath, version)
+    os.makedirs(reldir)
+    path = os.path.join(reldir, FILENAME)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name in sorted(files):
+            zf.writestr(name, files[name])
+
+    with open(path + update.MANIFEST_EXTENSION, 'wb') as fp:
+        json.dump(update.build_manifest(path), fp)
+
+    return path
+
+
+def make_releases(dirpath):
+    """Create two releases. Return paths to workflow files."""
+    files = {'bin/helper': os.urandom(2 * 1024 * 1024),
+             'icon.png': os.urandom(50 * 1024),
+             'info.plist': b'<plist>version 1.0.0</plist>'}
+    for i in range(50):
+        files['lib/module{0:02d}.py'.format(i)] = \
+            b''.join(os.urandom(8).encode('hex') + b'\n' for _ in range(400))
+
+    v1 = make_release(dirpath, 'v1.0.0', files)
+    files['info.plist'] = b'<plist>version 2.0.0</plist>'
+    files['lib/module07.py'] += b'# fixed\n'
+    files['lib/new.py'] = b'print("new")\n'
+    v2 = make_release(dirpath, 'v2.0.0', files)
+    return v1, v2
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Threaded server that counts bytes sent."""
+
+    daemon_threads = True
+    dirpath = None
+    ranges = True  # whether to honour Range header
+    sent = 0
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serve releases JSON and release files, with Range support."""
+
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+
+    def do_GET(self):  # noqa: N802
+        """Send releases or (part of) a file."""
+        if self.path.startswith('/repos/'):
+            return self.send_body(self.releases(), 'application/json')
+
+        path = os.path.join(self.server.dirpath, self.path.lstrip('/'))
+        if not os.path.exists(path):
+            return self.send_body(b'not found', 'text/plain', 404)
+
+        with open(path, 'rb') as fp:
+            data = fp.read()
+
+        m = re.match(r'bytes=(\d+)-(\d+)$', self.headers.get('Range', ''))
+        if m and self.server.ranges:
+            start, end = int(m.group(1)), int(m.group(2)) + 1
+            return self.send_body(data[start:end], status=206, headers=[
+                ('Content-Range', 'bytes {0}-{1}/{2}'.format(
+                 start, end - 1, len(data)))])
+
+        self.send_body(data)
+
+    def send_body(self, body, mimetype='application/octet-stream',
+                  status=200, headers=()):
+        """Send response."""
+        self.send_response(status)
+        self.send_header('Content-Type', mimetype)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.sent += len(body)
+
+    def releases(self):
+        """GitHub-like releases JSON, newest first."""
+        base = 'http://{0}:{1}/'.format(*self.server.server_address)
+        releases = []
+        for tag in ('v2.0.0', 'v1.0.0'):
+            path = os.path.join(self.server.dirpath, tag, FILENAME)
+            with open(path, 'rb') as fp:
+                digest = hashlib.sha256(fp.read()).hexdigest()
+            url = base + tag + '/' + FILENAME
+            releases.append({'tag_name': tag, 'prerelease': False, 'assets': [
+                {'browser_download_url': url, 'digest': 'sha256:' + digest},
+                {'browser_download_url': url + update.MANIFEST_EXTENSION},
+            ]})
+        return json.dumps(releases).encode('utf-8')
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+
+def retrieve(server, dl, expected):
+    """Retrieve ``dl``, check it matches ``expected``, return bytes sent."""
+    server.sent = 0
+    path = update.retrieve_download(dl)
+    with open(path, 'rb') as fp, open(expected, 'rb') as fp2:
+        assert fp.read() == fp2.read()
+    return server.sent
+
+
+def main():
+    """Run benchmark."""
+    server = Server(('127.0.0.1', 0), Handler)
+    server.dirpath = os.path.join(TEMPDIR, 'releases')
+    v1, v2 = make_releases(server.dirpath)
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    update.RELEASES_BASE = 'http://127.0.0.1:{0}/repos/{{}}/releases'.format(
+        server.server_port)
+    wf = update.wf()
+    wf.logger.setLevel(logging.ERROR)
+
+    try:
+        dls = update.get_downloads(REPO)
+        new, old = dls
+        assert new.manifest_url and new.digest
+
+        size = os.path.getsize(v2)
+        print('workflow file: {0} KB'.format(size // 1024))
+
+        # No base file, so full download
+        sent = retrieve(server, old, v1)
+        print('install v1 (full)   : {0:5d} KB sent'.format(sent // 1024))
+
+        sent = retrieve(server, new, v2)
+        print('update to v2 (delta): {0:5d} KB sent ({1:.1%})'.format(
+              sent // 1024, float(sent) / size))
+
+        # Broken manifest falls back to full download
+        new.manifest_url += '.missing'
+        sent = retrieve(server, new, v2)
+        print('bad manifest (full) : {0:5d} KB sent'.format(sent // 1024))
+
+        # Server ignores Range, so delta is abandoned for full download
+        new.manifest_url = new.manifest_url[:-len('.missing')]
+        server.ranges = False
+        retrieve(server, new, v2)
+        print('no Range (full)     : OK')
+    finally:
+        server.shutdown()
+        shutil.rmtree(TEMPDIR)
+
+
+if __name__ == '__main__':
+    main()
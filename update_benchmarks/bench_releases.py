@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Compare parsing all releases with ``update.find_update``.
+
+A local HTTP server stands in for GitHub's releases API, serving
+1000 synthetic releases, newest first, in pages with ``Link``
+headers and ETags. The newest releases are pre-releases and releases
+that require a newer Alfred, so a few have to be skipped.
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import BaseHTTPServer
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import SocketServer
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+TEMPDIR = tempfile.mkdtemp()
+os.environ.update({
+    'alfred_workflow_bundleid': 'net.deanishe.bench',
+    'alfred_workflow_cache': os.path.join(TEMPDIR, 'cache'),
+    'alfred_workflow_data': os.path.join(TEMPDIR, 'data'),
+    'alfred_version': '4.0',
+})
+
+from workflow import update  # noqa: E402
+
+RELEASES = 1000
+RUNS = 10
+REPO = 'deanishe/bench'
+
+
+def make_releases(n):
+    """Generate ``n`` releases like GitHub's, newest first."""
+    releases = []
+    for i in reversed(range(n)):
+        tag = 'v1.{0}.0'.format(i)
+        url = 'https://github.com/{0}/releases/download/{1}/'.format(REPO,
+                                                                     tag)
+        assets = [{'browser_download_url': url + 'Bench.alfredworkflow'},
+                  {'browser_download_url': url + 'Bench.alfred4workflow'}]
+        if i >= n - 3:  # newest releases need Alfred 5
+            assets = [{'browser_download_url': url + 'Bench.alfred5workflow'}]
+
+        releases.append({
+            'tag_name': tag,
+            'prerelease': n - 6 <= i < n - 3,
+            'body': 'Release notes ' * 50,
+            'assets': assets,
+        })
+    return releases
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Threaded server that counts pages served."""
+
+    daemon_threads = True
+    releases = None
+    pages = 0
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serve a page of releases."""
+
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+
+    def do_GET(self):  # noqa: N802
+        """Send page given by ``page`` and ``per_page`` query params."""
+        per_page = int(re.search(r'per_page=(\d+)', self.path).group(1))
+        m = re.search(r'[?&]page=(\d+)', self.path)
+        page = int(m.group(1)) if m else 1
+        releases = self.server.releases
+        body = json.dumps(
+            releases[(page - 1) * per_page:page * per_page]).encode('utf-8')
+        etag = '"{0}"'.format(hashlib.md5(body).hexdigest())
+
+        self.server.pages += 1
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        if page * per_page < len(releases):
+            base = 'http://{0}:{1}{2}'.format(
+                self.server.server_address[0], self.server.server_port,
+                self.path.split('?')[0])
+            self.send_header('Link', '<{0}?per_page={1}&page={2}>; '
+                             'rel="next"'.format(base, per_page, page + 1))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+
+def parse_all():
+    """Load and parse every release, then pick the newest download."""
+    dls = update.get_downloads(REPO)
+    return update.latest_download(dls, prereleases=False)
+
+
+def find_update():
+    """Stop after the first page with a newer compatible release."""
+    return update.find_update(REPO, update.Version('1.0.0'))
+
+
+def main():
+    """Run benchmark."""
+    server = Server(('127.0.0.1', 0), Handler)
+    server.releases = make_releases(RELEASES)
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    update.RELEASES_BASE = 'http://127.0.0.1:{0}/repos/{{}}/releases'.format(
+        server.server_port)
+    wf = update.wf()
+    wf.logger.setLevel(logging.ERROR)
+
+    try:
+        print('{0} releases'.format(RELEASES))
+        expected = 'v1.{0}.0'.format(RELEASES - 7)
+        for func in (parse_all, find_update):
+            duration = 0
+            for _ in range(RUNS):
+                wf.clear_cache(lambda fn: fn.startswith('github-releases-'))
+                server.pages = 0
+                st = time.time()
+                dl = func()
+                duration += time.time() - st
+                assert dl.version == update.Version(expected), dl
+                assert dl.filename == 'Bench.alfred4workflow', dl
+
+            print('{0:11s}: {1:7.2f} ms, {2:2d} page(s) fetched'.format(
+                  func.__name__, duration * 1000 / RUNS, server.pages))
+
+        # All pages are still loaded when they are unchanged (304)
+        n = len(update.get_downloads(REPO))
+        past = time.time() - 3600
+        for path in glob.glob(wf.cachefile('github-releases-*')):
+            os.utime(path, (past, past))
+        assert len(update.get_downloads(REPO)) == n, n
+
+        # No update when installed version is newest compatible
+        assert update.find_update(REPO, update.Version(expected)) is None
+        # Pre-releases are used if wanted
+        dl = update.find_update(REPO, update.Version('1.0.0'),
+                                prereleases=True)
+        assert dl.version == update.Version('v1.{0}.0'.format(RELEASES - 4))
+
+        # A backport published after the newest release
+        wf.clear_cache(lambda fn: fn.startswith('github-releases-'))
+        backport = dict(server.releases[-1], tag_name='v1.2.5')
+        server.releases.insert(0, backport)
+        dl = update.find_update(REPO, update.Version('1.0.0'))
+        assert dl.version == update.Version(expected), dl
+        assert update.find_update(REPO, update.Version(expected)) is None
+        print('find_update: OK')
+    finally:
+        server.shutdown()
+        shutil.rmtree(TEMPDIR)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Check and time ``web.ResponseCache`` against a local server.
+
+The server's paths return different caching headers:
+
+- ``/max-age``: ``Cache-Control: max-age=1`` and an ``ETag``
+- ``/expires``: ``Expires`` 1 second after ``Date``
+- ``/no-cache``: ``Cache-Control: no-cache`` and an ``ETag``
+- ``/no-store``: ``Cache-Control: no-store``
+- ``/big/<n>``: ``max-age=60`` and a 100 KB body
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import BaseHTTPServer
+from email.utils import formatdate
+import os
+import shutil
+import SocketServer
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+from workflow import web  # noqa: E402
+
+RUNS = 200
+ETAG = b'"v1"'
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Threaded server that counts full responses."""
+
+    daemon_threads = True
+    full = 0
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Respond with caching headers according to path."""
+
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+
+    def do_GET(self):  # noqa: N802
+        """Send body or 304."""
+        time.sleep(0.005)  # network latency
+        now = time.time()
+        headers = [('Date', formatdate(now, usegmt=True))]
+        body = b'body of ' + self.path.encode('utf-8')
+
+        if self.path == '/max-age':
+            headers += [('Cache-Control', 'max-age=1'), ('ETag', ETAG)]
+        elif self.path == '/expires':
+            headers.append(('Expires', formatdate(now + 1, usegmt=True)))
+        elif self.path == '/no-cache':
+            headers += [('Cache-Control', 'no-cache'), ('ETag', ETAG)]
+        elif self.path == '/no-store':
+            headers.append(('Cache-Control', 'no-store'))
+        elif self.path.startswith('/big/'):
+            headers.append(('Cache-Control', 'max-age=60'))
+            body = b'x' * 102400
+
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            for key, value in headers:
+                self.send_header(key, value)
+            self.end_headers()
+            return
+
+        self.server.full += 1
+        self.send_response(200)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+
+def fetch(url, cache):
+    """GET ``url`` and return ``(from_cache, body)``."""
+    r = web.get(url, cache=cache)
+    r.raise_for_status()
+    return r.from_cache, r.content
+
+
+def main():
+    """Run checks and benchmark."""
+    server = Server(('127.0.0.1', 0), Handler)
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    base = 'http://127.0.0.1:{0}'.format(server.server_port)
+    dirpath = tempfile.mkdtemp()
+
+    try:
+        cache = web.ResponseCache(dirpath)
+
+        # max-age: fresh, then revalidated with 304
+        assert fetch(base + '/max-age', cache) == (False, b'body of /max-age')
+        assert fetch(base + '/max-age', cache) == (True, b'body of /max-age')
+        time.sleep(1.1)
+        assert fetch(base + '/max-age', cache) == (True, b'body of /max-age')
+        assert cache.revalidations == 1
+
+        # Expires: fresh, then refetched (no validator)
+        assert fetch(base + '/expires', cache)[0] is False
+        assert fetch(base + '/expires', cache)[0] is True
+        time.sleep(1.1)
+        assert fetch(base + '/expires', cache)[0] is False
+
+        # no-cache: always revalidated; no-store: never cached
+        fetch(base + '/no-cache', cache)
+        assert fetch(base + '/no-cache', cache)[0] is True
+        assert cache.revalidations == 2
+        fetch(base + '/no-store', cache)
+        assert fetch(base + '/no-store', cache)[0] is False
+
+        print('hits={0.hits} revalidations={0.revalidations} '
+              'misses={0.misses}'.format(cache))
+
+        # LRU eviction
+        cache = web.ResponseCache(dirpath, max_size=350000)
+        cache.clear()
+        for i in range(3):
+            fetch(base + '/big/{0}'.format(i), cache)
+        fetch(base + '/big/0', cache)  # make /big/1 least recently used
+        fetch(base + '/big/3', cache)
+        cached = [fetch(base + '/big/{0}'.format(i), cache)[0]
+                  for i in (0, 2, 3, 1)]
+        assert cached == [True, True, True, False], cached
+        print('LRU eviction: OK')
+
+        # Timing
+        for name, cache in (('no cache', None),
+                            ('cached', web.ResponseCache(dirpath))):
+            st = time.time()
+            for _ in range(RUNS):
+                fetch(base + '/big/0', cache)
+            print('{0:8s}: {1:5.2f} ms per request'.format(
+                  name, (time.time() - st) * 1000 / RUNS))
+    finally:
+        server.shutdown()
+        shutil.rmtree(dirpath)
+
+
+if __name__ == '__main__':
+    main()
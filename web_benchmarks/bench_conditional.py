@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Compare full and conditional (304) fetches of GitHub releases.
+
+A local HTTP server stands in for GitHub's releases API. It serves
+a releases JSON document with ``ETag`` and ``Last-Modified`` headers
+and answers conditional requests with 304.
+
+On a 304, the cached downloads are used without parsing the releases
+again, so the conditional fetch must be clearly faster.
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import BaseHTTPServer
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+TEMPDIR = tempfile.mkdtemp()
+os.environ.update({
+    'alfred_workflow_bundleid': 'net.deanishe.bench',
+    'alfred_workflow_cache': os.path.join(TEMPDIR, 'cache'),
+    'alfred_workflow_data': os.path.join(TEMPDIR, 'data'),
+    'alfred_version': '4.0',
+})
+
+from workflow import update  # noqa: E402
+
+RELEASES = 100
+RUNS = 20
+REPO = 'deanishe/bench'
+
+
+def make_releases(n):
+    """Generate JSON for ``n`` releases like GitHub's."""
+    releases = []
+    for i in range(n):
+        tag = 'v1.{0}.0'.format(i)
+        url = 'https://github.com/{0}/releases/download/{1}/'.format(REPO,
+                                                                     tag)
+        releases.append({
+            'tag_name': tag,
+            'prerelease': False,
+            'body': 'Release notes ' * 50,
+            'assets': [
+                {'browser_download_url': url + 'Bench.alfredworkflow'},
+                {'browser_download_url': url + 'Bench.alfred4workflow'},
+                {'browser_download_url': url + 'source.zip'},
+            ],
+        })
+    return json.dumps(releases).encode('utf-8')
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serve releases JSON with validators."""
+
+    body = make_releases(RELEASES)
+    etag = b'"releases-1"'
+    last_modified = b'Mon, 19 Oct 2026 09:00:00 GMT'
+    full = 0
+    not_modified = 0
+
+    def do_GET(self):  # noqa: N802
+        """Send releases or 304."""
+        cls = self.__class__
+        if self.headers.get('If-None-Match') == cls.etag:
+            cls.not_modified += 1
+            self.send_response(304)
+            self.send_header('ETag', cls.etag)
+            self.end_headers()
+            return
+
+        cls.full += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cls.body)))
+        self.send_header('ETag', cls.etag)
+        self.send_header('Last-Modified', cls.last_modified)
+        self.end_headers()
+        self.wfile.write(cls.body)
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+
+def timed(func, n):
+    """Return mean duration in milliseconds of ``n`` calls to ``func``."""
+    st = time.time()
+    for _ in range(n):
+        func()
+    return (time.time() - st) * 1000 / n
+
+
+def main():
+    """Run benchmark."""
+    server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    update.RELEASES_BASE = 'http://127.0.0.1:{0}/repos/{{}}/releases'.format(
+        server.server_port)
+    wf = update.wf()
+    wf.logger.setLevel(logging.WARNING)
+
+    def fetch():
+        # Expire cached downloads to force a request
+        wf.clear_cache(lambda fn: fn.startswith('github-releases-'))
+        return update.get_downloads(REPO)
+
+    def fetch_conditional():
+        # Make cached downloads stale, but keep them for use on 304
+        path = wf.cachefile('github-releases-deanishe-bench-1.cpickle')
+        past = time.time() - 3600
+        os.utime(path, (past, past))
+        return update.get_downloads(REPO)
+
+    try:
+        dls = fetch()
+        assert len(dls) == RELEASES * 2, len(dls)
+        assert fetch_conditional() == dls
+
+        full = timed(fetch, RUNS)
+        cond = timed(fetch_conditional, RUNS)
+        print('{0} releases, {1} bytes'.format(RELEASES, len(Handler.body)))
+        print('full fetch + parse  : {0:6.2f} ms'.format(full))
+        print('conditional (304)   : {0:6.2f} ms'.format(cond))
+        print('responses: {0} full, {1} not modified'.format(
+              Handler.full, Handler.not_modified))
+        assert cond < full * 0.75, (cond, full)
+    finally:
+        server.shutdown()
+        shutil.rmtree(TEMPDIR)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Compare ``iter_content`` and ``iter_buffers`` downloading a large file.
+
+A local HTTP server serves a 100 MB file. Each method's download is
+timed and the number of chunks (and so file writes) is counted.
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import BaseHTTPServer
+import os
+import shutil
+import SocketServer
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+from workflow import web  # noqa: E402
+
+SIZE = 100 * 1024 * 1024
+RUNS = 3
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Threaded server."""
+
+    daemon_threads = True
+    path = None
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serve ``server.path``."""
+
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+
+    def do_GET(self):  # noqa: N802
+        """Send file."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(SIZE))
+        self.end_headers()
+        with open(self.server.path, 'rb') as fp:
+            shutil.copyfileobj(fp, self.wfile, 1024 * 1024)
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+
+def iter_content(r, fp):
+    """Save response with ``iter_content`` (previous ``save_to_path``)."""
+    r.stream = True
+    n = 0
+    for data in r.iter_content():
+        fp.write(data)
+        n += 1
+    return n
+
+
+def iter_buffers(r, fp):
+    """Save response with ``iter_buffers``."""
+    n = 0
+    for data in r.iter_buffers():
+        fp.write(data)
+        n += 1
+    return n
+
+
+def main():
+    """Run benchmark."""
+    dirpath = tempfile.mkdtemp()
+    server = Server(('127.0.0.1', 0), Handler)
+    server.path = os.path.join(dirpath, 'source.bin')
+    with open(server.path, 'wb') as fp:
+        chunk = os.urandom(1024 * 1024)
+        for _ in range(SIZE // len(chunk)):
+            fp.write(chunk)
+
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    url = 'http://127.0.0.1:{0}/source.bin'.format(server.server_port)
+    dest = os.path.join(dirpath, 'dest.bin')
+
+    try:
+        print('{0} MB file, best of {1}'.format(SIZE // 1048576, RUNS))
+        for func in (iter_content, iter_buffers):
+            best = None
+            for _ in range(RUNS):
+                st = time.time()
+                r = web.get(url, stream=True)
+                with open(dest, 'wb') as fp:
+                    chunks = func(r, fp)
+                duration = time.time() - st
+                assert os.path.getsize(dest) == SIZE
+                best = min(best or duration, duration)
+
+            print('{0:12s}: {1:6.1f} ms, {2:6d} chunks, {3:7.1f} MB/s'.format(
+                  func.__name__, best * 1000, chunks,
+                  SIZE / best / 1048576))
+
+        # Progress callback and speed metric
+        calls = []
+        r = web.get(url, stream=True)
+        r.save_to_path(dest, progress=lambda n, total: calls.append(n))
+        assert calls[-1] == SIZE
+        print('save_to_path: {0} progress calls, {1:.1f} MB/s'.format(
+              len(calls), r.bytes_per_second / 1048576))
+    finally:
+        server.shutdown()
+        shutil.rmtree(dirpath)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Compare requests with and without connection reuse.
+
+A local HTTP/1.1 server supports keep-alive and counts the
+connections it accepts.
+
+Also checks that ``GET`` requests are retried, but ``POST`` requests
+aren't, when the server has closed a reused connection.
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import BaseHTTPServer
+import os
+import SocketServer
+import sys
+import threading
+import time
+import urllib2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+from workflow import web  # noqa: E402
+
+REQUESTS = 500
+BODY = b'x' * 2048
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Threaded server."""
+
+    daemon_threads = True
+    connections = 0
+    posts = 0
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serve a small body over persistent connections."""
+
+    protocol_version = 'HTTP/1.1'
+    # Buffer responses, so headers aren't sent in separate packets
+    wbufsize = -1
+
+    def setup(self):
+        """Count connections."""
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_GET(self):  # noqa: N802
+        """Send body, or a redirect for /redirect.
+
+        For /close, hang up without saying so, like a server closing
+        an idle connection.
+        """
+        if self.path == '/close':
+            self.close_connection = 1
+
+        if self.path == '/redirect':
+            self.send_response(302)
+            self.send_header('Location', '/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def do_POST(self):  # noqa: N802
+        """Count request and send body."""
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.posts += 1
+        self.do_GET()
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+
+def run(url, n, pool):
+    """Make ``n`` requests using connection pool ``pool``."""
+    web.pool = pool
+    st = time.time()
+    for _ in range(n):
+        r = web.get(url)
+        r.raise_for_status()
+        assert r.content == BODY
+    return time.time() - st
+
+
+def check_retries(server, base):
+    """Check requests on a connection closed by the server."""
+    web.pool = web.ConnectionPool(maxsize=4)
+    for method in ('GET', 'POST'):
+        # Connection is returned to pool, but closed by server
+        assert web.get(base + '/close').content == BODY
+        server.posts = 0
+        try:
+            r = web.request(method, base + '/',
+                            data={'q': 'x'} if method == 'POST' else None)
+            r.raise_for_status()
+            assert method != 'POST', 'POST was retried'
+        except urllib2.URLError:
+            assert method == 'POST', method
+            assert server.posts == 0, server.posts
+    web.pool.clear()
+    print('retries: OK')
+
+
+def main():
+    """Run benchmark."""
+    server = Server(('127.0.0.1', 0), Handler)
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    base = 'http://127.0.0.1:{0}'.format(server.server_port)
+
+    try:
+        print('{0} GET requests, {1} byte body'.format(REQUESTS, len(BODY)))
+        for name, path, size in (('no reuse', '/', 0),
+                                 ('pooled', '/', 4),
+                                 ('pooled, redirect', '/redirect', 4)):
+            server.connections = 0
+            pool = web.ConnectionPool(maxsize=size)
+            duration = run(base + path, REQUESTS, pool)
+            print('{0:18s}: {1:6.1f} ms, {2:4d} connections, '
+                  '{3:4d} reused'.format(name, duration * 1000,
+                                         server.connections, pool.reused))
+            pool.clear()
+
+        check_retries(server, base)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
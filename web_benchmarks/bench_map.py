@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Compare sequential requests with ``web.map``.
+
+A local HTTP server delays each response by the number of
+milliseconds given in its path.
+
+Also checks that closing ``web.imap``'s iterator early cancels the
+requests that haven't started.
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import BaseHTTPServer
+import os
+import random
+import SocketServer
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+from workflow import web  # noqa: E402
+
+REQUESTS = 20
+WORKERS = (1, 4, 20)
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Threaded server."""
+
+    daemon_threads = True
+    request_queue_size = 64
+    requests = 0
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Respond after a delay."""
+
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+
+    def do_GET(self):  # noqa: N802
+        """Sleep for /<milliseconds>, then echo path."""
+        self.server.requests += 1
+        time.sleep(int(self.path[1:]) / 1000.0)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(self.path)))
+        self.end_headers()
+        self.wfile.write(self.path)
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+
+def main():
+    """Run benchmark."""
+    server = Server(('127.0.0.1', 0), Handler)
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    base = 'http://127.0.0.1:{0}/'.format(server.server_port)
+
+    random.seed(1)
+    delays = [random.randint(50, 200) for _ in range(REQUESTS)]
+    urls = [base + str(ms) for ms in delays]
+
+    try:
+        print('{0} requests, latency sum {1} ms, slowest {2} ms'.format(
+              REQUESTS, sum(delays), max(delays)))
+
+        st = time.time()
+        for url in urls:
+            web.get(url).content
+        print('sequential     : {0:6.1f} ms'.format(
+              (time.time() - st) * 1000))
+
+        for n in WORKERS:
+            st = time.time()
+            responses = web.map(urls, max_workers=n)
+            duration = time.time() - st
+            assert [r.text for r in responses] == \
+                ['/' + str(ms) for ms in delays]
+            print('map, {0:2d} workers: {1:6.1f} ms'.format(
+                  n, duration * 1000))
+
+        # Abandon iterator after first response
+        server.requests = 0
+        it = web.imap(urls, max_workers=2)
+        next(it)
+        it.close()
+        time.sleep(0.5)
+        assert server.requests <= 3, server.requests
+        assert all(t.daemon for t in threading.enumerate()
+                   if t is not threading.current_thread()), 'not daemon'
+        print('imap closed after 1 response: {0} requests made'.format(
+              server.requests))
+    finally:
+        web.pool.clear()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
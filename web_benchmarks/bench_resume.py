@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Download a file from a server that drops connections.
+
+A local HTTP server sends part of the file and then closes the
+connection on the first few requests. Compares the bytes sent
+when downloads resume with ``Range`` and when they start again.
+
+Also checks that a partial file is only resumed if its ``ETag``
+still matches, and that only server errors are retried.
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import BaseHTTPServer
+import hashlib
+import os
+import re
+import shutil
+import SocketServer
+import sys
+import tempfile
+import threading
+import time
+import urllib2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+from workflow import web  # noqa: E402
+
+SIZE = 8 * 1024 * 1024
+DROPS = 3
+DATA = os.urandom(SIZE)
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Threaded server with settings and counters."""
+
+    daemon_threads = True
+    ranges = True  # whether to honour Range header
+    drops = 0  # number of connections still to drop
+    etag = '"v1"'  # ETag of DATA or None
+    error = None  # HTTP status to send instead of DATA
+    errors = 0  # number of times to send error
+    sent = 0
+    requests = 0
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serve ``DATA``, dropping the first ``server.drops`` connections."""
+
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+
+    def do_GET(self):  # noqa: N802
+        """Send all or part of ``DATA``."""
+        server = self.server
+        server.requests += 1
+        if server.errors:
+            server.errors -= 1
+            self.send_response(server.error)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        start = 0
+        m = re.match(r'bytes=(\d+)-$', self.headers.get('Range', ''))
+        if_range = self.headers.get('If-Range')
+        if m and server.ranges and (if_range is None or
+                                    if_range == server.etag):
+            start = int(m.group(1))
+
+        if start >= SIZE:
+            self.send_response(416)
+            self.send_header('Content-Range', 'bytes */{0}'.format(SIZE))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if start:
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {0}-{1}/{2}'.format(
+                             start, SIZE - 1, SIZE))
+        else:
+            self.send_response(200)
+
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(SIZE - start))
+        if server.etag:
+            self.send_header('ETag', server.etag)
+        self.end_headers()
+
+        body = DATA[start:]
+        if server.drops:  # send a third of what's left, then hang up
+            server.drops -= 1
+            body = body[:len(body) // 3]
+            self.close_connection = 1
+
+        self.wfile.write(body)
+        server.sent += len(body)
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+
+def run(server, url, dirpath, ranges, digest=DIGEST):
+    """Download ``url`` and print stats."""
+    server.ranges = ranges
+    server.drops = DROPS
+    server.sent = server.requests = 0
+    path = os.path.join(dirpath, 'file.bin')
+
+    st = time.time()
+    try:
+        web.download(url, path, digest)
+    except ValueError as err:
+        print('digest mismatch: {0}'.format(err))
+        assert not os.path.exists(path + '.part')
+        return
+    duration = time.time() - st
+
+    with open(path, 'rb') as fp:
+        assert fp.read() == DATA
+    os.unlink(path)
+
+    print('{0:14s}: {1:6.1f} ms, {2} requests, {3:5.1f} MB sent '
+          '({4:.2f}x file size)'.format(
+              'resume' if ranges else 'no Range', duration * 1000,
+              server.requests, server.sent / 1048576.0,
+              float(server.sent) / SIZE))
+
+
+def check(server, url, dirpath):
+    """Check validation of partial files and retries."""
+    path = os.path.join(dirpath, 'file.bin')
+    partial = path + '.part'
+    server.drops = 0
+
+    # Partial file of another version of the file is discarded
+    for etag in ('"v2"', None):
+        with open(partial, 'wb') as fp:
+            fp.write(os.urandom(1000))
+        with open(partial + '.validator', 'wb') as fp:
+            fp.write(b'"v1"')
+        server.etag = etag
+        server.sent = 0
+        web.download(url, path, DIGEST)
+        assert server.sent == SIZE, server.sent
+        assert not os.path.exists(partial + '.validator')
+        os.unlink(path)
+
+    # Partial file without validator is discarded
+    with open(partial, 'wb') as fp:
+        fp.write(DATA[:1000])
+    server.sent = 0
+    web.download(url, path, DIGEST)
+    assert server.sent == SIZE, server.sent
+    os.unlink(path)
+    server.etag = '"v1"'
+
+    # Client errors aren't retried, server errors are
+    for status, requests in ((404, 1), (503, 3)):
+        server.error, server.errors = status, 2
+        server.requests = 0
+        try:
+            web.download(url, path, DIGEST)
+        except urllib2.HTTPError as err:
+            assert err.code == status == 404, err
+        assert server.requests == requests, (status, server.requests)
+        if os.path.exists(path):
+            os.unlink(path)
+    server.errors = 0
+    print('validation and retries: OK')
+
+
+def main():
+    """Run benchmark."""
+    server = Server(('127.0.0.1', 0), Handler)
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    url = 'http://127.0.0.1:{0}/file.bin'.format(server.server_port)
+    dirpath = tempfile.mkdtemp()
+
+    try:
+        print('{0} MB file, first {1} connections dropped'.format(
+              SIZE // 1048576, DROPS))
+        run(server, url, dirpath, True)
+        run(server, url, dirpath, False)
+        run(server, url, dirpath, True, digest='0' * 64)
+        check(server, url, dirpath)
+    finally:
+        server.shutdown()
+        shutil.rmtree(dirpath)
+
+
+if __name__ == '__main__':
+    main()
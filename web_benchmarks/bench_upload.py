@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# Copyright (c) 2026 deanishe@deanishe.net
+#
+# MIT Licence. See http://opensource.org/licenses/MIT
+#
+# Created on 2026-10-19
+#
+
+"""Compare peak memory of uploading a file as a string and as a stream.
+
+Each upload runs in a separate process, so its peak RSS can be
+measured. A local server reads and discards the request body and
+checks its length against ``Content-Length``.
+"""
+
+from __future__ import print_function, unicode_literals, absolute_import
+
+import BaseHTTPServer
+import os
+import resource
+import shutil
+import SocketServer
+import subprocess
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), 'src'))
+
+from workflow import web  # noqa: E402
+
+SIZES = (10, 50, 100)  # MB
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Threaded server."""
+
+    daemon_threads = True
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Read upload and respond with number of bytes received."""
+
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+
+    def do_POST(self):  # noqa: N802
+        """Read body."""
+        assert 'Transfer-Encoding' not in self.headers
+        length = int(self.headers['Content-Length'])
+        received = 0
+        while received < length:
+            data = self.rfile.read(min(65536, length - received))
+            if not data:
+                break
+            received += len(data)
+
+        body = str(received)
+        self.send_response(200 if received == length else 400)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+
+def maxrss():
+    """Peak RSS of this process in MB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':  # bytes, not KB
+        rss /= 1024
+    return rss / 1024.0
+
+
+def upload(url, path, mode):
+    """Upload file at ``path``. Print peak RSS increase."""
+    base = maxrss()
+    with open(path, 'rb') as fp:
+        if mode == 'string':
+            content = fp.read()
+        else:
+            content = fp
+
+        r = web.post(url, data={'name': 'value'}, files={
+            'file': {'filename': 'file.bin', 'content': content}})
+        r.raise_for_status()
+        assert int(r.content) > os.path.getsize(path)
+
+    print('{0:.1f}'.format(maxrss() - base))
+
+
+def main():
+    """Run benchmark."""
+    server = Server(('127.0.0.1', 0), Handler)
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    url = 'http://127.0.0.1:{0}/'.format(server.server_port)
+    dirpath = tempfile.mkdtemp()
+
+    try:
+        print('peak RSS increase during upload')
+        for size in SIZES:
+            path = os.path.join(dirpath, 'file.bin')
+            with open(path, 'wb') as fp:
+                chunk = os.urandom(1024 * 1024)
+                for _ in range(size):
+                    fp.write(chunk)
+
+            for mode in ('string', 'stream'):
+                output = subprocess.check_output(
+                    [sys.executable, __file__, url, path, mode])
+                print('{0:3d} MB, {1:6s}: {2:>6s} MB'.format(
+                      size, mode, output.strip()))
+    finally:
+        server.shutdown()
+        shutil.rmtree(dirpath)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4:
+        upload(*sys.argv[1:])
+    else:
+        main()